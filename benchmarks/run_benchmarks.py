@@ -0,0 +1,313 @@
+"""
+Scaling benchmarks for FakeRecordGenerator and its components.
+
+Times create_fake_records at increasing sizes & duplicate percentages,
+plus micro-benchmarks of the per-field helpers, reporting records per
+second and peak memory. Each benchmark runs in a fresh Python process,
+so that its peak memory is its own.
+
+Results can be saved as a JSON baseline and later runs compared against it:
+
+    python benchmarks/run_benchmarks.py --save baseline.json
+    python benchmarks/run_benchmarks.py --compare baseline.json --threshold 0.25
+
+Comparing exits with status 1 if any benchmark's throughput fell, or its
+peak memory grew, by more than the threshold.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from datetime import date
+from typing import Callable, Dict, List, Optional
+
+SOURCE_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+DEFAULT_SIZES = [1000, 10000, 100000, 1000000]
+DEFAULT_PERCENTS = [0.0, 3.0, 30.0]
+MICRO_BENCHMARK_SIZE = 100000
+
+
+# Each _prepare_* function does its benchmark's setup (imports, building
+# the objects) and returns the workload to time, which returns the number
+# of records it handled.
+
+
+def _prepare_records(
+    num_records: int, percent_records_to_duplicate: float
+) -> Callable[[], int]:
+    # pylint: disable=import-outside-toplevel
+    from redcaprecordsynthesizer.fake_records import FakeRecordGenerator
+    from redcaprecordsynthesizer.id_allocation import id_range_for_width
+
+    # Ranges wide enough for a million records plus their duplicates.
+    fake_record_generator = FakeRecordGenerator(
+        mrn_range=id_range_for_width(9),
+        quiet=True,
+        seed=0,
+        study_id_range=id_range_for_width(8),
+    )
+
+    def create_records() -> int:
+        records = fake_record_generator.create_fake_records(
+            num_records_desired=num_records,
+            percent_records_to_duplicate=percent_records_to_duplicate,
+            reference_date=date(2024, 1, 1),
+        )
+        return len(records)
+
+    return create_records
+
+
+def _prepare_nickname_get(count: int) -> Callable[[], int]:
+    # pylint: disable=import-outside-toplevel
+    from redcaprecordsynthesizer.nickname_lookup.python_parser import (
+        NicknameGenerator,
+    )
+
+    nickname_generator = NicknameGenerator()
+    names = nickname_generator.canonical_names
+    names = [names[index % len(names)] for index in range(count)]
+
+    def get_nicknames() -> int:
+        for name in names:
+            nickname_generator.get(name)
+
+        return count
+
+    return get_nicknames
+
+
+def _prepare_state_full_name(count: int) -> Callable[[], int]:
+    # pylint: disable=import-outside-toplevel
+    from redcaprecordsynthesizer.state_abbr_conversion import (
+        STATE_NAMES,
+        StateAbbreviationConverter,
+    )
+
+    state_abbreviation_converter = StateAbbreviationConverter()
+    abbreviations = [
+        list(STATE_NAMES)[index % len(STATE_NAMES)] for index in range(count)
+    ]
+
+    def get_full_names() -> int:
+        for abbreviation in abbreviations:
+            state_abbreviation_converter.full_name(abbreviation)
+
+        return count
+
+    return get_full_names
+
+
+def _prepare_study_id_allocation(count: int) -> Callable[[], int]:
+    # pylint: disable=import-outside-toplevel
+    from redcaprecordsynthesizer.id_allocation import (
+        PermutationIdAllocator,
+        id_range_for_width,
+    )
+
+    id_allocator = PermutationIdAllocator(*id_range_for_width(9))
+
+    def allocate_ids() -> int:
+        # Half one at a time (like create_fake_study_id), half in one batch.
+        for _ in range(count // 2):
+            id_allocator.allocate()
+
+        id_allocator.allocate_many(count=count - count // 2)
+        return count
+
+    return allocate_ids
+
+
+def _prepare_email_synthesis(count: int) -> Callable[[], int]:
+    # pylint: disable=import-outside-toplevel
+    import numpy
+    import pandas  # type: ignore[import]
+
+    from redcaprecordsynthesizer.fake_records import FakeRecordGenerator
+
+    rng = numpy.random.default_rng(0)
+    given_names = pandas.Series(rng.choice(["Ann", "Bob", "Carlos", "Dee"], count))
+    surnames = pandas.Series(rng.choice(["Smith", "Lee", "Garcia", "Ng"], count))
+    fake_record_generator = FakeRecordGenerator(quiet=True, seed=0)
+
+    def create_emails() -> int:
+        # pylint: disable=protected-access
+        fake_record_generator._create_fake_email_addresses(
+            given_names=given_names, surnames=surnames
+        )
+        return count
+
+    return create_emails
+
+
+MICRO_BENCHMARKS: Dict[str, Callable[[int], Callable[[], int]]] = {
+    "NicknameGenerator.get": _prepare_nickname_get,
+    "StateAbbreviationConverter.full_name": _prepare_state_full_name,
+    "study id allocation": _prepare_study_id_allocation,
+    "email synthesis": _prepare_email_synthesis,
+}
+
+
+def _run_one(benchmark: dict) -> dict:
+    """Runs one benchmark in this process and measures it."""
+    if benchmark["kind"] == "records":
+        workload = _prepare_records(
+            num_records=benchmark["num_records"],
+            percent_records_to_duplicate=benchmark["percent_records_to_duplicate"],
+        )
+    else:
+        workload = MICRO_BENCHMARKS[benchmark["name"]](benchmark["num_records"])
+
+    # pylint: disable=import-outside-toplevel
+    from redcaprecordsynthesizer.cli import peak_rss_megabytes
+
+    start_time = time.perf_counter()
+    num_records = workload()
+    elapsed_seconds = time.perf_counter() - start_time
+    return {
+        "seconds": elapsed_seconds,
+        "records_per_second": num_records / elapsed_seconds,
+        # 0 where the platform doesn't report it, so memory is never compared.
+        "peak_memory_mb": peak_rss_megabytes() or 0.0,
+    }
+
+
+def _benchmarks(sizes: List[int], percents: List[float]) -> List[dict]:
+    benchmarks = [
+        {
+            "kind": "records",
+            "name": f"create_fake_records n={num_records} "
+            f"duplicates={percent_records_to_duplicate:g}%",
+            "num_records": num_records,
+            "percent_records_to_duplicate": percent_records_to_duplicate,
+        }
+        for num_records in sizes
+        for percent_records_to_duplicate in percents
+    ]
+    benchmarks += [
+        {"kind": "micro", "name": name, "num_records": MICRO_BENCHMARK_SIZE}
+        for name in MICRO_BENCHMARKS
+    ]
+    return benchmarks
+
+
+def _run_in_subprocess(benchmark: dict) -> dict:
+    environment = dict(os.environ)
+    environment["PYTHONPATH"] = os.pathsep.join(
+        [SOURCE_DIRECTORY] + [environment.get("PYTHONPATH", "")]
+    )
+    completed = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--run-one", json.dumps(benchmark)],
+        capture_output=True,
+        check=False,
+        env=environment,
+        text=True,
+    )
+
+    if completed.returncode != 0:
+        raise RuntimeError(f"Benchmark {benchmark['name']} failed:\n{completed.stderr}")
+
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def _regressions(
+    results: Dict[str, dict], baseline: Dict[str, dict], threshold: float
+) -> List[str]:
+    """Lists the benchmarks that got slower, or bigger, than the threshold allows."""
+    regressions = []
+
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+
+        slowest_allowed = baseline[name]["records_per_second"] * (1 - threshold)
+        largest_allowed = baseline[name]["peak_memory_mb"] * (1 + threshold)
+
+        if result["records_per_second"] < slowest_allowed:
+            regressions.append(
+                f"{name}: {result['records_per_second']:,.0f} records/s, "
+                f"baseline {baseline[name]['records_per_second']:,.0f}"
+            )
+
+        if result["peak_memory_mb"] > largest_allowed:
+            regressions.append(
+                f"{name}: peak {result['peak_memory_mb']:,.0f} MB, "
+                f"baseline {baseline[name]['peak_memory_mb']:,.0f} MB"
+            )
+
+    return regressions
+
+
+def _parse_arguments(argv: Optional[List[str]]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument(
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=DEFAULT_SIZES,
+        help=f"Numbers of records to synthesize. Default: {DEFAULT_SIZES}",
+    )
+    parser.add_argument(
+        "--percents",
+        type=float,
+        nargs="+",
+        default=DEFAULT_PERCENTS,
+        help=f"Duplicate percentages. Default: {DEFAULT_PERCENTS}",
+    )
+    parser.add_argument("--save", help="Write the results to this JSON file.")
+    parser.add_argument("--compare", help="Baseline JSON file to compare with.")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.25,
+        help="Largest tolerated fractional regression. Default: 0.25",
+    )
+    parser.add_argument("--run-one", help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Runs the benchmarks; returns 1 if any regressed past the threshold."""
+    arguments = _parse_arguments(argv)
+
+    if arguments.run_one is not None:
+        print(json.dumps(_run_one(json.loads(arguments.run_one))))
+        return 0
+
+    results: Dict[str, dict] = {}
+
+    for benchmark in _benchmarks(sizes=arguments.sizes, percents=arguments.percents):
+        result = _run_in_subprocess(benchmark)
+        results[benchmark["name"]] = result
+        print(
+            f"{benchmark['name']:<50} {result['records_per_second']:>14,.0f} records/s"
+            f" {result['peak_memory_mb']:>8,.0f} MB peak",
+            flush=True,
+        )
+
+    if arguments.save is not None:
+        with open(arguments.save, "w", encoding="utf-8") as results_file:
+            json.dump(results, results_file, indent=2, sort_keys=True)
+
+    if arguments.compare is not None:
+        with open(arguments.compare, encoding="utf-8") as baseline_file:
+            baseline = json.load(baseline_file)
+
+        regressions = _regressions(
+            results=results, baseline=baseline, threshold=arguments.threshold
+        )
+
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+
+        if regressions:
+            return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -7,6 +7,9 @@ setup(
         "Programming Language :: Python :: 3.12",
     ],
     description="Creates synthetic REDCap-like records for software testing.",
+    entry_points={
+        "console_scripts": ["redcap-synth=redcaprecordsynthesizer.cli:main"],
+    },
     include_package_data=True,
     license="",
     name="REDCapRecordSynthesizer",
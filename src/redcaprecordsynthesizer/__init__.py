@@ -1,6 +1,6 @@
-"""
-REDCap Record Synthesizer
-
-Class FakeRecordGenerator, which lets us synthesize
-patient records with realistic data.
-"""
+"""
+REDCap Record Synthesizer
+
+Class FakeRecordGenerator, which lets us synthesize
+patient records with realistic data.
+"""
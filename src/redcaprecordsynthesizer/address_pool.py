@@ -0,0 +1,217 @@
+"""
+Module: contains class AddressPool, a precomputed set of consistent
+(street, city, state, zip code) addresses that records can draw from
+instead of asking Faker for a new address every time.
+"""
+
+import os
+from typing import List, Optional, Union
+
+import numpy
+import pandas  # type: ignore[import]
+from faker import Faker  # type: ignore[import]
+
+# Address columns, in record order.
+ADDRESS_FIELDS = ["street_address_line_1", "city", "state", "zip_code"]
+
+# Faker methods a locale needs for consistent US addresses. Locales with
+# no address provider of their own borrow en_US's, so have them too.
+US_ADDRESS_METHODS = ("state_abbr", "zipcode_in_state")
+
+
+def makes_us_addresses(fake: Faker) -> bool:
+    """Tells whether a Faker can make US addresses.
+
+    Given several locales, Faker answers each call from one of the locales
+    having that method, so one such locale is enough: ["en_US", "en_GB"]
+    draws every state & zip code from en_US.
+
+    Parameters
+    ----------
+    fake : Faker
+
+    Returns
+    -------
+    bool
+        True if one of its locales has all of US_ADDRESS_METHODS.
+    """
+    return any(
+        all(hasattr(factory, method) for method in US_ADDRESS_METHODS)
+        for factory in fake.factories
+    )
+
+
+class AddressPool:
+    """
+    A fixed set of synthetic addresses, each with a zip code in its state.
+
+    Faker's address providers are among its slowest, so the pool calls them
+    once per address in the pool; records then pick addresses by drawing
+    random row numbers, which costs one numpy call per batch.
+
+    ...
+
+    Attributes
+    ----------
+    addresses : pandas DataFrame
+    size : int
+
+    Methods
+    -------
+    sample(count, rng=None)
+        Draws count addresses (with replacement).
+    save(path)
+        Writes the pool to a CSV file.
+    load(path)
+        Class method: reads a pool written by save().
+    """
+
+    def __init__(
+        self,
+        locale: Union[str, List[str], None] = None,
+        seed: Optional[int] = None,
+        size: int = 10000,
+    ) -> None:
+        """Synthesizes the pool.
+
+        Parameters
+        ----------
+        locale : str or list of str
+            Optional. Faker locale(s); one must make US addresses, like
+            "en_US" (see makes_us_addresses). Default: Faker's default locale
+        seed : int
+            Optional. The same seed (and locale) gives the same pool.
+            Default: None (unpredictable)
+        size : int
+            Optional. Number of addresses. Default: 10000
+
+        Raises
+        ------
+        TypeError
+            If inputs not the required types, or no locale makes
+            US addresses.
+        """
+        if not isinstance(size, int) or isinstance(size, bool) or size <= 0:
+            raise TypeError("Input 'size' is not a positive int.")
+
+        if seed is not None and (
+            not isinstance(seed, int) or isinstance(seed, bool) or seed < 0
+        ):
+            raise TypeError("Input 'seed' is not a non-negative int.")
+
+        fake = Faker(locale)
+
+        if not makes_us_addresses(fake):
+            raise TypeError(
+                f"Input 'locale' ({locale}) has no locale making US addresses."
+            )
+
+        if seed is not None:
+            fake.seed_instance(seed)
+
+        columns: dict = {field: [] for field in ADDRESS_FIELDS}
+
+        for _ in range(size):
+            # Exclude territories (like the Virgin Islands) because
+            # methods postalcode_in_state and zipcode_in_state
+            # can't handle territories.
+            state_abbr = fake.state_abbr(include_territories=False)
+            columns["street_address_line_1"].append(fake.street_address())
+            columns["city"].append(fake.city())
+            columns["state"].append(state_abbr)
+            columns["zip_code"].append(fake.zipcode_in_state(state_abbr))
+
+        self.__set_addresses(pandas.DataFrame(columns, dtype=str))
+
+    @property
+    def addresses(self) -> pandas.DataFrame:
+        """A copy of the pool's addresses, one row per address."""
+        return self.__addresses.copy()
+
+    @property
+    def size(self) -> int:
+        """Number of addresses in the pool."""
+        return len(self.__addresses)
+
+    def sample(
+        self, count: int, rng: Optional[numpy.random.Generator] = None
+    ) -> pandas.DataFrame:
+        """Draws addresses at random, with replacement.
+
+        Parameters
+        ----------
+        count : int
+            Number of addresses wanted.
+        rng : numpy Generator
+            Optional. Source of the random draws. Default: a fresh generator
+
+        Returns
+        -------
+        pandas DataFrame
+            count rows of ADDRESS_FIELDS, indexed from 0.
+
+        Raises
+        ------
+        TypeError
+            If count is not a non-negative int.
+        """
+        if not isinstance(count, (int, numpy.integer)) or count < 0:
+            raise TypeError("Input 'count' is not a non-negative int.")
+
+        rng = rng or numpy.random.default_rng()
+        rows = rng.integers(0, self.size, size=int(count))
+        return pandas.DataFrame(
+            {
+                field: pandas.Series(values[rows], dtype=str)
+                for field, values in self.__columns.items()
+            }
+        )
+
+    def save(self, path: Union[str, os.PathLike]) -> None:
+        """Writes the pool to a CSV file, so it can be reused with load().
+
+        Parameters
+        ----------
+        path : str or path
+        """
+        self.__addresses.to_csv(path, index=False)
+
+    @classmethod
+    def load(cls, path: Union[str, os.PathLike]) -> "AddressPool":
+        """Reads a pool written by save().
+
+        Parameters
+        ----------
+        path : str or path
+
+        Returns
+        -------
+        AddressPool
+
+        Raises
+        ------
+        FileNotFoundError
+            If the file doesn't exist.
+        TypeError
+            If the file doesn't hold an address pool.
+        """
+        addresses = pandas.read_csv(path, dtype=str, keep_default_na=False)
+
+        if list(addresses.columns) != ADDRESS_FIELDS or len(addresses) == 0:
+            raise TypeError(f"File {path} does not contain an address pool.")
+
+        address_pool = cls.__new__(cls)
+        address_pool.__set_addresses(addresses)
+        return address_pool
+
+    def __set_addresses(self, addresses: pandas.DataFrame) -> None:
+        self.__addresses = addresses
+
+        # Plain object arrays, so that sampling is a single fancy index each.
+        self.__columns = {
+            field: addresses[field].to_numpy(dtype=object) for field in ADDRESS_FIELDS
+        }
+
+
+if __name__ == "__main__":
+    pass
@@ -0,0 +1,33 @@
+import os
+from typing import List, Optional, Tuple, Union
+
+import numpy
+import pandas
+from faker import Faker
+
+ADDRESS_FIELDS: List[str]
+US_ADDRESS_METHODS: Tuple[str, ...]
+
+def makes_us_addresses(fake: Faker) -> bool: ...
+
+class AddressPool:
+    def __init__(
+        self,
+        locale: Union[str, List[str], None] = ...,
+        seed: Optional[int] = ...,
+        size: int = ...,
+    ) -> None:
+        self.__addresses = None
+        self.__columns = None
+        ...
+
+    @property
+    def addresses(self) -> pandas.DataFrame: ...
+    @property
+    def size(self) -> int: ...
+    def sample(
+        self, count: int, rng: Optional[numpy.random.Generator] = ...
+    ) -> pandas.DataFrame: ...
+    def save(self, path: Union[str, os.PathLike]) -> None: ...
+    @classmethod
+    def load(cls, path: Union[str, os.PathLike]) -> "AddressPool": ...
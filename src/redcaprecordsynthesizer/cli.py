@@ -0,0 +1,300 @@
+"""
+Module: the redcap-synth command, which synthesizes REDCap-like records
+straight to a CSV, REDCap import or Parquet file.
+
+pandas & Faker are only imported once the arguments have been parsed,
+so that `redcap-synth --help` (and argument errors) return quickly.
+"""
+
+import argparse
+import os
+import sys
+import time
+from datetime import date
+from typing import Iterator, List, Optional, TextIO
+
+OUTPUT_FORMATS = ["csv", "redcap", "parquet"]
+
+
+def _build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="redcap-synth",
+        description="Synthesize REDCap-like patient records, including duplicates.",
+    )
+    parser.add_argument("output", help="File to write.")
+    parser.add_argument(
+        "--format",
+        choices=OUTPUT_FORMATS,
+        default=None,
+        dest="output_format",
+        help="Output format. Default: taken from the output file's extension, "
+        "else csv.",
+    )
+    parser.add_argument(
+        "-n",
+        "--num-records-desired",
+        type=int,
+        default=100,
+        help="Number of patient records to create. Default: 100",
+    )
+    parser.add_argument(
+        "--percent-records-to-duplicate",
+        type=float,
+        default=3.0,
+        help="Percent of the records to duplicate. Default: 3",
+    )
+    parser.add_argument(
+        "--max-number-copies-of-one-record",
+        type=int,
+        default=3,
+        help="Most copies made of any one record. Default: 3",
+    )
+    parser.add_argument(
+        "--no-duplicate-study-id",
+        action="store_false",
+        dest="duplicate_study_id",
+        help="Give every duplicate its own study id.",
+    )
+    parser.add_argument(
+        "--include-cluster-id",
+        action="store_true",
+        help="Add a cluster_id column: the study id of the base record "
+        "each row is, or is a copy of.",
+    )
+    parser.add_argument(
+        "--index-field-name",
+        default="",
+        help="Field to use as the index (written as the first column).",
+    )
+    parser.add_argument(
+        "--reference-date",
+        type=date.fromisoformat,
+        default=None,
+        help="The 'today' of the synthetic data, as YYYY-MM-DD. Default: today",
+    )
+    parser.add_argument("--seed", type=int, default=None, help="Random seed.")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Processes synthesizing the base records. Default: 1",
+    )
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=10000,
+        help="Base records synthesized & written at a time. Default: 10000",
+    )
+    parser.add_argument(
+        "--locale",
+        action="append",
+        default=None,
+        help="Faker locale; repeat for several. Default: en_US",
+    )
+    parser.add_argument(
+        "--study-id-range",
+        type=int,
+        nargs=2,
+        metavar=("MIN", "MAX"),
+        default=(10000, 99999),
+        help="Smallest & largest study id. Default: 10000 99999",
+    )
+    parser.add_argument(
+        "--mrn-range",
+        type=int,
+        nargs=2,
+        metavar=("MIN", "MAX"),
+        default=(100000, 999999),
+        help="Smallest & largest medical record number. Default: 100000 999999",
+    )
+    parser.add_argument(
+        "--node-id",
+        type=int,
+        default=0,
+        help="Which of --shard-count nodes this is, from 0. Default: 0",
+    )
+    parser.add_argument(
+        "--shard-count",
+        type=int,
+        default=1,
+        help="Nodes synthesizing parts of one dataset, each with its own "
+        "study ids & MRNs. Default: 1",
+    )
+    parser.add_argument(
+        "--record-id-field",
+        default="study_id",
+        help="Record id field for --format redcap. Default: study_id",
+    )
+    parser.add_argument(
+        "--log-file", default=None, help="Also log to this file. Default: none"
+    )
+    parser.add_argument(
+        "-q", "--quiet", action="store_true", help="Don't show progress or log."
+    )
+    return parser
+
+
+def _output_format(output: str, output_format: Optional[str]) -> str:
+    if output_format is not None:
+        return output_format
+
+    if output.lower().endswith(".parquet"):
+        return "parquet"
+
+    return "csv"
+
+
+def peak_rss_megabytes() -> Optional[float]:
+    """Peak resident set size of this process, if the platform reports it.
+
+    Also used by benchmarks/run_benchmarks.py.
+    """
+    try:
+        import resource  # pylint: disable=import-outside-toplevel
+    except ImportError:  # pragma: no cover
+        return None
+
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    # Linux reports kilobytes, macOS bytes.
+    if sys.platform == "darwin":  # pragma: no cover
+        return peak_rss / 1024**2
+
+    return peak_rss / 1024
+
+
+def _format_usage(num_rows: int, start_time: float) -> str:
+    elapsed_seconds = max(time.perf_counter() - start_time, 1e-9)
+    usage = f"{num_rows:,} records, {num_rows / elapsed_seconds:,.0f} records/s"
+    peak_rss = peak_rss_megabytes()
+
+    if peak_rss is not None:
+        usage += f", peak RSS {peak_rss:,.0f} MB"
+
+    return usage
+
+
+def _report_progress(
+    chunks: Iterator, num_records_desired: int, chunk_size: int, stream: TextIO
+) -> Iterator:
+    """Passes the chunks through, drawing a progress bar as each one arrives."""
+    bar_width = 30
+    num_records_done = 0
+    num_rows = 0
+    start_time = time.perf_counter()
+
+    for chunk in chunks:
+        num_records_done = min(num_records_done + chunk_size, num_records_desired)
+        num_rows += len(chunk)
+        fraction_done = num_records_done / num_records_desired
+        filled = int(bar_width * fraction_done)
+        stream.write(
+            f"\r[{'#' * filled}{' ' * (bar_width - filled)}] "
+            f"{fraction_done:4.0%} {_format_usage(num_rows, start_time)}"
+        )
+        stream.flush()
+        yield chunk
+
+    stream.write("\n")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Runs redcap-synth.
+
+    Parameters
+    ----------
+    argv : list of str
+        Optional. Command-line arguments. Default: sys.argv[1:]
+
+    Returns
+    -------
+    int
+        Exit status.
+    """
+    arguments = _build_parser().parse_args(argv)
+
+    # pylint: disable=import-outside-toplevel
+    from redcaprecordsynthesizer.fake_records import FakeRecordGenerator
+    from redcaprecordsynthesizer.record_writers import (
+        CsvRecordWriter,
+        ParquetRecordWriter,
+        RecordWriter,
+        RedcapImportCsvWriter,
+    )
+
+    output_format = _output_format(arguments.output, arguments.output_format)
+    writer: RecordWriter
+
+    try:
+        if output_format == "parquet":
+            writer = ParquetRecordWriter(path=arguments.output)
+        elif output_format == "redcap":
+            writer = RedcapImportCsvWriter(
+                path=arguments.output, record_id_field=arguments.record_id_field
+            )
+        else:
+            writer = CsvRecordWriter(path=arguments.output)
+
+        fake_record_generator = FakeRecordGenerator(
+            locale=arguments.locale,
+            log_filename=arguments.log_file,
+            mrn_range=tuple(arguments.mrn_range),
+            node_id=arguments.node_id,
+            quiet=arguments.quiet,
+            seed=arguments.seed,
+            shard_count=arguments.shard_count,
+            study_id_range=tuple(arguments.study_id_range),
+        )
+        chunks = fake_record_generator.iter_fake_records(
+            chunk_size=arguments.chunk_size,
+            duplicate_study_id=arguments.duplicate_study_id,
+            include_cluster_id=arguments.include_cluster_id,
+            index_field_name=arguments.index_field_name,
+            max_number_copies_of_one_record=arguments.max_number_copies_of_one_record,
+            num_records_desired=arguments.num_records_desired,
+            percent_records_to_duplicate=arguments.percent_records_to_duplicate,
+            reference_date=arguments.reference_date,
+            workers=arguments.workers,
+        )
+    except (ImportError, TypeError) as error:
+        print(f"redcap-synth: error: {error}", file=sys.stderr)
+        return 2
+
+    if not arguments.quiet:
+        chunks = _report_progress(
+            chunks=chunks,
+            num_records_desired=arguments.num_records_desired,
+            chunk_size=arguments.chunk_size,
+            stream=sys.stderr,
+        )
+
+    try:
+        write_statistics = writer.write(chunks)
+    except (ImportError, RuntimeError, TypeError) as error:
+        # E.g. duplicates used up an id range part way through, or the
+        # records lack the REDCap record id field; don't leave a truncated
+        # file that looks like a finished one.
+        if os.path.exists(writer.path):
+            os.remove(writer.path)
+
+        if not arguments.quiet:
+            sys.stderr.write("\n")
+
+        print(f"redcap-synth: error: {error}", file=sys.stderr)
+        return 1
+
+    if not arguments.quiet:
+        print(
+            f"Wrote {write_statistics.num_records} records to {writer.path} "
+            f"in {write_statistics.elapsed_seconds:.1f} s "
+            f"({write_statistics.records_per_second:,.0f} records/s; "
+            f"writing alone {write_statistics.write_records_per_second:,.0f} "
+            f"records/s).",
+            file=sys.stderr,
+        )
+
+    return 0
+
+
+if __name__ == "__main__":  # pragma: no cover
+    sys.exit(main())
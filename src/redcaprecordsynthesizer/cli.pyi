@@ -0,0 +1,6 @@
+from typing import List, Optional
+
+OUTPUT_FORMATS: List[str]
+
+def peak_rss_megabytes() -> Optional[float]: ...
+def main(argv: Optional[List[str]] = ...) -> int: ...
@@ -0,0 +1,257 @@
+"""
+Module: contains class PairwiseEvaluator, which scores a duplicate
+detector's output against the cluster_id column of synthetic records.
+"""
+
+from typing import NamedTuple
+
+import numpy
+import pandas  # type: ignore[import]
+
+
+class PairwiseScores(NamedTuple):
+    """
+    How well predicted duplicates match the true ones, counted over pairs
+    of rows: a pair is a duplicate if both rows belong to one cluster.
+
+    ...
+
+    Attributes
+    ----------
+    precision : float
+        Share of predicted pairs that are true duplicates;
+        1.0 if no pairs were predicted.
+    recall : float
+        Share of true duplicate pairs that were predicted;
+        1.0 if there are none.
+    f1 : float
+        Harmonic mean of precision & recall.
+    true_positives : int
+        Pairs both predicted and true.
+    num_predicted_pairs : int
+    num_true_pairs : int
+    """
+
+    precision: float
+    recall: float
+    f1: float
+    true_positives: int
+    num_predicted_pairs: int
+    num_true_pairs: int
+
+
+class PairwiseEvaluator:
+    """
+    Scores predicted duplicates against the true clusters, as pairwise
+    precision, recall and F1.
+
+    Works on whole columns: cluster labels are hash-factorized to codes
+    and pairs are counted from cluster sizes, so no pairs are ever
+    listed, and predicted pairs are deduplicated by sorting. Ten million
+    rows take seconds.
+
+    ...
+
+    Attributes
+    ----------
+    num_records : int
+    num_true_pairs : int
+
+    Methods
+    -------
+    score_clusters(predicted_cluster_ids)
+        Scores a predicted cluster label for every row.
+    score_pairs(predicted_pairs)
+        Scores predicted pairs of row positions.
+    """
+
+    def __init__(self, true_cluster_ids: pandas.Series) -> None:
+        """Indexes the true clusters.
+
+        Parameters
+        ----------
+        true_cluster_ids : array-like
+            One cluster label per row, like the cluster_id column made by
+            FakeRecordGenerator.create_fake_records(include_cluster_id=True).
+
+        Raises
+        ------
+        TypeError
+            If true_cluster_ids is not one-dimensional or has missing labels.
+        """
+        true_codes = PairwiseEvaluator.__factorize(
+            cluster_ids=true_cluster_ids, name="true_cluster_ids"
+        )
+
+        if (true_codes < 0).any():
+            raise TypeError("Input 'true_cluster_ids' has missing labels.")
+
+        self.__true_codes = true_codes
+        self.__num_true_pairs = PairwiseEvaluator.__count_pairs(
+            codes=true_codes, num_codes=int(true_codes.max(initial=-1)) + 1
+        )
+
+    @property
+    def num_records(self) -> int:
+        """Number of rows being scored."""
+        return len(self.__true_codes)
+
+    @property
+    def num_true_pairs(self) -> int:
+        """Number of pairs of rows in the same true cluster."""
+        return self.__num_true_pairs
+
+    def score_clusters(self, predicted_cluster_ids: pandas.Series) -> PairwiseScores:
+        """Scores a predicted clustering of the rows.
+
+        Parameters
+        ----------
+        predicted_cluster_ids : array-like
+            One predicted cluster label per row, in the same order as the
+            true labels. Rows with a missing label are singletons.
+
+        Returns
+        -------
+        PairwiseScores
+
+        Raises
+        ------
+        TypeError
+            If predicted_cluster_ids is not one label per row.
+        """
+        predicted_codes = PairwiseEvaluator.__factorize(
+            cluster_ids=predicted_cluster_ids, name="predicted_cluster_ids"
+        )
+
+        if len(predicted_codes) != self.num_records:
+            raise TypeError(
+                f"Input 'predicted_cluster_ids' has {len(predicted_codes)} labels "
+                f"for {self.num_records} rows."
+            )
+
+        # Give each unlabelled row a cluster of its own.
+        num_predicted_clusters = int(predicted_codes.max(initial=-1)) + 1
+        unlabelled = predicted_codes < 0
+        predicted_codes[unlabelled] = num_predicted_clusters + numpy.arange(
+            int(unlabelled.sum())
+        )
+        num_predicted_clusters += int(unlabelled.sum())
+
+        # Pairs in the same true & predicted cluster: pairs within each
+        # nonempty cell of their contingency table, whose (true, predicted)
+        # keys are counted by sorting them.
+        joint_keys = numpy.sort(
+            self.__true_codes * num_predicted_clusters + predicted_codes
+        )
+        cell_starts = numpy.flatnonzero(PairwiseEvaluator.__run_starts(joint_keys))
+        cell_sizes = numpy.diff(numpy.append(cell_starts, len(joint_keys)))
+        return self.__scores(
+            true_positives=int((cell_sizes * (cell_sizes - 1) // 2).sum()),
+            num_predicted_pairs=PairwiseEvaluator.__count_pairs(
+                codes=predicted_codes, num_codes=num_predicted_clusters
+            ),
+        )
+
+    def score_pairs(self, predicted_pairs: numpy.ndarray) -> PairwiseScores:
+        """Scores predicted pairs of duplicate rows.
+
+        Pairs are unordered; repeated pairs and pairs of a row with
+        itself are ignored. Unlike clusters, pairs needn't be transitive.
+
+        Parameters
+        ----------
+        predicted_pairs : array-like of shape (number of pairs, 2)
+            Row positions (from 0), like
+            records.index.get_indexer(labels) for index labels.
+
+        Returns
+        -------
+        PairwiseScores
+
+        Raises
+        ------
+        TypeError
+            If predicted_pairs is not pairs of positions of rows.
+        """
+        pairs = numpy.asarray(predicted_pairs)
+
+        if pairs.size == 0:
+            pairs = pairs.reshape(0, 2).astype("int64")
+
+        if pairs.ndim != 2 or pairs.shape[1] != 2:
+            raise TypeError("Input 'predicted_pairs' is not an array of pairs.")
+
+        if not numpy.issubdtype(pairs.dtype, numpy.integer):
+            raise TypeError("Input 'predicted_pairs' is not row positions.")
+
+        if len(pairs) > 0 and (pairs.min() < 0 or pairs.max() >= self.num_records):
+            raise TypeError("Input 'predicted_pairs' has positions outside the rows.")
+
+        # Order each pair, drop self-pairs, then deduplicate by sorting
+        # one int64 key per pair and keeping each run's first key.
+        first_rows = numpy.minimum(pairs[:, 0], pairs[:, 1]).astype("int64")
+        second_rows = numpy.maximum(pairs[:, 0], pairs[:, 1]).astype("int64")
+        distinct_rows = first_rows != second_rows
+        pair_keys = numpy.sort(
+            first_rows[distinct_rows] * self.num_records + second_rows[distinct_rows]
+        )
+        pair_keys = pair_keys[PairwiseEvaluator.__run_starts(pair_keys)]
+        first_rows, second_rows = numpy.divmod(pair_keys, self.num_records)
+        return self.__scores(
+            true_positives=int(
+                numpy.count_nonzero(
+                    self.__true_codes[first_rows] == self.__true_codes[second_rows]
+                )
+            ),
+            num_predicted_pairs=len(pair_keys),
+        )
+
+    def __scores(self, true_positives: int, num_predicted_pairs: int) -> PairwiseScores:
+        precision = 1.0
+        recall = 1.0
+
+        if num_predicted_pairs > 0:
+            precision = true_positives / num_predicted_pairs
+
+        if self.__num_true_pairs > 0:
+            recall = true_positives / self.__num_true_pairs
+
+        f1 = 0.0
+
+        if precision + recall > 0:
+            f1 = 2 * precision * recall / (precision + recall)
+
+        return PairwiseScores(
+            precision=precision,
+            recall=recall,
+            f1=f1,
+            true_positives=true_positives,
+            num_predicted_pairs=num_predicted_pairs,
+            num_true_pairs=self.__num_true_pairs,
+        )
+
+    @staticmethod
+    def __factorize(cluster_ids: pandas.Series, name: str) -> numpy.ndarray:
+        """Hashes the labels to int64 codes 0, 1, ...; missing ones to -1."""
+        if numpy.ndim(cluster_ids) != 1:
+            raise TypeError(f"Input '{name}' is not one-dimensional.")
+
+        codes, _ = pandas.factorize(numpy.asarray(cluster_ids))
+        return codes.astype("int64")
+
+    @staticmethod
+    def __run_starts(sorted_keys: numpy.ndarray) -> numpy.ndarray:
+        """Marks the first of each run of equal keys."""
+        run_starts = numpy.ones(len(sorted_keys), dtype=bool)
+        run_starts[1:] = sorted_keys[1:] != sorted_keys[:-1]
+        return run_starts
+
+    @staticmethod
+    def __count_pairs(codes: numpy.ndarray, num_codes: int) -> int:
+        """Number of pairs of rows sharing a code in [0, num_codes)."""
+        sizes = numpy.bincount(codes, minlength=num_codes).astype("int64")
+        return int((sizes * (sizes - 1) // 2).sum())
+
+
+if __name__ == "__main__":
+    pass
@@ -0,0 +1,27 @@
+from typing import NamedTuple
+
+import numpy
+import pandas
+
+class PairwiseScores(NamedTuple):
+    precision: float
+    recall: float
+    f1: float
+    true_positives: int
+    num_predicted_pairs: int
+    num_true_pairs: int
+
+class PairwiseEvaluator:
+    def __init__(self, true_cluster_ids: pandas.Series) -> None:
+        self.__true_codes = None
+        self.__num_true_pairs = None
+        ...
+
+    @property
+    def num_records(self) -> int: ...
+    @property
+    def num_true_pairs(self) -> int: ...
+    def score_clusters(
+        self, predicted_cluster_ids: pandas.Series
+    ) -> PairwiseScores: ...
+    def score_pairs(self, predicted_pairs: numpy.ndarray) -> PairwiseScores: ...
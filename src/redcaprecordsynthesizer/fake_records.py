@@ -1,463 +1,1570 @@
-"""
-Module: contains class FakeRecordGenerator,
-which generates synthetic REDCap-like records.
-"""
-
-import random
-import re
-from datetime import datetime, timedelta
-from typing import Union
-
-import pandas  # type: ignore[import]
-from faker import Faker  # type: ignore[import]
-from redcaputilities.logging import setup_logging
-
-from redcaprecordsynthesizer.nickname_lookup.python_parser import (
-    NicknameGenerator,  # type: ignore[import]
-)
-from redcaprecordsynthesizer.state_abbr_conversion import (
-    StateAbbreviationConverter,  # type: ignore[import]
-)
-
-
-class FakeRecordGenerator:  # pylint: disable=logging-fstring-interpolation,
-    # too-many-locals
-    """
-    Synthesize realistic patient records.
-
-    ...
-
-    Attributes
-    ----------
-    no public attributes
-
-    Methods
-    -------
-    create_fake_records(index_field_name,
-                        duplicate_study_id,
-                        max_number_copies_of_one_record,
-                        num_records_desired,
-                        percent_records_to_duplicate)
-        Create a DataFrame of synthetic patient records.
-    create_fake_study_id()
-        Synthesize a new record index.
-    """
-
-    def __init__(self):
-        self.__log = setup_logging(log_filename="fake_records.log")
-        min_study_id = 10000
-        max_study_id = 99999
-        self.__range_study_id = range(min_study_id, max_study_id)
-        self.__duplicate_study_id = True
-        self.__existing_study_ids = []
-
-    def __check_index_field_name(self, index_field_name: str) -> None:
-        if not isinstance(index_field_name, str):  # It's OK if it's zero-length.
-            self.__log.error("Input 'index_field_name' is not a str.")
-            raise TypeError("Input 'index_field_name' is not a str.")
-
-    def __check_max_number_copies_of_one_record(
-        self, max_number_copies_of_one_record: int
-    ) -> None:
-        if not isinstance(max_number_copies_of_one_record, int):
-            self.__log.error(
-                "Input 'max_number_copies_of_one_record' " "is not an int."
-            )
-            raise TypeError("Input 'max_number_copies_of_one_record' " "is not an int.")
-
-        if max_number_copies_of_one_record < 0:
-            self.__log.error("Input 'max_number_copies_of_one_record' " "is < 0.")
-            raise TypeError("Input 'max_number_copies_of_one_record' " "is < 0>.")
-
-    def __check_num_records_desired(self, num_records_desired: int) -> None:
-        if not isinstance(num_records_desired, int):
-            self.__log.error("Input 'num_records_desired' " "is not an int.")
-            raise TypeError("Input 'num_records_desired' " "is not an int.")
-
-        if num_records_desired <= 0:
-            self.__log.error("Input 'num_records_desired' " "is not a positive int.")
-            raise TypeError("Input 'num_records_desired' " "is not a positive int.")
-
-    def __check_percent_records_to_duplicate(
-        self, percent_records_to_duplicate: Union[int, float]
-    ) -> None:
-        if not isinstance(percent_records_to_duplicate, float):
-            self.__log.error("Input 'percent_records_to_duplicate' " "is not an float.")
-            raise TypeError("Input 'percent_records_to_duplicate' " "is not an float.")
-
-        if not 0 <= percent_records_to_duplicate <= 100:
-            self.__log.error(
-                "Input 'percent_records_to_duplicate' " "is not between 0 and 100."
-            )
-            raise TypeError(
-                "Input 'percent_records_to_duplicate' " "is not between 0 and 100."
-            )
-
-    def __create_fake_email_address(self, given_name: str, surname: str) -> str:
-        """Create a realistic email address.
-
-        Parameters
-        ----------
-        given_name : str
-        surname : str
-
-        Raises
-        ------
-        TypeError
-            If inputs are not the required types.
-
-        Returns
-        -------
-        str
-        """
-        fake = Faker()
-        given_name_used = given_name
-        probability_of_using_first_initial_only = 0.25
-
-        if not isinstance(given_name, str):  # pragma: no cover
-            self.__log.error("Input 'given_name' is not a str.")
-            raise TypeError("Input 'given_name' is not a str.")
-
-        if not isinstance(surname, str):  # pragma: no cover
-            self.__log.error("Input 'surname' is not a str.")
-            raise TypeError("Input 'surname' is not a str.")
-
-        self.__log.debug(
-            "Synthesizing email address for {given_name} {surname}.",
-            extra={"given_name": given_name, "surname": surname},
-        )  # pragma: no cover
-
-        # Is the email given.surname or given_surname or givensurname?
-        name_dividers = [".", "_", ""]
-        name_divider = name_dividers[random.randrange(0, len(name_dividers))]
-
-        if random.uniform(0, 1) <= probability_of_using_first_initial_only:
-            given_name_used = given_name[0]
-            self.__log.debug(
-                "Only using the first initial {given_name_used}.",
-                extra={"given_name_used": given_name_used},
-            )
-
-        new_address = (
-            given_name_used.lower()
-            + name_divider
-            + surname.lower()
-            + "@"
-            + fake.free_email_domain()
-        )
-        self.__log.debug(
-            "Synthesized: {new_address}.", extra={"new_address": new_address}
-        )
-        return new_address
-
-    def __create_fake_record(self, next_study_id: int) -> dict:
-        """Synthesize one record for testing.
-
-        Parameters
-        ---------
-        next_study_id :   int
-
-        Raises
-        ------
-        TypeError
-            If input not the required type.
-
-        Return
-        ------
-        dict
-        """
-        if not isinstance(next_study_id, int):  # pragma: no cover
-            self.__log.error("Input 'next_study_id' is not an int.")
-            raise TypeError("Input 'next_study_id' is not an int.")
-
-        fake = Faker()
-        birthdate = fake.date_of_birth(minimum_age=18, maximum_age=115)
-
-        # Ensure that primary consent is simulated
-        # to have been given when over 18.
-        eighteen_years = timedelta(days=365.25 * 18)
-        primary_consent_date = fake.date_between(birthdate + eighteen_years)
-        core_participant_date = fake.date_between(primary_consent_date)
-
-        # Exclude territories (like the Virgin Islands) because
-        # methods postalcode_in_state and zipcode_in_state
-        # can't handle territories.
-        state_abbr = fake.state_abbr(include_territories=False)
-
-        # Strip off the extension.
-        phone_number = fake.phone_number()
-        phone_number = re.sub(r"x\d+", "", phone_number)
-
-        # We'll want the names available for email address.
-        given_name = fake.first_name()
-        surname = fake.last_name()
-
-        record = {
-            "study_id": next_study_id,
-            "first_name": given_name,
-            "last_name": surname,
-            "phone_number": phone_number,
-            "email_address": self.__create_fake_email_address(given_name, surname),
-            "street_address_line_1": fake.street_address(),
-            "city": fake.city(),
-            "state": state_abbr,
-            "zip_code": fake.zipcode_in_state(state_abbr),
-            "mrn": fake.random_int(min=100000, max=999999),
-            "dob": birthdate.strftime("%Y-%m-%d"),
-            "ethnicity": fake.random_int(min=1, max=2),
-            "race": fake.random_int(min=1, max=5),
-            "sex": fake.random_int(min=1, max=3),
-            "core_participant_date": core_participant_date.strftime("%Y-%m-%d"),
-            "primary_consent_date": primary_consent_date.strftime("%Y-%m-%d"),
-            "date_of_last_activity": datetime.now().strftime("%Y-%m-%d"),
-        }
-
-        return record
-
-    def create_fake_records(
-        self,
-        duplicate_study_id: bool = True,
-        index_field_name: str = "",
-        max_number_copies_of_one_record: int = 3,
-        num_records_desired: int = 100,
-        percent_records_to_duplicate: float = 3.0,
-    ) -> pandas.DataFrame:
-        """Synthesize a whole set of patient records,
-        including duplicates, errors, etc.
-
-        Parameters
-        ----------
-        duplicate_study_id : bool
-            Optional. Do you want to allow
-            duplicate records to have the same study id?
-            Default : True
-        index_field_name : str
-            Optional. Specify if one of the record columns should
-            be used instead of a synthetic index. Default: empty string
-        max_number_copies_of_one_record : int
-            Optional. Number of copies to be made of any one record.
-            Default: 3
-        num_records_desired : int
-            Optional. Number of patient records to be created.
-            Default: 100
-        percent_records_to_duplicate : float or int
-            Optional. The % of the records that should be duplicated.
-            Default: 3%
-
-        Raises
-        ------
-        TypeError
-            If inputs not the required types.
-
-        Returns
-        -------
-        pandas DataFrame
-        """
-        self.__duplicate_study_id = duplicate_study_id
-        self.__check_index_field_name(index_field_name=index_field_name)
-        self.__check_max_number_copies_of_one_record(
-            max_number_copies_of_one_record=max_number_copies_of_one_record
-        )
-        self.__check_num_records_desired(num_records_desired=num_records_desired)
-
-        if isinstance(percent_records_to_duplicate, int):
-            percent_records_to_duplicate = percent_records_to_duplicate * 1.0
-
-        self.__check_percent_records_to_duplicate(
-            percent_records_to_duplicate=percent_records_to_duplicate
-        )
-
-        # To ensure study ids are unique, we'll generate them here all at once.
-        study_ids = random.sample(self.__range_study_id, k=num_records_desired)
-
-        self.__log.info(
-            "Generating {num_records_desired} synthetic patient records.",
-            extra={"num_records_desired": num_records_desired},
-        )
-        records = self.__initialize_fake_records(
-            num_records_desired=num_records_desired, study_ids=study_ids
-        )
-
-        # Initialize our list of all the study_ids used so far.
-        self.__existing_study_ids = records["study_id"].to_numpy().tolist()
-
-        # Duplicate some rows.
-        num_records_to_duplicate = int(
-            round(num_records_desired * percent_records_to_duplicate / 100.0)
-        )
-        self.__log.info(
-            "Selecting {num_records_to_duplicate} records to duplicate.",
-            extra={"num_records_to_duplicate": num_records_to_duplicate},
-        )
-        nickname_generator = NicknameGenerator()
-        state_abbreviation_converter = StateAbbreviationConverter()
-
-        for _ in range(num_records_to_duplicate):
-            # Grab a record at random.
-            # (sri ==> "selected record index")
-            sri = random.randrange(start=0, stop=num_records_desired)
-            selected_record = records.loc[sri]  # type: ignore[call-overload]
-            set_of_nicknames = nickname_generator.get(
-                name=selected_record["first_name"]
-            )
-            full_state_name = state_abbreviation_converter.full_name(
-                two_letter_code=selected_record["state"]
-            )
-
-            # Maybe we're asked to create MORE than one duplicate.
-            num_copies_of_this_record = 1
-
-            if max_number_copies_of_one_record > 0:
-                num_copies_of_this_record = random.randrange(
-                    start=1, stop=max_number_copies_of_one_record + 1
-                )
-
-            self.__log.info(
-                ".Making {num_copies} copies of this record.",
-                extra={"num_copies": num_copies_of_this_record},
-            )
-
-            for _ in range(num_copies_of_this_record):
-                # Make a copy & assign it a unique index.
-                record_copy = records.xs(key=sri)  # type: ignore[operator]
-                record_copy.name = len(records)
-                mrn_list = list(records["mrn"])
-
-                record_copy: pandas.DataFrame = self.__duplicate_record(
-                    record=record_copy,
-                    medical_record_numbers=mrn_list,
-                    nicknames=set_of_nicknames,
-                    state_name=full_state_name,
-                )
-
-                # Insert this copy into records.
-                # records = records.append(record_copy)
-                records = pandas.concat([records, record_copy])
-
-        # If specified, set the desired field as the index.
-        if len(index_field_name) > 0:
-            if index_field_name not in records.columns:
-                self.__log.exception(
-                    "Field '{field_name}' is not present "
-                    "in the 'records' DataFrame.",
-                    extra={"field_name": index_field_name},
-                )
-                raise TypeError(
-                    f"Field {index_field_name} is not present "
-                    f"in the 'records' DataFrame."
-                )
-
-            records.set_index(index_field_name, inplace=True)  # type: ignore[call-arg]
-
-        return records
-
-    def create_fake_study_id(self) -> int:
-        """Synthesize one unused index number.
-
-        Returns
-        -------
-        int
-        """
-        new_study_id = random.choice(
-            [x for x in self.__range_study_id if x not in self.__existing_study_ids]
-        )
-
-        self.__existing_study_ids.append(new_study_id)
-        return new_study_id
-
-    def __duplicate_record(
-        self,
-        record: pandas.DataFrame,
-        medical_record_numbers: list,
-        nicknames: list,
-        state_name: str,
-    ) -> pandas.DataFrame:
-        date_formats = ["%Y-%m-%d", "%d-%m-%Y", "%B %d, %Y", "%b %d, %Y"]
-        probability_of_duplicating_study_id = 0.0
-
-        if self.__duplicate_study_id:
-            probability_of_duplicating_study_id = 0.20
-
-        probability_of_new_mrn = 0.20
-        probability_of_using_full_state_name = 0.33
-        probability_of_using_nickname = 0.33
-
-        # Do we generate a unique study_id or keep the existing one?
-        #  (which will result in duplicate study_id values across the dataFrame.)
-        # Normally we test for < probability, not >.
-        # But here, creating a unique study_id is what we do when
-        # the probability test fails.
-        if random.uniform(0, 1) >= probability_of_duplicating_study_id:
-            record["study_id"] = self.create_fake_study_id()
-
-        # Simulate the kind of differences that might occur
-        # if a user were to be re-added:
-        #   1) Use a nickname instead of the user's first_name.
-        if (
-            nicknames is not None
-            and len(nicknames) > 0
-            and random.uniform(0, 1) < probability_of_using_nickname
-        ):
-            # Each time we "pop()" we will get a different nickname.
-            # (Make sure it's not emptied out.)
-            try:
-                random_nickname = nicknames.pop().title()
-                record["first_name"] = random_nickname
-            except KeyError:  # pragma: no cover
-                # We're out of nicknames; keep the original name.
-                pass
-
-        #   2) Sometimes use the full state name
-        #   instead of the postal abbreviation.
-        if random.uniform(0, 1) <= probability_of_using_full_state_name:
-            record["state"] = state_name
-
-        #   3) Enter date of birth in a different format.
-        birthdate = datetime.strptime(str(record["dob"]), "%Y-%m-%d")
-        this_date_format = date_formats[random.randrange(0, len(date_formats))]
-        record["dob"] = birthdate.strftime(this_date_format)
-
-        #   4) People might change their email provider.
-        given_name = str(record["first_name"])
-        surname = str(record["last_name"])
-        record["email_address"] = self.__create_fake_email_address(
-            given_name=given_name, surname=surname
-        )
-
-        #   5) Maybe the patient was entered under a new MRN.
-        if random.uniform(0, 1) <= probability_of_new_mrn:
-            record["mrn"] = max(medical_record_numbers) + 1
-
-        new_df: pandas.DataFrame = record.to_frame()
-        return new_df.transpose()
-
-    def __initialize_fake_records(
-        self, num_records_desired: int, study_ids: list
-    ) -> pandas.DataFrame:
-
-        records = pandas.DataFrame()
-        self.__log.info(
-            "Generating {num_records} synthetic patient records.",
-            extra={"num_records": num_records_desired},
-        )
-        pandas.options.mode.chained_assignment = None
-
-        for record_number in range(num_records_desired):
-            study_id: int = study_ids[record_number]
-            new_record: dict = self.__create_fake_record(next_study_id=study_id)
-            new_df: pandas.DataFrame = pandas.DataFrame(
-                data=new_record, index=[record_number]
-            )
-            records: pandas.DataFrame
-
-            if len(records) == 0:
-                records = new_df
-            else:
-                # records = records.append(new_df)
-                records = pandas.concat([records, new_df])
-
-        return records
-
-
-if __name__ == "__main__":  # pragma: no cover
-    fake_records_object = FakeRecordGenerator()
+"""
+Module: contains class FakeRecordGenerator,
+which generates synthetic REDCap-like records.
+"""
+
+import importlib
+import logging
+import multiprocessing
+import multiprocessing.pool
+import time
+from collections.abc import Sequence
+from contextlib import nullcontext
+from datetime import date
+from typing import (
+    Any,
+    Callable,
+    ContextManager,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+    Union,
+)
+
+import numpy
+import pandas  # type: ignore[import]
+from faker import Faker  # type: ignore[import]
+from faker.decode import unidecode  # type: ignore[import]
+from redcaputilities.logging import setup_logging
+
+from redcaprecordsynthesizer.address_pool import (
+    ADDRESS_FIELDS,
+    AddressPool,
+    makes_us_addresses,
+)
+from redcaprecordsynthesizer.id_allocation import (
+    FeistelPermutation,
+    IdAllocator,
+    PermutationIdAllocator,
+    partition_id_range,
+)
+from redcaprecordsynthesizer.instrumentation import Instrumentation
+from redcaprecordsynthesizer.nickname_lookup.python_parser import (
+    NicknameGenerator,  # type: ignore[import]
+)
+from redcaprecordsynthesizer.phone_numbers import PhoneNumberGenerator
+from redcaprecordsynthesizer.state_abbr_conversion import (
+    StateAbbreviationConverter,  # type: ignore[import]
+)
+
+# Unless asked for a log file, log through this module's logger,
+# which stays silent until the application configures logging.
+_logger = logging.getLogger(__name__)
+_logger.addHandler(logging.NullHandler())
+
+# Used in quiet mode: disabled, so even isEnabledFor() returns False.
+_quiet_logger = logging.getLogger(__name__ + ".quiet")
+_quiet_logger.disabled = True
+_quiet_logger.propagate = False
+
+# What phases are measured with when there's no Instrumentation: does nothing.
+_NOT_MEASURED = nullcontext()
+
+# Column names (in output order) and their fixed dtypes.
+RECORD_DTYPES = {
+    "study_id": "int64",
+    "first_name": str,
+    "last_name": str,
+    "phone_number": str,
+    "email_address": str,
+    "street_address_line_1": str,
+    "city": str,
+    "state": str,
+    "zip_code": str,
+    "mrn": "int64",
+    "dob": str,
+    "ethnicity": "int64",
+    "race": "int64",
+    "sex": "int64",
+    "core_participant_date": str,
+    "primary_consent_date": str,
+    "date_of_last_activity": str,
+}
+
+# Optional last column: the original study id of the base record
+# each row is, or is a copy of.
+CLUSTER_ID_FIELD = "cluster_id"
+
+
+class _RunState(NamedTuple):
+    """
+    Options & id allocators of one run of create_fake_records or
+    iter_fake_records. Kept out of the generator itself, so that another
+    run started while an iterator is paused can't change this one.
+    """
+
+    duplicate_study_id: bool
+    include_cluster_id: bool
+    index_field_name: str
+    instrumentation: Optional[Instrumentation]
+    max_number_copies_of_one_record: int
+    mrn_allocator: IdAllocator
+    num_records_desired: int
+    percent_records_to_duplicate: float
+    reference_date: date
+    study_id_allocator: IdAllocator
+    workers: int
+
+
+class FakeRecordGenerator:  # pylint: disable=logging-fstring-interpolation,
+    # too-many-locals
+    """
+    Synthesize realistic patient records.
+
+    ...
+
+    Attributes
+    ----------
+    no public attributes
+
+    Methods
+    -------
+    create_fake_records(index_field_name,
+                        duplicate_study_id,
+                        max_number_copies_of_one_record,
+                        num_records_desired,
+                        percent_records_to_duplicate)
+        Create a DataFrame of synthetic patient records.
+    create_fake_study_id()
+        Synthesize a new record index.
+    fake_record_sequence(num_records_desired, reference_date, seed)
+        Base records that are each synthesized only when asked for.
+    """
+
+    # Records per block of base records. Fixed, so that the blocks (and
+    # their random substreams) are the same however many workers there are.
+    __BLOCK_SIZE = 1000
+
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        address_pool: Optional[AddressPool] = None,
+        id_allocator: Optional[Callable[..., IdAllocator]] = None,
+        locale: Union[str, List[str], None] = None,
+        log_filename: Optional[str] = None,
+        mrn_range: Tuple[int, int] = (100000, 999999),
+        node_id: int = 0,
+        phone_number_formats: Optional[Iterable[str]] = None,
+        quiet: bool = False,
+        seed: Optional[int] = None,
+        shard_count: int = 1,
+        study_id_range: Tuple[int, int] = (10000, 99999),
+    ):
+        """Constructs the generator.
+
+        Parameters
+        ----------
+        address_pool : AddressPool
+            Optional. Draw each record's address from this pool instead of
+            having Faker synthesize a new one; much faster, but unrelated
+            records may then share an address.
+            Default: None (a new address for every record)
+        id_allocator : IdAllocator subclass
+            Optional. Class used to hand out unique study ids and MRNs.
+            Default: PermutationIdAllocator
+        locale : str or list of str
+            Optional. Faker locale(s) used to synthesize names & addresses,
+            like "en_US" or ["en_US", "en_GB"]. Addresses have a US state
+            & zip code, drawn from the locales that make those, so one
+            must: "en_CA" or "ja_JP" alone, with addresses of their own,
+            raise a TypeError.
+            Default: Faker's default locale
+        log_filename : str
+            Optional. Also log to this file.
+            Default: None (log only to this module's logger, which is silent
+            unless the application has configured logging)
+        mrn_range : tuple of two ints
+            Optional. Smallest & largest medical record number.
+            Default: (100000, 999999)
+        node_id : int
+            Optional. Which of shard_count nodes this generator is,
+            from 0 to shard_count - 1. Default: 0
+        phone_number_formats : iterable of str
+            Optional. Formats for phone numbers, like "({area}) {exchange}-{line}";
+            see PhoneNumberGenerator.
+            Default: US_PHONE_NUMBER_FORMATS (Faker's, without extensions)
+        quiet : bool
+            Optional. Don't log at all, not even errors. Default: False
+        seed : int
+            Optional. Seeds every random choice the generator makes,
+            so the same seed reproduces the same records.
+            Default: None (unpredictable)
+        shard_count : int
+            Optional. Number of nodes, sharing no state, synthesizing parts
+            of one dataset. Each node draws its study ids & MRNs only from
+            its own contiguous part of each range, so the parts can simply
+            be concatenated; nodes given the same seed still make different
+            records. Default: 1 (the whole ranges)
+        study_id_range : tuple of two ints
+            Optional. Smallest & largest study id.
+            Default: (10000, 99999)
+        """
+        if quiet:
+            self.__log = _quiet_logger
+        elif log_filename is not None:
+            self.__log = setup_logging(log_filename=log_filename)
+        else:
+            self.__log = _logger
+
+        self.__check_id_range(id_range=mrn_range, range_name="mrn_range")
+        self.__check_id_range(id_range=study_id_range, range_name="study_id_range")
+
+        try:
+            self.__mrn_range = partition_id_range(
+                id_range=mrn_range, node_id=node_id, shard_count=shard_count
+            )
+            self.__study_id_range = partition_id_range(
+                id_range=study_id_range, node_id=node_id, shard_count=shard_count
+            )
+        except TypeError as error:
+            self.__log.error(str(error))
+            raise
+
+        # Nodes mix their id into every seed, so their records differ.
+        self.__seed_spawn_key: Tuple[int, ...] = ()
+
+        if shard_count > 1:
+            self.__seed_spawn_key = (node_id,)
+
+        self.__id_allocator = id_allocator or PermutationIdAllocator
+        self.__check_locale(locale=locale)
+
+        if address_pool is not None and not isinstance(address_pool, AddressPool):
+            raise TypeError("Input 'address_pool' is not an AddressPool.")
+
+        self.__address_pool = address_pool
+        self.__phone_number_generator = PhoneNumberGenerator(
+            formats=phone_number_formats
+        )
+
+        # Built once, not per chunk: even with the nickname table shared by
+        # the process, each new NicknameGenerator looks up its data file.
+        self.__nickname_generator = NicknameGenerator()
+        self.__state_abbreviation_converter = StateAbbreviationConverter()
+
+        # One Faker for the generator's lifetime; loading its providers
+        # is far too slow to repeat for every record.
+        self.__fake = Faker(locale)
+        self.__locale = locale
+
+        if not makes_us_addresses(self.__fake):
+            self.__log.error("Input 'locale' has no locale making US addresses.")
+            raise TypeError(
+                f"Input 'locale' ({locale}) has no locale making US addresses."
+            )
+
+        # Free email domains of all the locales, like Faker's free_email_domain,
+        # and the replacements Faker's user_name makes before transliterating.
+        internet_providers = [
+            FakeRecordGenerator.__internet_provider(locale=this_locale)
+            for this_locale in self.__fake.locales
+        ]
+        self.__email_domains = numpy.array(
+            list(
+                dict.fromkeys(
+                    domain
+                    for internet_provider in internet_providers
+                    for domain in internet_provider.free_email_domains
+                )
+            ),
+            dtype=object,
+        )
+        self.__ascii_replacements: Tuple[Tuple[str, str], ...] = tuple(
+            dict.fromkeys(
+                replacement
+                for internet_provider in internet_providers
+                for replacement in internet_provider.replacements
+            )
+        )
+        self.__check_seed(seed=seed)
+        self.__reseed(seed=seed)
+        self.__instrumentation: Optional[Instrumentation] = None
+
+        # Built when first needed, so that seeding here or in
+        # create_fake_records consumes the random streams identically;
+        # afterwards, the study id allocator of the latest run.
+        self.__study_id_allocator: Optional[IdAllocator] = None
+
+    @staticmethod
+    def __internet_provider(locale: str) -> Any:
+        """Faker's internet provider class for a locale; en_US's if it has none."""
+        try:
+            module = importlib.import_module(f"faker.providers.internet.{locale}")
+        except ModuleNotFoundError:
+            module = importlib.import_module("faker.providers.internet.en_US")
+
+        return module.Provider
+
+    def __check_locale(self, locale: Union[str, List[str], None]) -> None:
+        if locale is None or isinstance(locale, str):
+            return
+
+        if not isinstance(locale, list) or not all(
+            isinstance(this_locale, str) for this_locale in locale
+        ):
+            self.__log.error("Input 'locale' is not a str or list of str.")
+            raise TypeError("Input 'locale' is not a str or list of str.")
+
+    def __check_instrumentation(
+        self, instrumentation: Optional[Instrumentation]
+    ) -> None:
+        if instrumentation is not None and not isinstance(
+            instrumentation, Instrumentation
+        ):
+            self.__log.error("Input 'instrumentation' is not an Instrumentation.")
+            raise TypeError("Input 'instrumentation' is not an Instrumentation.")
+
+    def __check_seed(self, seed: Optional[int]) -> None:
+        if seed is None:
+            return
+
+        if isinstance(seed, bool) or not isinstance(seed, int) or seed < 0:
+            self.__log.error("Input 'seed' is not a non-negative int.")
+            raise TypeError("Input 'seed' is not a non-negative int.")
+
+    def __check_id_range(self, id_range: Tuple[int, int], range_name: str) -> None:
+        if (
+            not isinstance(id_range, tuple)
+            or len(id_range) != 2
+            or not all(isinstance(bound, int) for bound in id_range)
+        ):
+            self.__log.error(f"Input '{range_name}' is not a tuple of two ints.")
+            raise TypeError(f"Input '{range_name}' is not a tuple of two ints.")
+
+        if not 0 <= id_range[0] <= id_range[1]:
+            self.__log.error(f"Input '{range_name}' is not a valid range.")
+            raise TypeError(f"Input '{range_name}' is not a valid range.")
+
+    def __check_chunk_size(self, chunk_size: int) -> None:
+        if not isinstance(chunk_size, int) or chunk_size <= 0:
+            self.__log.error("Input 'chunk_size' is not a positive int.")
+            raise TypeError("Input 'chunk_size' is not a positive int.")
+
+    def __check_index_field_name(
+        self, index_field_name: str, include_cluster_id: bool = False
+    ) -> None:
+        if not isinstance(index_field_name, str):  # It's OK if it's zero-length.
+            self.__log.error("Input 'index_field_name' is not a str.")
+            raise TypeError("Input 'index_field_name' is not a str.")
+
+        field_names = list(RECORD_DTYPES)
+
+        if include_cluster_id:
+            field_names.append(CLUSTER_ID_FIELD)
+
+        if len(index_field_name) > 0 and index_field_name not in field_names:
+            self.__log.error(
+                "Field '{field_name}' is not present in the 'records' DataFrame.",
+                extra={"field_name": index_field_name},
+            )
+            raise TypeError(
+                f"Field {index_field_name} is not present "
+                f"in the 'records' DataFrame."
+            )
+
+    def __check_max_number_copies_of_one_record(
+        self, max_number_copies_of_one_record: int
+    ) -> None:
+        if not isinstance(max_number_copies_of_one_record, int):
+            self.__log.error(
+                "Input 'max_number_copies_of_one_record' " "is not an int."
+            )
+            raise TypeError("Input 'max_number_copies_of_one_record' " "is not an int.")
+
+        if max_number_copies_of_one_record < 0:
+            self.__log.error("Input 'max_number_copies_of_one_record' " "is < 0.")
+            raise TypeError("Input 'max_number_copies_of_one_record' " "is < 0>.")
+
+    def __check_num_records_desired(self, num_records_desired: int) -> None:
+        if not isinstance(num_records_desired, int):
+            self.__log.error("Input 'num_records_desired' " "is not an int.")
+            raise TypeError("Input 'num_records_desired' " "is not an int.")
+
+        if num_records_desired <= 0:
+            self.__log.error("Input 'num_records_desired' " "is not a positive int.")
+            raise TypeError("Input 'num_records_desired' " "is not a positive int.")
+
+    def __check_id_ranges_hold(self, num_records_desired: int) -> None:
+        """Every base record needs a study id & an MRN of its own."""
+        for id_range, range_name in [
+            (self.__study_id_range, "study_id_range"),
+            (self.__mrn_range, "mrn_range"),
+        ]:
+            if id_range[1] - id_range[0] + 1 < num_records_desired:
+                self.__log.error(f"Input '{range_name}' is too small.")
+                raise TypeError(
+                    f"Input '{range_name}' has fewer than "
+                    f"{num_records_desired} ids."
+                )
+
+    def __check_workers(self, workers: int) -> None:
+        if not isinstance(workers, int) or workers < 1:
+            self.__log.error("Input 'workers' is not a positive int.")
+            raise TypeError("Input 'workers' is not a positive int.")
+
+    def __check_percent_records_to_duplicate(
+        self, percent_records_to_duplicate: Union[int, float]
+    ) -> None:
+        if not isinstance(percent_records_to_duplicate, float):
+            self.__log.error("Input 'percent_records_to_duplicate' " "is not an float.")
+            raise TypeError("Input 'percent_records_to_duplicate' " "is not an float.")
+
+        if not 0 <= percent_records_to_duplicate <= 100:
+            self.__log.error(
+                "Input 'percent_records_to_duplicate' " "is not between 0 and 100."
+            )
+            raise TypeError(
+                "Input 'percent_records_to_duplicate' " "is not between 0 and 100."
+            )
+
+    def _create_fake_email_addresses(
+        self, given_names: pandas.Series, surnames: pandas.Series
+    ) -> pandas.Series:
+        """Create realistic email addresses for a whole column of names.
+
+        Not part of the public API; also timed by the benchmarks.
+
+        Parameters
+        ----------
+        given_names : pandas Series
+        surnames : pandas Series
+            Same length as given_names.
+
+        Returns
+        -------
+        pandas Series
+            Like "jane.doe@gmail.com", with the index of given_names.
+        """
+        num_addresses = len(given_names)
+        probability_of_using_first_initial_only = 0.25
+
+        # Is the email given.surname or given_surname or givensurname?
+        name_dividers = numpy.array([".", "_", ""], dtype=object)
+        dividers = name_dividers[
+            self.__rng.integers(0, len(name_dividers), size=num_addresses)
+        ]
+        use_first_initial = (
+            self.__rng.random(num_addresses) <= probability_of_using_first_initial_only
+        )
+        domains = self.__email_domains[
+            self.__rng.integers(0, len(self.__email_domains), size=num_addresses)
+        ]
+
+        lowercase_given_names = self.__to_ascii(given_names.str.lower())
+        given_names_used = numpy.where(
+            use_first_initial,
+            lowercase_given_names.str[0].to_numpy(dtype=object),
+            lowercase_given_names.to_numpy(dtype=object),
+        )
+        email_addresses = (
+            given_names_used
+            + dividers
+            + self.__to_ascii(surnames.str.lower()).to_numpy(dtype=object)
+            + "@"
+            + domains
+        )
+        return pandas.Series(email_addresses, index=given_names.index)
+
+    def __to_ascii(self, names: pandas.Series) -> pandas.Series:
+        """Transliterates names like "lévy" to ASCII ("levy") as Faker's
+        user_name does, converting each distinct name once."""
+        codes, unique_names = pandas.factorize(names)
+        ascii_names = []
+
+        for name in unique_names:
+            for search, replace in self.__ascii_replacements:
+                name = name.replace(search, replace)
+
+            ascii_names.append(unidecode(name))
+
+        # Missing names have code -1, which picks the trailing None.
+        return pandas.Series(
+            numpy.array(ascii_names + [None], dtype=object)[codes], index=names.index
+        )
+
+    def __create_fake_record(self, next_study_id: int, next_mrn: int) -> dict:
+        """Synthesize one record for testing.
+
+        Parameters
+        ---------
+        next_study_id :   int
+        next_mrn :   int
+
+        Raises
+        ------
+        TypeError
+            If input not the required type.
+
+        Return
+        ------
+        dict
+        """
+        if not isinstance(next_study_id, int):  # pragma: no cover
+            self.__log.error("Input 'next_study_id' is not an int.")
+            raise TypeError("Input 'next_study_id' is not an int.")
+
+        fake = self.__fake
+
+        with self.__measure("base records: names"):
+            record = {
+                "study_id": next_study_id,
+                "first_name": fake.first_name(),
+                "last_name": fake.last_name(),
+            }
+
+        # Addresses drawn from a pool are added to the whole block later.
+        if self.__address_pool is None:
+            with self.__measure("base records: addresses"):
+                # Exclude territories (like the Virgin Islands) because
+                # methods postalcode_in_state and zipcode_in_state
+                # can't handle territories.
+                state_abbr = fake.state_abbr(include_territories=False)
+                record["street_address_line_1"] = fake.street_address()
+                record["city"] = fake.city()
+                record["state"] = state_abbr
+                record["zip_code"] = fake.zipcode_in_state(state_abbr)
+
+        with self.__measure("base records: demographics"):
+            record.update(
+                {
+                    "mrn": next_mrn,
+                    "ethnicity": fake.random_int(min=1, max=2),
+                    "race": fake.random_int(min=1, max=5),
+                    "sex": fake.random_int(min=1, max=3),
+                }
+            )
+
+        return record
+
+    def __create_fake_dates(self, count: int, reference_date: date) -> dict:
+        """Synthesize the date columns of count records in one batch.
+
+        Dates are relative to the run's reference date rather than
+        today's, so a seeded run gives the same records on any day.
+
+        Parameters
+        ----------
+        count : int
+        reference_date : datetime.date
+
+        Returns
+        -------
+        dict
+            Column name to numpy array of "YYYY-MM-DD" strings.
+        """
+        reference_day = numpy.datetime64(reference_date, "D")
+        youngest_age_days = 6574  # 365.25 * 18
+        oldest_age_days = 42369  # 365.25 * 116
+        eighteen_years = numpy.timedelta64(youngest_age_days, "D")
+
+        # Each date is uniform over its allowed range: birthdates make
+        # the patient 18 to 116 years old, primary consent comes after
+        # their 18th birthday and core participation after consent.
+        birthdates = reference_day - self.__rng.integers(
+            youngest_age_days, oldest_age_days + 1, size=count
+        ).astype("timedelta64[D]")
+        primary_consent_dates = self.__random_dates_between(
+            start_dates=birthdates + eighteen_years, end_date=reference_day
+        )
+        core_participant_dates = self.__random_dates_between(
+            start_dates=primary_consent_dates, end_date=reference_day
+        )
+        return {
+            "dob": numpy.datetime_as_string(birthdates, unit="D"),
+            "core_participant_date": numpy.datetime_as_string(
+                core_participant_dates, unit="D"
+            ),
+            "primary_consent_date": numpy.datetime_as_string(
+                primary_consent_dates, unit="D"
+            ),
+            "date_of_last_activity": numpy.full(
+                count, str(reference_day), dtype=object
+            ),
+        }
+
+    def __random_dates_between(
+        self, start_dates: numpy.ndarray, end_date: numpy.datetime64
+    ) -> numpy.ndarray:
+        """Draw one date uniformly from [start, end_date] for each start date."""
+        num_days = (end_date - start_dates).astype("int64") + 1
+        offsets = (self.__rng.random(len(start_dates)) * num_days).astype("int64")
+        return start_dates + offsets.astype("timedelta64[D]")
+
+    def create_fake_records(
+        self,
+        duplicate_study_id: bool = True,
+        include_cluster_id: bool = False,
+        index_field_name: str = "",
+        instrumentation: Optional[Instrumentation] = None,
+        max_number_copies_of_one_record: int = 3,
+        num_records_desired: int = 100,
+        percent_records_to_duplicate: float = 3.0,
+        reference_date: Optional[date] = None,
+        seed: Optional[int] = None,
+        workers: int = 1,
+    ) -> pandas.DataFrame:
+        """Synthesize a whole set of patient records,
+        including duplicates, errors, etc.
+
+        Parameters
+        ----------
+        duplicate_study_id : bool
+            Optional. Do you want to allow
+            duplicate records to have the same study id?
+            Default : True
+        include_cluster_id : bool
+            Optional. Add a cluster_id column holding the ground truth
+            for duplicate detection: each base record's own study id,
+            shared by all its copies (even those given new study ids).
+            Unique across nodes, so nodes' records can be concatenated.
+            Default: False
+        index_field_name : str
+            Optional. Specify if one of the record columns should
+            be used instead of a synthetic index. Default: empty string
+        instrumentation : Instrumentation
+            Optional. Add the wall time, CPU time, call count (and, if it
+            traces memory, peak memory) of each phase of the run to this.
+            Phases inside the base-record blocks are only measured when
+            workers is 1. Default: None (measure nothing)
+        max_number_copies_of_one_record : int
+            Optional. Number of copies to be made of any one record.
+            Default: 3
+        num_records_desired : int
+            Optional. Number of patient records to be created.
+            Default: 100
+        percent_records_to_duplicate : float or int
+            Optional. The % of the records that should be duplicated.
+            Default: 3%
+        reference_date : datetime.date
+            Optional. The "today" of the synthetic data: latest possible
+            consent date & the date of last activity. Default: today
+        seed : int
+            Optional. Reseeds the generator before synthesizing, so that
+            the same seed (and reference_date) always gives the same records.
+            Default: None (continue from the generator's current state)
+        workers : int
+            Optional. Number of processes synthesizing the base records.
+            For a given seed, the records don't depend on this.
+            Default: 1
+
+        Raises
+        ------
+        TypeError
+            If inputs not the required types, or if either id range has
+            fewer ids than num_records_desired.
+        RuntimeError
+            If the copies given new study ids or MRNs use up a range.
+
+        Returns
+        -------
+        pandas DataFrame
+        """
+        run = self.__prepare_run(
+            duplicate_study_id=duplicate_study_id,
+            include_cluster_id=include_cluster_id,
+            index_field_name=index_field_name,
+            instrumentation=instrumentation,
+            max_number_copies_of_one_record=max_number_copies_of_one_record,
+            num_records_desired=num_records_desired,
+            percent_records_to_duplicate=percent_records_to_duplicate,
+            reference_date=reference_date,
+            seed=seed,
+            workers=workers,
+        )
+
+        # The whole set is just one big chunk.
+        (records,) = self.__generate_record_chunks(
+            chunk_size=num_records_desired, run=run
+        )
+        return records
+
+    def iter_fake_records(
+        self,
+        chunk_size: int = 10000,
+        duplicate_study_id: bool = True,
+        include_cluster_id: bool = False,
+        index_field_name: str = "",
+        instrumentation: Optional[Instrumentation] = None,
+        max_number_copies_of_one_record: int = 3,
+        num_records_desired: int = 100,
+        percent_records_to_duplicate: float = 3.0,
+        reference_date: Optional[date] = None,
+        seed: Optional[int] = None,
+        workers: int = 1,
+    ) -> Iterator[pandas.DataFrame]:
+        """Synthesize a set of patient records as a series of DataFrame chunks,
+        so that peak memory depends on chunk_size, not num_records_desired.
+
+        Each chunk holds up to chunk_size base records followed by
+        their duplicates. Study ids & MRNs are unique across all chunks,
+        and duplicates may be copies of records from earlier chunks: each
+        record made so far is about as likely to be copied as any other.
+
+        Parameters
+        ----------
+        chunk_size : int
+            Optional. Number of base records per chunk.
+            Default: 10000
+        (All other parameters are as for create_fake_records.)
+
+        Raises
+        ------
+        TypeError
+            If inputs not the required types, or if either id range has
+            fewer ids than num_records_desired.
+        RuntimeError
+            If the copies given new study ids or MRNs use up a range.
+
+        Returns
+        -------
+        iterator of pandas DataFrames
+        """
+        self.__check_chunk_size(chunk_size=chunk_size)
+        run = self.__prepare_run(
+            duplicate_study_id=duplicate_study_id,
+            include_cluster_id=include_cluster_id,
+            index_field_name=index_field_name,
+            instrumentation=instrumentation,
+            max_number_copies_of_one_record=max_number_copies_of_one_record,
+            num_records_desired=num_records_desired,
+            percent_records_to_duplicate=percent_records_to_duplicate,
+            reference_date=reference_date,
+            seed=seed,
+            workers=workers,
+        )
+        return self.__generate_record_chunks(chunk_size=chunk_size, run=run)
+
+    def __prepare_run(  # pylint: disable=too-many-arguments
+        self,
+        duplicate_study_id: bool,
+        include_cluster_id: bool,
+        index_field_name: str,
+        instrumentation: Optional[Instrumentation],
+        max_number_copies_of_one_record: int,
+        num_records_desired: int,
+        percent_records_to_duplicate: Union[int, float],
+        reference_date: Optional[date],
+        seed: Optional[int],
+        workers: int,
+    ) -> _RunState:
+        """Check the inputs, then reseed & make new allocators for a new set.
+
+        Returns
+        -------
+        _RunState
+        """
+        self.__check_instrumentation(instrumentation=instrumentation)
+        self.__check_seed(seed=seed)
+
+        if seed is not None:
+            self.__reseed(seed=seed)
+
+        self.__check_index_field_name(
+            index_field_name=index_field_name, include_cluster_id=include_cluster_id
+        )
+        self.__check_max_number_copies_of_one_record(
+            max_number_copies_of_one_record=max_number_copies_of_one_record
+        )
+        self.__check_num_records_desired(num_records_desired=num_records_desired)
+        self.__check_id_ranges_hold(num_records_desired=num_records_desired)
+        self.__check_workers(workers=workers)
+
+        if isinstance(percent_records_to_duplicate, int):
+            percent_records_to_duplicate = percent_records_to_duplicate * 1.0
+
+        self.__check_percent_records_to_duplicate(
+            percent_records_to_duplicate=percent_records_to_duplicate
+        )
+
+        # To ensure study ids & MRNs are unique, we'll draw them from allocators.
+        mrn_allocator = self.__new_id_allocator(id_range=self.__mrn_range)
+        self.__study_id_allocator = self.__new_id_allocator(
+            id_range=self.__study_id_range
+        )
+        return _RunState(
+            duplicate_study_id=duplicate_study_id,
+            include_cluster_id=include_cluster_id,
+            index_field_name=index_field_name,
+            instrumentation=instrumentation,
+            max_number_copies_of_one_record=max_number_copies_of_one_record,
+            mrn_allocator=mrn_allocator,
+            num_records_desired=num_records_desired,
+            percent_records_to_duplicate=percent_records_to_duplicate,
+            reference_date=reference_date or date.today(),
+            study_id_allocator=self.__study_id_allocator,
+            workers=workers,
+        )
+
+    def __generate_record_chunks(
+        self, chunk_size: int, run: _RunState
+    ) -> Iterator[pandas.DataFrame]:
+        block_entropy = int(self.__rng.integers(0, 2**63))
+        earlier_records = pandas.DataFrame()
+        earlier_record_keys = numpy.empty(0)
+        num_blocks_done = 0
+        num_records_done = 0
+        num_records_duplicated = 0
+        num_rows_done = 0
+
+        # Time spent in each phase, for the summary logged at the end.
+        base_seconds = 0.0
+        duplicate_seconds = 0.0
+
+        # Start the worker processes once for the whole run, not per chunk.
+        # (The first chunk is the largest, so if it needs no pool none does.)
+        num_blocks_per_chunk = -(
+            -min(chunk_size, run.num_records_desired)
+            // FakeRecordGenerator.__BLOCK_SIZE
+        )
+        pool = None
+
+        if run.workers > 1 and num_blocks_per_chunk > 1:
+            pool = multiprocessing.Pool(  # pylint: disable=consider-using-with
+                processes=min(run.workers, num_blocks_per_chunk),
+                initializer=_initialize_worker,
+                initargs=(
+                    self.__address_pool,
+                    self.__locale,
+                    self.__phone_number_generator.formats,
+                ),
+            )
+
+        try:
+            while num_records_done < run.num_records_desired:
+                # (Re)install this run's instrumentation, in case another run
+                # replaced it while this iterator was paused.
+                self.__instrumentation = run.instrumentation
+                phase_start_time = time.perf_counter()
+                num_records_in_chunk = min(
+                    chunk_size, run.num_records_desired - num_records_done
+                )
+                with self.__measure("allocate ids"):
+                    mrns = run.mrn_allocator.allocate_many(count=num_records_in_chunk)
+                    study_ids = run.study_id_allocator.allocate_many(
+                        count=num_records_in_chunk
+                    )
+                with self.__measure("base records"):
+                    records = self.__initialize_fake_records(
+                        block_entropy=block_entropy,
+                        first_block_index=num_blocks_done,
+                        study_ids=study_ids.tolist(),
+                        mrns=mrns.tolist(),
+                        reference_date=run.reference_date,
+                        pool=pool,
+                    )
+
+                # A base record's cluster id is its own study id, which is unique
+                # even across nodes; copies carry it along with their other fields.
+                if run.include_cluster_id:
+                    records[CLUSTER_ID_FIELD] = records["study_id"].to_numpy(copy=True)
+
+                num_records_done += num_records_in_chunk
+                num_blocks_done += -(
+                    -num_records_in_chunk // FakeRecordGenerator.__BLOCK_SIZE
+                )
+
+                # Duplicate some rows, keeping the running total on target.
+                num_records_to_duplicate = (
+                    int(
+                        round(
+                            num_records_done * run.percent_records_to_duplicate / 100.0
+                        )
+                    )
+                    - num_records_duplicated
+                )
+                num_records_duplicated += num_records_to_duplicate
+                base_seconds += time.perf_counter() - phase_start_time
+                phase_start_time = time.perf_counter()
+                with self.__measure("duplicate records"):
+                    chunk = self.__duplicate_records(
+                        records=records,
+                        earlier_records=earlier_records,
+                        num_earlier_records=num_records_done - num_records_in_chunk,
+                        num_records_to_duplicate=num_records_to_duplicate,
+                        run=run,
+                    )
+                chunk.index = pandas.RangeIndex(
+                    num_rows_done, num_rows_done + len(chunk)
+                )
+                num_rows_done += len(chunk)
+
+                if num_records_done < run.num_records_desired:
+                    # Keep a uniform sample of (at most chunk_size) base records
+                    # seen so far, for later chunks to copy from: each record gets
+                    # a random key and we keep the ones with the smallest keys.
+                    with self.__measure("sample earlier records"):
+                        earlier_records = pandas.concat(
+                            [earlier_records, records], ignore_index=True
+                        )
+                        earlier_record_keys = numpy.concatenate(
+                            [earlier_record_keys, self.__rng.random(len(records))]
+                        )
+
+                        if len(earlier_records) > chunk_size:
+                            keep = numpy.argpartition(earlier_record_keys, chunk_size)[
+                                :chunk_size
+                            ]
+                            earlier_records = earlier_records.iloc[keep].reset_index(
+                                drop=True
+                            )
+                            earlier_record_keys = earlier_record_keys[keep]
+
+                # If specified, set the desired field as the index.
+                if len(run.index_field_name) > 0:
+                    with self.__measure("set index"):
+                        chunk = chunk.set_index(run.index_field_name)
+
+                duplicate_seconds += time.perf_counter() - phase_start_time
+                yield chunk
+        finally:
+            # Also reached if the caller stops iterating early.
+            if pool is not None:
+                pool.terminate()
+                pool.join()
+
+        if self.__log.isEnabledFor(logging.INFO):
+            self.__log.info(
+                "Synthesized {num_records} records in {base_seconds:.2f} s "
+                "and {num_record_copies} copies of {num_records_duplicated} "
+                "of them in {duplicate_seconds:.2f} s.",
+                extra={
+                    "num_records": num_records_done,
+                    "base_seconds": base_seconds,
+                    "num_record_copies": num_rows_done - num_records_done,
+                    "num_records_duplicated": num_records_duplicated,
+                    "duplicate_seconds": duplicate_seconds,
+                },
+            )
+
+    def fake_record_sequence(
+        self,
+        num_records_desired: int = 100,
+        reference_date: Optional[date] = None,
+        seed: Optional[int] = None,
+    ) -> "FakeRecordSequence":
+        """Base records of a seeded dataset that can be read in any order.
+
+        Record i is a pure function of the seed & i, so any record or
+        slice is synthesized directly, in time proportional to its length,
+        without making the records before it. Separate processes (or
+        machines) with the same seed can each build their own slices.
+
+        Only base records: duplicates are made by sampling across the
+        whole set, so they're only available from create_fake_records.
+        The records also differ from those create_fake_records makes with
+        the same seed, and study ids & MRNs always come from a keyed
+        permutation of each range, whatever the id_allocator.
+
+        Parameters
+        ----------
+        num_records_desired : int
+            Optional. Length of the sequence. Default: 100
+        reference_date : datetime.date
+            Optional. The "today" of the synthetic data. Default: today
+        seed : int
+            Optional. The same seed (and reference_date) gives the same
+            records. Default: None (a fresh seed, available as the
+            sequence's seed attribute)
+
+        Raises
+        ------
+        TypeError
+            If inputs not the required types, or if either id range has
+            fewer ids than num_records_desired.
+
+        Returns
+        -------
+        FakeRecordSequence
+        """
+        self.__check_num_records_desired(num_records_desired=num_records_desired)
+        self.__check_seed(seed=seed)
+        self.__check_id_ranges_hold(num_records_desired=num_records_desired)
+
+        # The sequence gets a generator (and Faker) of its own,
+        # so reading it doesn't disturb this generator's random state.
+        return FakeRecordSequence(
+            fake_record_generator=FakeRecordGenerator(
+                address_pool=self.__address_pool,
+                locale=self.__locale,
+                phone_number_formats=self.__phone_number_generator.formats,
+                quiet=True,
+            ),
+            mrn_range=self.__mrn_range,
+            num_records=num_records_desired,
+            reference_date=reference_date or date.today(),
+            seed=seed,
+            study_id_range=self.__study_id_range,
+        )
+
+    def create_fake_study_id(self) -> int:
+        """Synthesize one unused index number.
+
+        Returns
+        -------
+        int
+
+        Raises
+        ------
+        RuntimeError
+            If every study id in the range has been used.
+        """
+        if self.__study_id_allocator is None:
+            self.__study_id_allocator = self.__new_id_allocator(
+                id_range=self.__study_id_range
+            )
+
+        return self.__study_id_allocator.allocate()
+
+    def __duplicate_records(
+        self,
+        records: pandas.DataFrame,
+        earlier_records: pandas.DataFrame,
+        num_earlier_records: int,
+        num_records_to_duplicate: int,
+        run: _RunState,
+    ) -> pandas.DataFrame:
+        """Append perturbed copies of randomly-selected records.
+
+        All the source rows and copy counts are drawn up front; each
+        perturbation is then applied to the whole block of copies at once
+        and the block is appended with a single concat.
+
+        Parameters
+        ----------
+        records : pandas DataFrame
+            Base records.
+        earlier_records : pandas DataFrame
+            Uniform sample of the records from earlier chunks,
+            which may also be copied.
+        num_earlier_records : int
+            How many records the earlier chunks held.
+        num_records_to_duplicate : int
+        run : _RunState
+
+        Returns
+        -------
+        pandas DataFrame
+        """
+        if num_records_to_duplicate == 0:
+            return records
+
+        date_formats = ["%Y-%m-%d", "%d-%m-%Y", "%B %d, %Y", "%b %d, %Y"]
+        probability_of_duplicating_study_id = 0.0
+
+        if run.duplicate_study_id:
+            probability_of_duplicating_study_id = 0.20
+
+        probability_of_new_mrn = 0.20
+        probability_of_using_full_state_name = 0.33
+        probability_of_using_nickname = 0.33
+
+        # Grab records at random.
+        # (sri ==> "selected record indices")
+        with self.__measure("duplicate records: select copies"):
+            source_records = records
+            sri = self.__rng.integers(0, len(records), size=num_records_to_duplicate)
+
+            if len(earlier_records) > 0:
+                # Each sampled earlier record stands for several of the
+                # earlier chunks' records, so draw from the sample as often
+                # as from all of them: every record made so far is equally
+                # likely to be copied.
+                from_earlier = self.__rng.random(num_records_to_duplicate) < (
+                    num_earlier_records / (num_earlier_records + len(records))
+                )
+                sri[from_earlier] = len(records) + self.__rng.integers(
+                    0, len(earlier_records), size=int(from_earlier.sum())
+                )
+                source_records = pandas.concat(
+                    [records, earlier_records], ignore_index=True
+                )
+
+            # Maybe we're asked to create MORE than one duplicate.
+            num_copies = numpy.ones(num_records_to_duplicate, dtype="int64")
+
+            if run.max_number_copies_of_one_record > 0:
+                num_copies = self.__rng.integers(
+                    1,
+                    run.max_number_copies_of_one_record + 1,
+                    size=num_records_to_duplicate,
+                )
+
+            copies = source_records.iloc[numpy.repeat(sri, num_copies)].reset_index(
+                drop=True
+            )
+        num_record_copies = len(copies)
+
+        if self.__log.isEnabledFor(logging.DEBUG):
+            self.__log.debug(
+                "Making {num_record_copies} copies of {num_records} records.",
+                extra={
+                    "num_record_copies": num_record_copies,
+                    "num_records": num_records_to_duplicate,
+                },
+            )
+
+        # Do we generate a unique study_id or keep the existing one?
+        #  (which will result in duplicate study_id values across the dataFrame.)
+        # Normally we test for < probability, not >.
+        # But here, creating a unique study_id is what we do when
+        # the probability test fails.
+        new_study_id = (
+            self.__rng.random(num_record_copies) >= probability_of_duplicating_study_id
+        )
+        with self.__measure("duplicate records: study ids"):
+            copies.loc[new_study_id, "study_id"] = run.study_id_allocator.allocate_many(
+                count=int(new_study_id.sum())
+            )
+
+        # Simulate the kind of differences that might occur
+        # if a user were to be re-added:
+        #   1) Use a nickname instead of the user's first_name.
+        with self.__measure("duplicate records: nicknames"):
+            copies["first_name"] = self.__nickname_generator.substitute(
+                names=copies["first_name"],
+                probability=probability_of_using_nickname,
+                rng=self.__rng,
+            )
+
+        #   2) Sometimes use the full state name
+        #   instead of the postal abbreviation.
+        use_full_state_name = (
+            self.__rng.random(num_record_copies) <= probability_of_using_full_state_name
+        )
+        with self.__measure("duplicate records: state names"):
+            copies.loc[use_full_state_name, "state"] = (
+                self.__state_abbreviation_converter.full_names(
+                    two_letter_codes=copies.loc[use_full_state_name, "state"]
+                )
+            )
+
+        #   3) Enter date of birth in a different format.
+        with self.__measure("duplicate records: dob formats"):
+            birthdates = pandas.to_datetime(copies["dob"], format="%Y-%m-%d")
+            date_format_choices = self.__rng.integers(
+                0, len(date_formats), size=num_record_copies
+            )
+
+            for date_format_index, date_format in enumerate(date_formats):
+                use_this_format = date_format_choices == date_format_index
+                copies.loc[use_this_format, "dob"] = birthdates[
+                    use_this_format
+                ].dt.strftime(date_format)
+
+        #   4) People might change their email provider.
+        with self.__measure("duplicate records: email addresses"):
+            copies["email_address"] = self._create_fake_email_addresses(
+                given_names=copies["first_name"], surnames=copies["last_name"]
+            )
+
+        #   5) Maybe the patient was entered under a new MRN.
+        new_mrn = self.__rng.random(num_record_copies) <= probability_of_new_mrn
+        with self.__measure("duplicate records: mrns"):
+            copies.loc[new_mrn, "mrn"] = run.mrn_allocator.allocate_many(
+                count=int(new_mrn.sum())
+            )
+
+        # Insert the copies into records.
+        with self.__measure("duplicate records: concat"):
+            return pandas.concat([records, copies], ignore_index=True)
+
+    def __measure(self, phase: str) -> ContextManager[None]:
+        """Context manager measuring one run of a phase, if instrumented."""
+        if self.__instrumentation is None:
+            return _NOT_MEASURED
+
+        return self.__instrumentation.measure(phase)
+
+    def __reseed(self, seed: Optional[int]) -> None:
+        """Routes all randomness through generators derived from one seed."""
+        numpy_seed, faker_seed = numpy.random.SeedSequence(
+            seed, spawn_key=self.__seed_spawn_key
+        ).spawn(2)
+        self.__rng = numpy.random.default_rng(numpy_seed)
+        self.__fake.seed_instance(int(faker_seed.generate_state(1)[0]))
+
+    def __new_id_allocator(self, id_range: Tuple[int, int]) -> IdAllocator:
+        return self.__id_allocator(
+            min_id=id_range[0], max_id=id_range[1], rng=self.__rng
+        )
+
+    def __initialize_fake_records(  # pylint: disable=too-many-arguments
+        self,
+        block_entropy: int,
+        first_block_index: int,
+        study_ids: list,
+        mrns: list,
+        reference_date: date,
+        pool: Optional["multiprocessing.pool.Pool"],
+    ) -> pandas.DataFrame:
+        """Synthesize the base records in fixed-size blocks,
+        optionally spread over a pool of worker processes.
+
+        Each block gets its own random substream and its own slice of the
+        study ids & MRNs, so the records depend only on the seed,
+        not on how many workers made them.
+
+        Parameters
+        ----------
+        block_entropy : int
+            Seeds the blocks' substreams.
+        first_block_index : int
+            Number of blocks already made for this set of records.
+        study_ids : list
+        mrns : list
+        reference_date : datetime.date
+        pool : multiprocessing Pool
+            The run's worker processes, or None to make the blocks here.
+
+        Returns
+        -------
+        pandas DataFrame
+        """
+        if self.__log.isEnabledFor(logging.DEBUG):
+            self.__log.debug(
+                "Generating {num_records} synthetic patient records.",
+                extra={"num_records": len(study_ids)},
+            )
+
+        blocks = [
+            (
+                block_entropy,
+                first_block_index + block_index,
+                study_ids[start : start + FakeRecordGenerator.__BLOCK_SIZE],
+                mrns[start : start + FakeRecordGenerator.__BLOCK_SIZE],
+                reference_date,
+            )
+            for block_index, start in enumerate(
+                range(0, len(study_ids), FakeRecordGenerator.__BLOCK_SIZE)
+            )
+        ]
+
+        if pool is None or len(blocks) == 1:
+            record_blocks = [self._create_fake_record_block(block) for block in blocks]
+        else:
+            record_blocks = pool.map(_create_fake_record_block, blocks)
+
+        # Whatever happened to our Faker while making the blocks,
+        # continue from a state that depends only on the seed.
+        self.__fake.seed_instance(int(self.__rng.integers(0, 2**63)))
+        with self.__measure("base records: concat"):
+            return pandas.concat(record_blocks, ignore_index=True)
+
+    def _create_fake_record_block(self, block: tuple) -> pandas.DataFrame:
+        """Synthesize one block of base records from the block's own
+        random substream.
+
+        Not part of the public API; also called from worker processes.
+
+        Parameters
+        ----------
+        block : tuple
+            (entropy, block index, study ids, MRNs, reference date)
+
+        Returns
+        -------
+        pandas DataFrame
+        """
+        block_entropy, block_index, study_ids, mrns, reference_date = block
+        numpy_seed, faker_seed = numpy.random.SeedSequence(
+            block_entropy, spawn_key=(block_index,)
+        ).spawn(2)
+        parent_rng = self.__rng
+        self.__rng = numpy.random.default_rng(numpy_seed)
+        self.__fake.seed_instance(int(faker_seed.generate_state(1)[0]))
+
+        try:
+            return self.__create_base_records(
+                study_ids=study_ids, mrns=mrns, reference_date=reference_date
+            )
+        finally:
+            self.__rng = parent_rng
+
+    def _create_fake_records_at(  # pylint: disable=too-many-arguments
+        self,
+        mrns: list,
+        ordinals: range,
+        records_key: numpy.ndarray,
+        reference_date: date,
+        study_ids: list,
+    ) -> pandas.DataFrame:
+        """Synthesize the base records with the given ordinals, each from
+        its own counter-based random stream, so that a record depends only
+        on the key & its ordinal, not on which records are made with it.
+
+        Not part of the public API; called by FakeRecordSequence.
+
+        Parameters
+        ----------
+        mrns : list
+        ordinals : range
+            Positions of the records in their sequence.
+        records_key : numpy array
+            Philox key (two uint64s).
+        reference_date : datetime.date
+        study_ids : list
+
+        Returns
+        -------
+        pandas DataFrame
+            Indexed by ordinal.
+        """
+        # Philox is counter-based: setting the third counter word to the
+        # ordinal skips 2**128 draws per record, so every record has its
+        # own stream and none of them needs the ones before it.
+        record_rngs = [
+            numpy.random.Generator(
+                numpy.random.Philox(key=records_key, counter=[0, 0, ordinal, 0])
+            )
+            for ordinal in ordinals
+        ]
+        faker_seeds = [int(record_rng.integers(0, 2**63)) for record_rng in record_rngs]
+        parent_rng = self.__rng
+        self.__rng = _RecordwiseRandom(  # type: ignore[assignment]
+            record_rngs=record_rngs
+        )
+
+        try:
+            records = self.__create_base_records(
+                study_ids=study_ids,
+                mrns=mrns,
+                reference_date=reference_date,
+                faker_seeds=faker_seeds,
+            )
+        finally:
+            self.__rng = parent_rng
+
+        records.index = pandas.RangeIndex(ordinals.start, ordinals.stop, ordinals.step)
+        return records
+
+    def __create_base_records(
+        self,
+        study_ids: list,
+        mrns: list,
+        reference_date: date,
+        faker_seeds: Optional[list] = None,
+    ) -> pandas.DataFrame:
+        """Synthesize base records column by column, building their
+        DataFrame only once at the end.
+
+        Parameters
+        ----------
+        study_ids : list
+        mrns : list
+        reference_date : datetime.date
+        faker_seeds : list of int
+            Optional. Reseed the Faker with each record's seed before
+            making that record. Default: None (use the Faker as it is)
+
+        Returns
+        -------
+        pandas DataFrame
+        """
+        # Columns made for the whole block at once...
+        with self.__measure("base records: dates"):
+            batched_columns = self.__create_fake_dates(
+                count=len(study_ids), reference_date=reference_date
+            )
+        with self.__measure("base records: phone numbers"):
+            batched_columns["phone_number"] = self.__phone_number_generator.create(
+                count=len(study_ids), rng=self.__rng
+            )
+
+        if self.__address_pool is not None:
+            with self.__measure("base records: addresses"):
+                addresses = self.__address_pool.sample(
+                    count=len(study_ids), rng=self.__rng
+                )
+            batched_columns.update(
+                {field: addresses[field] for field in ADDRESS_FIELDS}
+            )
+
+        # ...and those still made record by record.
+        columns: dict = {
+            column_name: []
+            for column_name in RECORD_DTYPES
+            if column_name not in batched_columns and column_name != "email_address"
+        }
+
+        for record_number, (study_id, mrn) in enumerate(zip(study_ids, mrns)):
+            if faker_seeds is not None:
+                self.__fake.seed_instance(faker_seeds[record_number])
+
+            new_record: dict = self.__create_fake_record(
+                next_study_id=study_id, next_mrn=mrn
+            )
+
+            for column_name, column_values in columns.items():
+                column_values.append(new_record[column_name])
+
+        columns.update(batched_columns)
+
+        # Email addresses need the names.
+        with self.__measure("base records: email addresses"):
+            columns["email_address"] = self._create_fake_email_addresses(
+                given_names=pandas.Series(columns["first_name"], dtype=str),
+                surnames=pandas.Series(columns["last_name"], dtype=str),
+            )
+
+        return pandas.DataFrame(
+            {
+                column_name: pandas.Series(
+                    columns[column_name], dtype=RECORD_DTYPES[column_name]
+                )
+                for column_name in RECORD_DTYPES
+            }
+        )
+
+
+class FakeRecordSequence(Sequence):
+    """
+    Base records that are each synthesized only when asked for.
+
+    Made by FakeRecordGenerator.fake_record_sequence. Indexing gives one
+    record as a pandas Series; slicing gives a DataFrame indexed by the
+    records' positions in the sequence. Each record's random choices come
+    from a counter-based (Philox) generator keyed by the seed, with the
+    record's position as the counter, and its study id & MRN are each
+    range's smallest id plus a keyed permutation of the position.
+
+    ...
+
+    Attributes
+    ----------
+    reference_date : datetime.date
+    seed : int
+    """
+
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        fake_record_generator: FakeRecordGenerator,
+        mrn_range: Tuple[int, int],
+        num_records: int,
+        reference_date: date,
+        seed: Optional[int],
+        study_id_range: Tuple[int, int],
+    ) -> None:
+        if seed is None:
+            seed = int(numpy.random.SeedSequence().entropy)
+
+        records_seed, study_id_seed, mrn_seed = numpy.random.SeedSequence(seed).spawn(3)
+        self.__fake_record_generator = fake_record_generator
+        self.__num_records = num_records
+        self.__reference_date = reference_date
+        self.__seed = seed
+        self.__records_key = records_seed.generate_state(2, dtype="uint64")
+        self.__min_mrn = mrn_range[0]
+        self.__mrn_permutation = FeistelPermutation(
+            size=mrn_range[1] - mrn_range[0] + 1,
+            rng=numpy.random.default_rng(mrn_seed),
+        )
+        self.__min_study_id = study_id_range[0]
+        self.__study_id_permutation = FeistelPermutation(
+            size=study_id_range[1] - study_id_range[0] + 1,
+            rng=numpy.random.default_rng(study_id_seed),
+        )
+
+    @property
+    def reference_date(self) -> date:
+        """The "today" of the synthetic data."""
+        return self.__reference_date
+
+    @property
+    def seed(self) -> int:
+        """Seed the records are synthesized from."""
+        return self.__seed
+
+    def __len__(self) -> int:
+        return self.__num_records
+
+    def __getitem__(
+        self, index: Union[int, slice]
+    ) -> Union[pandas.Series, pandas.DataFrame]:
+        if isinstance(index, slice):
+            return self.__create_records(ordinals=range(self.__num_records)[index])
+
+        if isinstance(index, bool) or not isinstance(index, (int, numpy.integer)):
+            raise TypeError("Record indices must be ints or slices.")
+
+        ordinal = range(self.__num_records)[index]  # IndexError if out of range
+        return self.__create_records(ordinals=range(ordinal, ordinal + 1)).iloc[0]
+
+    def __create_records(self, ordinals: range) -> pandas.DataFrame:
+        if len(ordinals) == 0:
+            return pandas.DataFrame(
+                {
+                    column_name: pandas.Series([], dtype=dtype)
+                    for column_name, dtype in RECORD_DTYPES.items()
+                },
+                index=pandas.RangeIndex(0),
+            )
+
+        positions = numpy.arange(
+            ordinals.start, ordinals.stop, ordinals.step, dtype="uint64"
+        )
+        return self.__fake_record_generator._create_fake_records_at(
+            mrns=(self.__min_mrn + self.__mrn_permutation.permute(positions)).tolist(),
+            ordinals=ordinals,
+            records_key=self.__records_key,
+            reference_date=self.__reference_date,
+            study_ids=(
+                self.__min_study_id + self.__study_id_permutation.permute(positions)
+            ).tolist(),
+        )
+
+
+class _RecordwiseRandom:
+    """
+    Stands in for a numpy Generator in the column builders, drawing each
+    row's numbers from that row's own generator instead of one shared stream.
+
+    Every draw the builders make is one number per row, so each record
+    consumes its own stream identically whichever records it's made with.
+    """
+
+    def __init__(self, record_rngs: List[numpy.random.Generator]) -> None:
+        self.__record_rngs = record_rngs
+
+    def random(self, size: int) -> numpy.ndarray:
+        """One float in [0, 1) per row."""
+        self.__check_size(size=size)
+        return numpy.array(
+            [record_rng.random() for record_rng in self.__record_rngs], dtype=float
+        )
+
+    def integers(self, low: int, high: int, size: int) -> numpy.ndarray:
+        """One int in [low, high) per row."""
+        return low + (self.random(size=size) * (high - low)).astype("int64")
+
+    def __check_size(self, size: int) -> None:
+        if size != len(self.__record_rngs):  # pragma: no cover
+            raise RuntimeError("Recordwise draws must be one number per row.")
+
+
+# Each worker process builds its own generator (and so its own Faker) once.
+_worker_generator: Optional[FakeRecordGenerator] = None
+
+
+def _initialize_worker(
+    address_pool: Optional[AddressPool],
+    locale: Union[str, List[str], None],
+    phone_number_formats: Optional[Iterable[str]],
+) -> None:
+    global _worker_generator  # pylint: disable=global-statement
+    _worker_generator = FakeRecordGenerator(
+        address_pool=address_pool,
+        locale=locale,
+        phone_number_formats=phone_number_formats,
+    )
+
+
+def _create_fake_record_block(block: tuple) -> pandas.DataFrame:
+    return _worker_generator._create_fake_record_block(  # type: ignore[union-attr]
+        block
+    )
+
+
+if __name__ == "__main__":  # pragma: no cover
+    fake_records_object = FakeRecordGenerator()
@@ -1,12 +1,84 @@
-import pandas  # type: ignore[import]
-
-class FakeRecordGenerator:
-    def __init__(self) -> None: ...
-    def create_fake_records(
-        self,
-        index_field_name: str = ...,
-        max_number_copies_of_one_record: int = ...,
-        num_records_desired: int = ...,
-        percent_records_to_duplicate: float = ...,
-    ) -> pandas.DataFrame: ...
-    def create_fake_study_id(self) -> int: ...
+from collections.abc import Sequence
+from datetime import date
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple, Union
+
+import pandas  # type: ignore[import]
+
+from redcaprecordsynthesizer.address_pool import AddressPool
+from redcaprecordsynthesizer.id_allocation import IdAllocator
+from redcaprecordsynthesizer.instrumentation import Instrumentation
+
+RECORD_DTYPES: dict
+CLUSTER_ID_FIELD: str
+
+class FakeRecordGenerator:
+    def __init__(
+        self,
+        address_pool: Optional[AddressPool] = ...,
+        id_allocator: Optional[Callable[..., IdAllocator]] = ...,
+        locale: Union[str, List[str], None] = ...,
+        log_filename: Optional[str] = ...,
+        mrn_range: Tuple[int, int] = ...,
+        node_id: int = ...,
+        phone_number_formats: Optional[Iterable[str]] = ...,
+        quiet: bool = ...,
+        seed: Optional[int] = ...,
+        shard_count: int = ...,
+        study_id_range: Tuple[int, int] = ...,
+    ) -> None: ...
+    def create_fake_records(
+        self,
+        duplicate_study_id: bool = ...,
+        include_cluster_id: bool = ...,
+        index_field_name: str = ...,
+        instrumentation: Optional[Instrumentation] = ...,
+        max_number_copies_of_one_record: int = ...,
+        num_records_desired: int = ...,
+        percent_records_to_duplicate: float = ...,
+        reference_date: Optional[date] = ...,
+        seed: Optional[int] = ...,
+        workers: int = ...,
+    ) -> pandas.DataFrame: ...
+    def iter_fake_records(
+        self,
+        chunk_size: int = ...,
+        duplicate_study_id: bool = ...,
+        include_cluster_id: bool = ...,
+        index_field_name: str = ...,
+        instrumentation: Optional[Instrumentation] = ...,
+        max_number_copies_of_one_record: int = ...,
+        num_records_desired: int = ...,
+        percent_records_to_duplicate: float = ...,
+        reference_date: Optional[date] = ...,
+        seed: Optional[int] = ...,
+        workers: int = ...,
+    ) -> Iterator[pandas.DataFrame]: ...
+    def fake_record_sequence(
+        self,
+        num_records_desired: int = ...,
+        reference_date: Optional[date] = ...,
+        seed: Optional[int] = ...,
+    ) -> FakeRecordSequence: ...
+    def create_fake_study_id(self) -> int: ...
+    def _create_fake_email_addresses(
+        self, given_names: pandas.Series, surnames: pandas.Series
+    ) -> pandas.Series: ...
+
+class FakeRecordSequence(Sequence):
+    def __init__(
+        self,
+        fake_record_generator: FakeRecordGenerator,
+        mrn_range: Tuple[int, int],
+        num_records: int,
+        reference_date: date,
+        seed: Optional[int],
+        study_id_range: Tuple[int, int],
+    ) -> None: ...
+    @property
+    def reference_date(self) -> date: ...
+    @property
+    def seed(self) -> int: ...
+    def __len__(self) -> int: ...
+    def __getitem__(
+        self, index: Union[int, slice]
+    ) -> Union[pandas.Series, pandas.DataFrame]: ...
@@ -0,0 +1,325 @@
+"""
+Module: contains the unique-id allocators used by FakeRecordGenerator
+to hand out study ids and medical record numbers without
+re-scanning the ids already issued.
+"""
+
+from abc import ABC, abstractmethod
+from typing import Optional, Tuple
+
+import numpy
+
+
+def id_range_for_width(width: int) -> Tuple[int, int]:
+    """Gives the range of ids having exactly `width` digits.
+
+    Parameters
+    ----------
+    width : int
+        Number of digits, like 5 for study ids 10000-99999.
+
+    Returns
+    -------
+    tuple of two ints
+
+    Raises
+    ------
+    TypeError
+        If width is not a positive int.
+    """
+    if not isinstance(width, int) or width <= 0:
+        raise TypeError("Input 'width' is not a positive int.")
+
+    return 10 ** (width - 1), 10**width - 1
+
+
+def partition_id_range(
+    id_range: Tuple[int, int], node_id: int, shard_count: int
+) -> Tuple[int, int]:
+    """Gives one node its share of an id range.
+
+    The range is cut into shard_count contiguous, disjoint parts of
+    (nearly) equal size, so nodes drawing ids only from their own part
+    never collide, with no coordination between them.
+
+    Parameters
+    ----------
+    id_range : tuple of two ints
+        Smallest & largest id, inclusive.
+    node_id : int
+        Which part, from 0 to shard_count - 1.
+    shard_count : int
+        Number of parts.
+
+    Returns
+    -------
+    tuple of two ints
+
+    Raises
+    ------
+    TypeError
+        If shard_count is not a positive int, node_id is not in
+        [0, shard_count), or the range has fewer than shard_count ids.
+    """
+    if not isinstance(shard_count, int) or shard_count <= 0:
+        raise TypeError("Input 'shard_count' is not a positive int.")
+
+    if not isinstance(node_id, int) or not 0 <= node_id < shard_count:
+        raise TypeError("Input 'node_id' is not an int in [0, shard_count).")
+
+    size = id_range[1] - id_range[0] + 1
+
+    if size < shard_count:
+        raise TypeError(f"Id range {id_range} has fewer than {shard_count} ids.")
+
+    return (
+        id_range[0] + size * node_id // shard_count,
+        id_range[0] + size * (node_id + 1) // shard_count - 1,
+    )
+
+
+class IdAllocator(ABC):
+    """
+    Hands out unique integer ids from the inclusive range [min_id, max_id].
+
+    Subclasses decide *how* the next unused id is chosen by implementing
+    _allocate(); this class does the bookkeeping and range checks.
+
+    ...
+
+    Attributes
+    ----------
+    min_id : int
+    max_id : int
+    num_allocated : int
+    num_remaining : int
+
+    Methods
+    -------
+    allocate()
+        Returns one unused id.
+    allocate_many(count)
+        Returns a numpy array of `count` unused ids.
+    """
+
+    def __init__(self, min_id: int, max_id: int) -> None:
+        if not isinstance(min_id, int) or not isinstance(max_id, int):
+            raise TypeError("Inputs 'min_id' and 'max_id' must be ints.")
+
+        if min_id > max_id:
+            raise TypeError("Input 'min_id' is greater than 'max_id'.")
+
+        self.__min_id = min_id
+        self.__max_id = max_id
+        self.__num_allocated = 0
+
+    @property
+    def min_id(self) -> int:
+        """Smallest id this allocator can return."""
+        return self.__min_id
+
+    @property
+    def max_id(self) -> int:
+        """Largest id this allocator can return."""
+        return self.__max_id
+
+    @property
+    def num_allocated(self) -> int:
+        """How many ids have been handed out so far."""
+        return self.__num_allocated
+
+    @property
+    def num_remaining(self) -> int:
+        """How many ids are still available."""
+        return self.__max_id - self.__min_id + 1 - self.__num_allocated
+
+    def allocate(self) -> int:
+        """Returns one unused id.
+
+        Returns
+        -------
+        int
+
+        Raises
+        ------
+        RuntimeError
+            If the id range is exhausted.
+        """
+        return int(self.allocate_many(count=1)[0])
+
+    def allocate_many(self, count: int) -> numpy.ndarray:
+        """Returns a batch of unused ids.
+
+        Parameters
+        ----------
+        count : int
+            Number of ids wanted.
+
+        Returns
+        -------
+        numpy array of int64
+
+        Raises
+        ------
+        TypeError
+            If count is not a non-negative int.
+        RuntimeError
+            If fewer than `count` ids remain in the range.
+        """
+        if not isinstance(count, (int, numpy.integer)) or count < 0:
+            raise TypeError("Input 'count' is not a non-negative int.")
+
+        if count > self.num_remaining:
+            raise RuntimeError(
+                f"Id range [{self.__min_id}, {self.__max_id}] is exhausted: "
+                f"{count} ids requested but only {self.num_remaining} remain."
+            )
+
+        new_ids = self._allocate(count=int(count))
+        self.__num_allocated += int(count)
+        return new_ids
+
+    @abstractmethod
+    def _allocate(self, count: int) -> numpy.ndarray:
+        """Chooses `count` unused ids; range checks are already done."""
+
+
+class SetIdAllocator(IdAllocator):
+    """
+    Draws ids uniformly at random and rejects any already in a set of used ids.
+
+    Each id costs O(1) expected time while the range is sparsely used;
+    memory grows with the number of ids handed out.
+    """
+
+    def __init__(
+        self,
+        min_id: int,
+        max_id: int,
+        rng: Optional[numpy.random.Generator] = None,
+    ) -> None:
+        super().__init__(min_id=min_id, max_id=max_id)
+        self.__rng = rng or numpy.random.default_rng()
+        self.__used: set = set()
+
+    def _allocate(self, count: int) -> numpy.ndarray:
+        new_ids: list = []
+
+        while len(new_ids) < count:
+            candidates = self.__rng.integers(
+                self.min_id, self.max_id + 1, size=count - len(new_ids)
+            )
+
+            for candidate in candidates.tolist():
+                if candidate not in self.__used:
+                    self.__used.add(candidate)
+                    new_ids.append(candidate)
+
+        return numpy.array(new_ids, dtype="int64")
+
+
+class FeistelPermutation:
+    """
+    Keyed pseudo-random permutation of the integers [0, size).
+
+    A balanced Feistel network over the smallest even number of bits
+    covering `size`, with cycle-walking to stay inside the range.
+    Evaluating it needs no table, so memory is constant however large
+    `size` is.
+
+    ...
+
+    Methods
+    -------
+    permute(indices)
+        Maps each index in [0, size) to its position in the permutation.
+    """
+
+    __NUM_ROUNDS = 4
+
+    def __init__(self, size: int, rng: Optional[numpy.random.Generator] = None) -> None:
+        if not isinstance(size, int) or size <= 0:
+            raise TypeError("Input 'size' is not a positive int.")
+
+        rng = rng or numpy.random.default_rng()
+        half_bits = max(1, ((size - 1).bit_length() + 1) // 2)
+        self.__size = size
+        self.__half_bits = numpy.uint64(half_bits)
+        self.__half_mask = numpy.uint64((1 << half_bits) - 1)
+        self.__keys = rng.integers(
+            0, 2**63, size=FeistelPermutation.__NUM_ROUNDS, dtype="uint64"
+        )
+
+    @property
+    def size(self) -> int:
+        """Number of elements being permuted."""
+        return self.__size
+
+    def permute(self, indices: numpy.ndarray) -> numpy.ndarray:
+        """Maps each index in [0, size) to its permuted value.
+
+        Parameters
+        ----------
+        indices : numpy array of ints
+
+        Returns
+        -------
+        numpy array of int64
+        """
+        values = numpy.asarray(indices, dtype="uint64")
+        values = self.__encrypt(values)
+        outside = values >= self.__size
+
+        # Cycle-walk: values that land outside [0, size) are permuted
+        # again until they come back inside.
+        while outside.any():
+            values[outside] = self.__encrypt(values[outside])
+            outside = values >= self.__size
+
+        return values.astype("int64")
+
+    def __encrypt(self, values: numpy.ndarray) -> numpy.ndarray:
+        left = values >> self.__half_bits
+        right = values & self.__half_mask
+
+        for key in self.__keys:
+            left, right = right, left ^ self.__round(right, key)
+
+        return (left << self.__half_bits) | right
+
+    def __round(self, values: numpy.ndarray, key: numpy.uint64) -> numpy.ndarray:
+        # SplitMix64-style mixing of the half-block with the round key.
+        with numpy.errstate(over="ignore"):
+            mixed = (values + key) * numpy.uint64(0x9E3779B97F4A7C15)
+            mixed ^= mixed >> numpy.uint64(31)
+            mixed *= numpy.uint64(0xBF58476D1CE4E5B9)
+            mixed ^= mixed >> numpy.uint64(29)
+
+        return mixed & self.__half_mask
+
+
+class PermutationIdAllocator(IdAllocator):
+    """
+    Walks a Feistel permutation of the id range with a counter.
+
+    The n-th id handed out is min_id + permutation(n), so every id costs
+    O(1) time and the allocator's memory stays constant as the range grows.
+    """
+
+    def __init__(
+        self,
+        min_id: int,
+        max_id: int,
+        rng: Optional[numpy.random.Generator] = None,
+    ) -> None:
+        super().__init__(min_id=min_id, max_id=max_id)
+        self.__permutation = FeistelPermutation(size=max_id - min_id + 1, rng=rng)
+
+    def _allocate(self, count: int) -> numpy.ndarray:
+        start = self.num_allocated
+        positions = numpy.arange(start, start + count, dtype="uint64")
+        return self.min_id + self.__permutation.permute(positions)
+
+
+if __name__ == "__main__":
+    pass
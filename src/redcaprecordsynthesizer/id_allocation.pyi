@@ -0,0 +1,44 @@
+from abc import ABC, abstractmethod
+from typing import Optional, Tuple
+
+import numpy
+
+def id_range_for_width(width: int) -> Tuple[int, int]: ...
+def partition_id_range(
+    id_range: Tuple[int, int], node_id: int, shard_count: int
+) -> Tuple[int, int]: ...
+
+class IdAllocator(ABC):
+    def __init__(self, min_id: int, max_id: int) -> None: ...
+    @property
+    def min_id(self) -> int: ...
+    @property
+    def max_id(self) -> int: ...
+    @property
+    def num_allocated(self) -> int: ...
+    @property
+    def num_remaining(self) -> int: ...
+    def allocate(self) -> int: ...
+    def allocate_many(self, count: int) -> numpy.ndarray: ...
+    @abstractmethod
+    def _allocate(self, count: int) -> numpy.ndarray: ...
+
+class SetIdAllocator(IdAllocator):
+    def __init__(
+        self, min_id: int, max_id: int, rng: Optional[numpy.random.Generator] = ...
+    ) -> None: ...
+    def _allocate(self, count: int) -> numpy.ndarray: ...
+
+class FeistelPermutation:
+    def __init__(
+        self, size: int, rng: Optional[numpy.random.Generator] = ...
+    ) -> None: ...
+    @property
+    def size(self) -> int: ...
+    def permute(self, indices: numpy.ndarray) -> numpy.ndarray: ...
+
+class PermutationIdAllocator(IdAllocator):
+    def __init__(
+        self, min_id: int, max_id: int, rng: Optional[numpy.random.Generator] = ...
+    ) -> None: ...
+    def _allocate(self, count: int) -> numpy.ndarray: ...
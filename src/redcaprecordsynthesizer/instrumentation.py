@@ -0,0 +1,179 @@
+"""
+Module: contains class Instrumentation, which FakeRecordGenerator can
+report its per-phase wall time, CPU time, call counts and (optionally)
+peak traced memory to.
+"""
+
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, NamedTuple
+
+import pandas  # type: ignore[import]
+
+
+class PhaseStatistics(NamedTuple):
+    """
+    Totals for one phase.
+
+    ...
+
+    Attributes
+    ----------
+    calls : int
+        Times the phase ran.
+    wall_seconds : float
+        Total elapsed time.
+    cpu_seconds : float
+        Total CPU time of this process (not of any worker processes).
+    peak_memory_mb : float
+        Largest peak of memory traced by tracemalloc during any one call,
+        above what was allocated when it began; 0 unless tracing memory.
+    """
+
+    calls: int
+    wall_seconds: float
+    cpu_seconds: float
+    peak_memory_mb: float
+
+
+class Instrumentation:
+    """
+    Collects statistics for named phases, like "base records" or "nicknames".
+
+    Pass one to FakeRecordGenerator.create_fake_records (or iter_fake_records)
+    and read its statistics afterwards; it keeps adding up over several runs.
+    Phases nest, so a phase's time includes that of the phases inside it.
+
+    ...
+
+    Attributes
+    ----------
+    statistics : dict of str to PhaseStatistics
+        In the order the phases first ran.
+
+    Methods
+    -------
+    measure(phase)
+        Context manager timing one run of the phase.
+    to_frame()
+        Returns the statistics as a DataFrame, one row per phase.
+    """
+
+    def __init__(self, trace_memory: bool = False) -> None:
+        """Constructs an empty set of statistics.
+
+        Parameters
+        ----------
+        trace_memory : bool
+            Optional. Also measure each phase's peak memory with tracemalloc,
+            which slows Python allocations down considerably. Default: False
+
+        Raises
+        ------
+        TypeError
+            If trace_memory is not a bool.
+        """
+        if not isinstance(trace_memory, bool):
+            raise TypeError("Input 'trace_memory' is not a bool.")
+
+        self.__trace_memory = trace_memory
+        self.__totals: Dict[str, List[float]] = {}
+
+        # Peaks of the phases now running, outermost first, so that a
+        # nested phase resetting tracemalloc's peak doesn't lose theirs.
+        self.__open_peaks: List[int] = []
+        self.__started_tracing = False
+
+    @property
+    def statistics(self) -> Dict[str, PhaseStatistics]:
+        """Statistics of each phase measured so far."""
+        return {
+            phase: PhaseStatistics(
+                calls=int(totals[0]),
+                wall_seconds=totals[1],
+                cpu_seconds=totals[2],
+                peak_memory_mb=totals[3] / 1024**2,
+            )
+            for phase, totals in self.__totals.items()
+        }
+
+    @contextmanager
+    def measure(self, phase: str) -> Iterator[None]:
+        """Times one run of a phase.
+
+        Parameters
+        ----------
+        phase : str
+            Name of the phase.
+        """
+        start_memory = self.__start_tracing()
+        start_wall_time = time.perf_counter()
+        start_cpu_time = time.process_time()
+
+        try:
+            yield
+        finally:
+            wall_seconds = time.perf_counter() - start_wall_time
+            cpu_seconds = time.process_time() - start_cpu_time
+            peak_memory = self.__stop_tracing(start_memory=start_memory)
+            totals = self.__totals.setdefault(phase, [0, 0.0, 0.0, 0])
+            totals[0] += 1
+            totals[1] += wall_seconds
+            totals[2] += cpu_seconds
+            totals[3] = max(totals[3], peak_memory)
+
+    def to_frame(self) -> pandas.DataFrame:
+        """Returns the statistics as a DataFrame indexed by phase.
+
+        Returns
+        -------
+        pandas DataFrame
+            Columns calls, wall_seconds, cpu_seconds & peak_memory_mb.
+        """
+        statistics = self.statistics
+        return pandas.DataFrame(
+            list(statistics.values()),
+            index=pandas.Index(list(statistics), name="phase"),
+            columns=list(PhaseStatistics._fields),
+        )
+
+    def __start_tracing(self) -> int:
+        if not self.__trace_memory:
+            return 0
+
+        if not self.__open_peaks:
+            self.__started_tracing = not tracemalloc.is_tracing()
+
+            if self.__started_tracing:
+                tracemalloc.start()
+
+        current_memory, peak_memory = tracemalloc.get_traced_memory()
+
+        if self.__open_peaks:
+            self.__open_peaks[-1] = max(self.__open_peaks[-1], peak_memory)
+
+        # (Before Python 3.9, peaks can't be reset, so a phase may be
+        # charged with an earlier, larger peak.)
+        if hasattr(tracemalloc, "reset_peak"):
+            tracemalloc.reset_peak()
+
+        self.__open_peaks.append(current_memory)
+        return current_memory
+
+    def __stop_tracing(self, start_memory: int) -> int:
+        if not self.__trace_memory:
+            return 0
+
+        peak_memory = max(self.__open_peaks.pop(), tracemalloc.get_traced_memory()[1])
+
+        if self.__open_peaks:
+            self.__open_peaks[-1] = max(self.__open_peaks[-1], peak_memory)
+        elif self.__started_tracing:
+            tracemalloc.stop()
+
+        return peak_memory - start_memory
+
+
+if __name__ == "__main__":
+    pass
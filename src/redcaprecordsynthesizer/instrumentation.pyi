@@ -0,0 +1,22 @@
+from typing import ContextManager, Dict, NamedTuple
+
+import pandas
+
+class PhaseStatistics(NamedTuple):
+    calls: int
+    wall_seconds: float
+    cpu_seconds: float
+    peak_memory_mb: float
+
+class Instrumentation:
+    def __init__(self, trace_memory: bool = ...) -> None:
+        self.__trace_memory = None
+        self.__totals = None
+        self.__open_peaks = None
+        self.__started_tracing = None
+        ...
+
+    @property
+    def statistics(self) -> Dict[str, PhaseStatistics]: ...
+    def measure(self, phase: str) -> ContextManager[None]: ...
+    def to_frame(self) -> pandas.DataFrame: ...
@@ -1,5 +1,5 @@
-"""
-REDCap Record Synthesizer
-
-Class NicknameGenerator, which lets us translate "Robert" to "Bob", etc.
-"""
+"""
+REDCap Record Synthesizer
+
+Class NicknameGenerator, which lets us translate "Robert" to "Bob", etc.
+"""
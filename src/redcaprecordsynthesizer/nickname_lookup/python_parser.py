@@ -1,117 +1,495 @@
-"""
-Module: contains class NicknameGenerator, which parses "Robert" into "Bob", "Bobby" etc.
-
-https://github.com/carltonnorthern/nickname-and-diminutive-names-lookup
-"""
-
-import collections
-import csv
-import os
-from importlib import resources
-from typing import Optional, Union
-
-
-# pylint: disable=too-few-public-methods
-class NicknameGenerator:
-    """
-    Class that converts names to nicknames.
-
-    ...
-
-    Methods
-    -------
-    get(name, default=None):
-        Returns the nickname for a given name.
-        If not found, returns the specified default value.
-    """
-
-    def __init__(self, filename: str = None) -> None:
-        """Constructs object by preloading the names.csv file.
-
-        Parameters
-        ----------
-        filename : str
-            Name of the .csv file containing the nicknames dictionary.
-
-        Raises
-        ------
-            FileNotFoundError
-                If unable to find the filename specified.
-        """
-        default_filename = NicknameGenerator.__names_file()
-        filename = filename or default_filename
-        self.__names = collections.defaultdict(list)
-
-        with open(filename, encoding="utf-8") as names_csv_file:
-            reader = csv.reader(names_csv_file)
-
-            for line in reader:
-                matches = set(line)
-
-                for match in matches:
-                    self.__names[match].append(matches)
-
-    def get(
-        self, name: str, default: Optional[str] = None
-    ) -> Union[Optional[str], Optional[list]]:
-        """Translates the name provided into its nicknames, if available.
-
-        Parameters
-        ----------
-        name : str
-            Name to translate.
-        default : str
-            What to return if name not found.
-
-        Returns
-        -------
-        str or None
-        """
-        try:
-            name = name.lower()
-        except (AttributeError, NameError):
-            return None
-
-        if name in self.__names:
-            this_dict = self.__names[name]
-            names: list = list(set().union(*this_dict))  # type: ignore[arg-type]
-
-            if name in names:
-                names.remove(name)
-
-            return names
-
-        return default
-
-    @staticmethod
-    def __names_file() -> str:
-        """Gets the 'names.csv' file that is expected to accompany this module.
-
-        Returns
-        -------
-        default_filename : str
-
-        Raises
-        ------
-            RuntimeError
-                If 'names.csv' file not found in expected location.
-        """
-        with resources.path(
-            "redcaprecordsynthesizer.nickname_lookup.data", "names.csv"
-        ) as csv_path:
-            default_filename = str(csv_path)
-
-            if (
-                default_filename is None
-                or not isinstance(default_filename, str)
-                or not os.path.exists(default_filename)
-            ):
-                raise RuntimeError(
-                    f"Unable to find file '{default_filename}'."
-                )  # pragma: no cover
-
-        return default_filename
-
-
-if __name__ == "__main__":
-    pass
+"""
+Module: contains class NicknameGenerator, which parses "Robert" into "Bob", "Bobby" etc.
+
+https://github.com/carltonnorthern/nickname-and-diminutive-names-lookup
+"""
+
+import collections
+import csv
+import hashlib
+import io
+import os
+import pickle
+import threading
+from importlib import resources
+from types import MappingProxyType
+from typing import (
+    Dict,
+    FrozenSet,
+    Iterable,
+    List,
+    Mapping,
+    NamedTuple,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
+
+import numpy
+import pandas  # type: ignore[import]
+
+
+class _NicknameTable(NamedTuple):
+    """Both directions of one parsed names.csv file."""
+
+    nicknames: Mapping[str, tuple]
+    group_ids: Mapping[str, FrozenSet[int]]
+    canonical_names: Tuple[str, ...]
+
+
+# Nickname tables already loaded by this process, keyed by absolute file name,
+# modification time & size. They're read-only, so every NicknameGenerator
+# (and every create_fake_records call) shares one instead of re-reading
+# names.csv.
+_nickname_tables: Dict[Tuple[str, int, int], _NicknameTable] = {}
+_nickname_tables_lock = threading.Lock()
+
+# Keys of the tables whose cache file this process has read or written,
+# so a table first loaded without use_cache_file still gets its cache file.
+_cache_file_keys: Set[Tuple[str, int, int]] = set()
+
+
+# pylint: disable=too-few-public-methods
+class NicknameGenerator:
+    """
+    Class that converts names to nicknames, and nicknames back to names.
+
+    Each line of names.csv is a canonical name followed by its nicknames;
+    each distinct canonical name is a group, numbered in file order.
+    A name may belong to several groups ("Ron" is short for Aaron, Cameron,
+    Ronald & Veronica).
+
+    ...
+
+    Attributes
+    ----------
+    canonical_names : tuple of str
+        The canonical name of each group, indexed by group id.
+
+    Methods
+    -------
+    get(name, default=None):
+        Returns the nickname for a given name.
+        If not found, returns the specified default value.
+    get_many(names, default=()):
+        Returns the nicknames for each of a whole column of names.
+    substitute(names, probability=1.0, rng=None):
+        Swaps a random nickname in for some of a column of names.
+    group_ids(name):
+        Returns the ids of the groups a name belongs to.
+    same_group(name, other_name):
+        Tells whether two names share a group.
+    group_id_column(names):
+        Returns one group id per name, as an integer column for joins.
+    """
+
+    def __init__(self, filename: str = None, use_cache_file: bool = False) -> None:
+        """Constructs object by preloading the names.csv file.
+
+        The file is parsed only the first time it's used in this process;
+        later objects share the same read-only table.
+
+        Parameters
+        ----------
+        filename : str
+            Name of the .csv file containing the nicknames dictionary.
+        use_cache_file : bool
+            Optional. Keep a pickled copy of the parsed table next to the
+            .csv file (as <filename>.pickle) and load that instead of parsing,
+            as long as the .csv file's hash hasn't changed. The copy is
+            written even if this process had already loaded the table
+            without it. Default: False
+
+        Raises
+        ------
+            FileNotFoundError
+                If unable to find the filename specified.
+        """
+        default_filename = NicknameGenerator.__names_file()
+        filename = os.path.abspath(filename or default_filename)
+
+        file_status = os.stat(filename)
+
+        # A file edited since it was loaded is loaded again.
+        table_key = (filename, file_status.st_mtime_ns, file_status.st_size)
+
+        with _nickname_tables_lock:
+            cached_table: Optional[_NicknameTable] = _nickname_tables.get(table_key)
+
+            if cached_table is None:
+                table = NicknameGenerator.__load(
+                    filename=filename, use_cache_file=use_cache_file
+                )
+                _nickname_tables[table_key] = table
+            else:
+                table = cached_table
+
+                if use_cache_file and table_key not in _cache_file_keys:
+                    NicknameGenerator.__save(filename=filename, table=table)
+
+            if use_cache_file:
+                _cache_file_keys.add(table_key)
+
+        self.__nicknames = table.nicknames
+        self.__group_ids = table.group_ids
+        self.__canonical_names = table.canonical_names
+
+    @property
+    def canonical_names(self) -> Tuple[str, ...]:
+        """Canonical name of each group, indexed by group id."""
+        return self.__canonical_names
+
+    def get(
+        self, name: str, default: Optional[str] = None
+    ) -> Union[Optional[str], Optional[list]]:
+        """Translates the name provided into its nicknames, if available.
+
+        Parameters
+        ----------
+        name : str
+            Name to translate.
+        default : str
+            What to return if name not found.
+
+        Returns
+        -------
+        str or None
+        """
+        try:
+            name = name.lower()
+        except (AttributeError, NameError):
+            return None
+
+        nicknames = self.__nicknames.get(name)
+
+        if nicknames is None:
+            return default
+
+        return list(nicknames)
+
+    def get_many(self, names: Iterable, default: tuple = ()) -> List[tuple]:
+        """Translates a whole column of names into their nicknames.
+
+        Parameters
+        ----------
+        names : iterable of str
+            Names to translate, like a pandas Series.
+        default : tuple
+            What to return for names not found.
+
+        Returns
+        -------
+        list of tuples
+            The nicknames of each name, in the same order as names.
+        """
+        nicknames = self.__nicknames
+        return [
+            nicknames.get(name.lower(), default) if isinstance(name, str) else default
+            for name in names
+        ]
+
+    def substitute(
+        self,
+        names: pandas.Series,
+        probability: float = 1.0,
+        rng: Optional[numpy.random.Generator] = None,
+    ) -> pandas.Series:
+        """Replaces names, each with the given probability,
+        by one of their nicknames (title-cased) chosen at random.
+
+        Each distinct name is looked up only once; the rows then gather
+        their nicknames from one flat array by index, so the cost per row
+        is a few numpy operations rather than a Python call.
+
+        Parameters
+        ----------
+        names : pandas Series
+            Names like "Robert". Names without nicknames are left as they are.
+        probability : float
+            Optional. Chance of replacing each name. Default: 1.0
+        rng : numpy Generator
+            Optional. Source of the random choices. Default: a fresh generator
+
+        Returns
+        -------
+        pandas Series
+            A copy of names, with the same index.
+
+        Raises
+        ------
+        TypeError
+            If names is not a pandas Series or probability is not in [0, 1].
+        """
+        if not isinstance(names, pandas.Series):
+            raise TypeError("Input 'names' is not a pandas Series.")
+
+        if (
+            not isinstance(probability, (int, float))
+            or isinstance(probability, bool)
+            or not 0 <= probability <= 1
+        ):
+            raise TypeError("Input 'probability' is not a number in [0, 1].")
+
+        rng = rng or numpy.random.default_rng()
+        substituted_names = names.copy()
+        use_nickname = numpy.flatnonzero(rng.random(len(names)) < probability)
+        name_codes, unique_names = pandas.factorize(names.iloc[use_nickname])
+        nicknames = self.get_many(names=unique_names)
+        num_nicknames = numpy.array(
+            [len(name_nicknames) for name_nicknames in nicknames], dtype="int64"
+        )
+        offsets = numpy.cumsum(num_nicknames) - num_nicknames
+        all_nicknames = numpy.array(
+            [
+                nickname.title()
+                for name_nicknames in nicknames
+                for nickname in name_nicknames
+            ],
+            dtype=object,
+        )
+
+        # Missing names have code -1, which picks the trailing 0: no nicknames.
+        # (This also holds when every name is missing & there are no codes.)
+        num_choices = numpy.append(num_nicknames, 0)[name_codes]
+        has_nickname = num_choices > 0
+        choices = (rng.random(len(name_codes)) * num_choices).astype("int64")
+        substituted_names.iloc[use_nickname[has_nickname]] = all_nicknames[
+            offsets[name_codes[has_nickname]] + choices[has_nickname]
+        ]
+        return substituted_names
+
+    def group_ids(self, name: str) -> FrozenSet[int]:
+        """Finds the groups a name belongs to, as canonical name or nickname.
+
+        Parameters
+        ----------
+        name : str
+            Name like "Ron".
+
+        Returns
+        -------
+        frozenset of int
+            Group ids; empty if the name isn't known.
+        """
+        if not isinstance(name, str):
+            return frozenset()
+
+        return self.__group_ids.get(name.lower(), frozenset())
+
+    def same_group(self, name: str, other_name: str) -> bool:
+        """Tells whether two names could be the same person's,
+        like "Bob" & "Robert" or "Ron" & "Aaron".
+
+        Parameters
+        ----------
+        name : str
+        other_name : str
+
+        Returns
+        -------
+        bool
+        """
+        return not self.group_ids(name).isdisjoint(self.group_ids(other_name))
+
+    def group_id_column(self, names: pandas.Series) -> pandas.Series:
+        """Maps each name to one group id, for joining on an integer column.
+
+        A name that is itself a canonical name maps to its own group;
+        any other name in several groups maps to the lowest of their ids.
+        Use group_ids() or same_group() where that ambiguity matters.
+
+        Parameters
+        ----------
+        names : pandas Series
+
+        Returns
+        -------
+        pandas Series of Int64
+            Same index as names; <NA> for names not in any group.
+
+        Raises
+        ------
+        TypeError
+            If names is not a pandas Series.
+        """
+        if not isinstance(names, pandas.Series):
+            raise TypeError("Input 'names' is not a pandas Series.")
+
+        # Look up each distinct name once, then gather by code.
+        name_codes, unique_names = pandas.factorize(names)
+        unique_group_ids = numpy.array(
+            [self.__primary_group_id(name=name) for name in unique_names],
+            dtype="int64",
+        )
+        group_ids = numpy.full(len(names), -1, dtype="int64")
+        group_ids[name_codes >= 0] = unique_group_ids[name_codes[name_codes >= 0]]
+        group_id_column = pandas.Series(
+            group_ids, index=names.index, name=names.name, dtype="Int64"
+        )
+        return group_id_column.mask(group_ids < 0)
+
+    def __primary_group_id(self, name: str) -> int:
+        group_ids = self.group_ids(name)
+
+        if len(group_ids) == 0:
+            return -1
+
+        for group_id in group_ids:
+            if self.__canonical_names[group_id] == name.lower():
+                return group_id
+
+        return min(group_ids)
+
+    @staticmethod
+    def __load(filename: str, use_cache_file: bool) -> _NicknameTable:
+        """Reads the nickname table from the cache file if it's current,
+        else parses the .csv file (and, if asked, refreshes the cache file).
+
+        Parameters
+        ----------
+        filename : str
+        use_cache_file : bool
+
+        Returns
+        -------
+        _NicknameTable
+        """
+        with open(filename, "rb") as names_csv_file:
+            contents = names_csv_file.read()
+
+        csv_hash = hashlib.sha256(contents).hexdigest()
+        cache_filename = filename + ".pickle"
+
+        if use_cache_file:
+            try:
+                with open(cache_filename, "rb") as cache_file:
+                    cache = pickle.load(cache_file)
+
+                if cache["sha256"] == csv_hash:
+                    return NicknameGenerator.__freeze(
+                        nicknames=cache["nicknames"],
+                        group_ids=cache["group_ids"],
+                        canonical_names=cache["canonical_names"],
+                    )
+            except (OSError, pickle.UnpicklingError, EOFError, KeyError, TypeError):
+                pass  # Missing, stale or unreadable; rebuild it.
+
+        names = collections.defaultdict(set)
+        group_ids: Dict[str, set] = collections.defaultdict(set)
+        canonical_group_ids: Dict[str, int] = {}
+        reader = csv.reader(io.StringIO(contents.decode("utf-8")))
+
+        for line in reader:
+            if len(line) == 0:
+                continue
+
+            matches = set(line)
+
+            # Lines starting with the same canonical name are one group.
+            group_id = canonical_group_ids.setdefault(line[0], len(canonical_group_ids))
+
+            for match in matches:
+                names[match].update(matches)
+                group_ids[match].add(group_id)
+
+        # Precompute each name's nicknames (every name it shares a line with),
+        # so that lookups are a single dict access.
+        nicknames = {
+            name: tuple(sorted(matches - {name})) for name, matches in names.items()
+        }
+
+        table = NicknameGenerator.__freeze(
+            nicknames=nicknames,
+            group_ids=group_ids,
+            canonical_names=tuple(canonical_group_ids),
+        )
+
+        if use_cache_file:
+            NicknameGenerator.__save(filename=filename, table=table, csv_hash=csv_hash)
+
+        return table
+
+    @staticmethod
+    def __save(
+        filename: str, table: _NicknameTable, csv_hash: Optional[str] = None
+    ) -> None:
+        """Writes the table's cache file, tagged with the .csv file's hash.
+
+        Parameters
+        ----------
+        filename : str
+        table : _NicknameTable
+        csv_hash : str
+            Optional. SHA-256 of the .csv file. Default: None (hash it now)
+        """
+        cache_filename = filename + ".pickle"
+
+        try:
+            if csv_hash is None:
+                with open(filename, "rb") as names_csv_file:
+                    csv_hash = hashlib.sha256(names_csv_file.read()).hexdigest()
+
+            temporary_filename = f"{cache_filename}.{os.getpid()}.tmp"
+
+            with open(temporary_filename, "wb") as cache_file:
+                pickle.dump(
+                    {
+                        "sha256": csv_hash,
+                        "nicknames": dict(table.nicknames),
+                        "group_ids": dict(table.group_ids),
+                        "canonical_names": table.canonical_names,
+                    },
+                    cache_file,
+                )
+
+            os.replace(temporary_filename, cache_filename)
+        except OSError:
+            pass  # Read-only location; just go without the cache file.
+
+    @staticmethod
+    def __freeze(
+        nicknames: Mapping[str, tuple],
+        group_ids: Mapping[str, Iterable[int]],
+        canonical_names: Tuple[str, ...],
+    ) -> _NicknameTable:
+        return _NicknameTable(
+            nicknames=MappingProxyType(dict(nicknames)),
+            group_ids=MappingProxyType(
+                {name: frozenset(ids) for name, ids in group_ids.items()}
+            ),
+            canonical_names=tuple(canonical_names),
+        )
+
+    @staticmethod
+    def __names_file() -> str:
+        """Gets the 'names.csv' file that is expected to accompany this module.
+
+        Returns
+        -------
+        default_filename : str
+
+        Raises
+        ------
+            RuntimeError
+                If 'names.csv' file not found in expected location.
+        """
+        with resources.path(
+            "redcaprecordsynthesizer.nickname_lookup.data", "names.csv"
+        ) as csv_path:
+            default_filename = str(csv_path)
+
+            if (
+                default_filename is None
+                or not isinstance(default_filename, str)
+                or not os.path.exists(default_filename)
+            ):
+                raise RuntimeError(
+                    f"Unable to find file '{default_filename}'."
+                )  # pragma: no cover
+
+        return default_filename
+
+
+if __name__ == "__main__":
+    pass
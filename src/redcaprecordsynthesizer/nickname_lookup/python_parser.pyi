@@ -1,14 +1,30 @@
-from typing import Optional, Union
-
-class NicknameGenerator:
-    def __init__(self, filename: str = ...) -> None:
-        self.__names = None
-        self.__names_dict = None
-        ...
-
-    def get(
-        self, name: str, default: Optional[str] = ...
-    ) -> Union[Optional[str], Optional[list]]: ...
-    @classmethod
-    def __names_file(cls):
-        pass
+from typing import FrozenSet, Iterable, List, Optional, Tuple, Union
+
+import numpy
+import pandas
+
+class NicknameGenerator:
+    def __init__(self, filename: str = ..., use_cache_file: bool = ...) -> None:
+        self.__nicknames = None
+        self.__group_ids = None
+        self.__canonical_names = None
+        ...
+
+    @property
+    def canonical_names(self) -> Tuple[str, ...]: ...
+    def get(
+        self, name: str, default: Optional[str] = ...
+    ) -> Union[Optional[str], Optional[list]]: ...
+    def get_many(self, names: Iterable, default: tuple = ...) -> List[tuple]: ...
+    def substitute(
+        self,
+        names: pandas.Series,
+        probability: float = ...,
+        rng: Optional[numpy.random.Generator] = ...,
+    ) -> pandas.Series: ...
+    def group_ids(self, name: str) -> FrozenSet[int]: ...
+    def same_group(self, name: str, other_name: str) -> bool: ...
+    def group_id_column(self, names: pandas.Series) -> pandas.Series: ...
+    @classmethod
+    def __names_file(cls):
+        pass
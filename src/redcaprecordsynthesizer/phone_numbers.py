@@ -0,0 +1,154 @@
+"""
+Module: contains class PhoneNumberGenerator, which synthesizes
+a whole column of US phone numbers at once.
+"""
+
+import string
+from typing import Iterable, List, Optional, Tuple
+
+import numpy
+
+# Faker's en_US formats, without the ones having extensions.
+US_PHONE_NUMBER_FORMATS = (
+    "{area}-{exchange}-{line}",
+    "({area}){exchange}-{line}",
+    "({area}) {exchange}-{line}",
+    "{area}.{exchange}.{line}",
+    "+1-{area}-{exchange}-{line}",
+    "001-{area}-{exchange}-{line}",
+)
+
+# The fields a format may use.
+PHONE_NUMBER_FIELDS = ("area", "exchange", "line")
+
+
+class PhoneNumberGenerator:
+    """
+    Synthesizes US phone numbers from a set of formats.
+
+    Each format is a str.format pattern using the fields {area} (three-digit
+    area code), {exchange} (three-digit exchange) and {line} (four-digit
+    line number), like "({area}) {exchange}-{line}". Area codes & exchanges
+    never start with 0 or 1, as in the North American Numbering Plan.
+
+    ...
+
+    Attributes
+    ----------
+    formats : tuple of str
+
+    Methods
+    -------
+    create(count, rng=None)
+        Returns count phone numbers, each in a randomly chosen format.
+    """
+
+    def __init__(self, formats: Optional[Iterable[str]] = None) -> None:
+        """Parses the formats.
+
+        Parameters
+        ----------
+        formats : iterable of str
+            Optional. Default: US_PHONE_NUMBER_FORMATS
+
+        Raises
+        ------
+        TypeError
+            If formats isn't a non-empty collection of valid format strings.
+        """
+        formats = tuple(US_PHONE_NUMBER_FORMATS if formats is None else formats)
+
+        if len(formats) == 0:
+            raise TypeError("Input 'formats' is empty.")
+
+        self.__formats = formats
+        self.__parsed_formats = [
+            PhoneNumberGenerator.__parse(phone_number_format=phone_number_format)
+            for phone_number_format in formats
+        ]
+
+    @property
+    def formats(self) -> Tuple[str, ...]:
+        """Formats the phone numbers are drawn in."""
+        return self.__formats
+
+    def create(
+        self, count: int, rng: Optional[numpy.random.Generator] = None
+    ) -> numpy.ndarray:
+        """Synthesizes phone numbers, each in a randomly chosen format.
+
+        Parameters
+        ----------
+        count : int
+            Number of phone numbers wanted.
+        rng : numpy Generator
+            Optional. Source of the random digits. Default: a fresh generator
+
+        Returns
+        -------
+        numpy array of str (object dtype)
+
+        Raises
+        ------
+        TypeError
+            If count is not a non-negative int.
+        """
+        if not isinstance(count, (int, numpy.integer)) or count < 0:
+            raise TypeError("Input 'count' is not a non-negative int.")
+
+        rng = rng or numpy.random.default_rng()
+        fields = {
+            "area": rng.integers(200, 1000, size=count).astype("U3"),
+            "exchange": rng.integers(200, 1000, size=count).astype("U3"),
+            "line": numpy.char.zfill(
+                rng.integers(0, 10000, size=count).astype("U4"), 4
+            ),
+        }
+        format_choices = rng.integers(0, len(self.__parsed_formats), size=count)
+        phone_numbers = numpy.empty(count, dtype=object)
+
+        # Assemble each format's numbers piece by piece, a column at a time.
+        for format_index, parsed_format in enumerate(self.__parsed_formats):
+            rows = format_choices == format_index
+            formatted = numpy.full(int(rows.sum()), "", dtype="U1")
+
+            for literal_text, field_name in parsed_format:
+                formatted = numpy.char.add(formatted, literal_text)
+
+                if field_name is not None:
+                    formatted = numpy.char.add(formatted, fields[field_name][rows])
+
+            phone_numbers[rows] = formatted
+
+        return phone_numbers
+
+    @staticmethod
+    def __parse(phone_number_format: str) -> List[Tuple[str, Optional[str]]]:
+        """Splits a format into (literal text, field name or None) pairs."""
+        if not isinstance(phone_number_format, str):
+            raise TypeError("Input 'formats' must contain only str.")
+
+        try:
+            parsed_format = [
+                (literal_text, field_name)
+                for literal_text, field_name, _, _ in string.Formatter().parse(
+                    phone_number_format
+                )
+            ]
+        except ValueError as error:
+            raise TypeError(
+                f"Phone number format '{phone_number_format}' is malformed."
+            ) from error
+
+        for _, field_name in parsed_format:
+            if field_name is not None and field_name not in PHONE_NUMBER_FIELDS:
+                raise TypeError(
+                    f"Phone number format '{phone_number_format}' uses unknown "
+                    f"field '{field_name}'; use {', '.join(PHONE_NUMBER_FIELDS)}."
+                )
+
+        return parsed_format
+
+
+if __name__ == "__main__":
+    pass
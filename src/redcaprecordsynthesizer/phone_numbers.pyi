@@ -0,0 +1,18 @@
+from typing import Iterable, Optional, Tuple
+
+import numpy
+
+US_PHONE_NUMBER_FORMATS: Tuple[str, ...]
+PHONE_NUMBER_FIELDS: Tuple[str, ...]
+
+class PhoneNumberGenerator:
+    def __init__(self, formats: Optional[Iterable[str]] = ...) -> None:
+        self.__formats = None
+        self.__parsed_formats = None
+        ...
+
+    @property
+    def formats(self) -> Tuple[str, ...]: ...
+    def create(
+        self, count: int, rng: Optional[numpy.random.Generator] = ...
+    ) -> numpy.ndarray: ...
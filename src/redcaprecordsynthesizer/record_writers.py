@@ -0,0 +1,268 @@
+"""
+Module: contains classes that write synthetic records to disk chunk by chunk,
+so that a whole dataset never has to be held (or serialized) in memory.
+"""
+
+import os
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Iterable, NamedTuple, Optional, TextIO, Union
+
+import pandas  # type: ignore[import]
+
+from redcaprecordsynthesizer.fake_records import RECORD_DTYPES
+
+
+class WriteStatistics(NamedTuple):
+    """
+    How much a RecordWriter wrote, and how fast.
+
+    ...
+
+    Attributes
+    ----------
+    num_records : int
+        Rows written.
+    num_chunks : int
+        DataFrames written.
+    elapsed_seconds : float
+        Wall time from the first request for a chunk to closing the file,
+        including the time spent synthesizing the chunks.
+    write_seconds : float
+        Wall time spent serializing & writing only.
+    """
+
+    num_records: int
+    num_chunks: int
+    elapsed_seconds: float
+    write_seconds: float
+
+    @property
+    def records_per_second(self) -> float:
+        """End-to-end throughput (synthesis + writing)."""
+        return self.num_records / self.elapsed_seconds if self.elapsed_seconds else 0.0
+
+    @property
+    def write_records_per_second(self) -> float:
+        """Sustained write throughput."""
+        return self.num_records / self.write_seconds if self.write_seconds else 0.0
+
+
+class RecordWriter(ABC):
+    """
+    Writes a stream of record DataFrames to one file.
+
+    Subclasses implement _open(), _write_chunk() and _close().
+
+    ...
+
+    Attributes
+    ----------
+    path : str
+
+    Methods
+    -------
+    write(chunks)
+        Writes each DataFrame in turn and returns WriteStatistics.
+    """
+
+    def __init__(self, path: Union[str, os.PathLike]) -> None:
+        if not isinstance(path, (str, os.PathLike)):
+            raise TypeError("Input 'path' is not a str or path.")
+
+        self.__path = os.fspath(path)
+
+    @property
+    def path(self) -> str:
+        """File being written."""
+        return self.__path
+
+    def write(
+        self, chunks: Union[pandas.DataFrame, Iterable[pandas.DataFrame]]
+    ) -> WriteStatistics:
+        """Writes the records, one chunk at a time.
+
+        Parameters
+        ----------
+        chunks : pandas DataFrame or iterable of DataFrames
+            Like the output of FakeRecordGenerator.iter_fake_records.
+
+        Returns
+        -------
+        WriteStatistics
+        """
+        if isinstance(chunks, pandas.DataFrame):
+            chunks = [chunks]
+
+        num_records = 0
+        num_chunks = 0
+        write_seconds = 0.0
+        start_time = time.perf_counter()
+        self._open()
+
+        try:
+            for chunk in chunks:
+                write_start_time = time.perf_counter()
+                self._write_chunk(chunk=chunk, first_chunk=num_chunks == 0)
+                write_seconds += time.perf_counter() - write_start_time
+                num_records += len(chunk)
+                num_chunks += 1
+        finally:
+            self._close()
+
+        return WriteStatistics(
+            num_records=num_records,
+            num_chunks=num_chunks,
+            elapsed_seconds=time.perf_counter() - start_time,
+            write_seconds=write_seconds,
+        )
+
+    @abstractmethod
+    def _open(self) -> None:
+        """Prepares the file for writing."""
+
+    @abstractmethod
+    def _write_chunk(self, chunk: pandas.DataFrame, first_chunk: bool) -> None:
+        """Appends one chunk; the first chunk may start the file (e.g. header)."""
+
+    @abstractmethod
+    def _close(self) -> None:
+        """Finishes the file; called even if writing failed."""
+
+
+class CsvRecordWriter(RecordWriter):
+    """
+    Writes records to a CSV file with a single header row.
+
+    The DataFrame index is written only if it's named (that is, if
+    index_field_name was used to make one of the fields the index).
+    """
+
+    def __init__(self, path: Union[str, os.PathLike]) -> None:
+        super().__init__(path=path)
+        self.__file: Optional[TextIO] = None
+
+    def _open(self) -> None:
+        self.__file = open(  # pylint: disable=consider-using-with
+            self.path, "w", encoding="utf-8", newline=""
+        )
+
+    def _write_chunk(self, chunk: pandas.DataFrame, first_chunk: bool) -> None:
+        chunk.to_csv(
+            self.__file,
+            header=first_chunk,
+            index=chunk.index.name is not None,
+        )
+
+    def _close(self) -> None:
+        if self.__file is not None:
+            self.__file.close()
+            self.__file = None
+
+
+class RedcapImportCsvWriter(CsvRecordWriter):
+    """
+    Writes records as a CSV file shaped for REDCap's Data Import Tool:
+    one header row of the records' field names, the record id field first,
+    no DataFrame index and empty cells for missing values.
+    """
+
+    def __init__(
+        self, path: Union[str, os.PathLike], record_id_field: str = "study_id"
+    ) -> None:
+        super().__init__(path=path)
+
+        if not isinstance(record_id_field, str) or len(record_id_field) == 0:
+            raise TypeError("Input 'record_id_field' is not a non-empty str.")
+
+        self.__record_id_field = record_id_field
+
+    def _write_chunk(self, chunk: pandas.DataFrame, first_chunk: bool) -> None:
+        if chunk.index.name is not None:
+            chunk = chunk.reset_index()
+
+        if self.__record_id_field not in chunk.columns:
+            raise TypeError(
+                f"Field {self.__record_id_field} is not present "
+                f"in the 'records' DataFrame."
+            )
+
+        field_names = [self.__record_id_field] + [
+            field_name
+            for field_name in chunk.columns
+            if field_name != self.__record_id_field
+        ]
+        chunk = chunk[field_names]
+        chunk.index.name = None
+        super()._write_chunk(chunk=chunk, first_chunk=first_chunk)
+
+
+class ParquetRecordWriter(RecordWriter):
+    """
+    Writes records to a Parquet file, one row group per chunk.
+    Given no chunks, it writes a file with no rows and the fields
+    in RECORD_DTYPES.
+
+    Requires the optional pyarrow package; without it, constructing the
+    writer raises ImportError, before anything is synthesized or written.
+    """
+
+    def __init__(self, path: Union[str, os.PathLike]) -> None:
+        super().__init__(path=path)
+
+        # pylint: disable=import-outside-toplevel,unused-import
+        try:
+            import pyarrow.parquet  # noqa: F401
+        except ImportError as error:
+            raise ImportError(
+                "Writing Parquet files requires pyarrow: pip install pyarrow"
+            ) from error
+
+        self.__writer: Optional[Any] = None
+
+    def _open(self) -> None:
+        """The file is created along with the first chunk's schema."""
+
+    def _write_chunk(self, chunk: pandas.DataFrame, first_chunk: bool) -> None:
+        # pylint: disable=import-outside-toplevel
+        import pyarrow
+        import pyarrow.parquet
+
+        table = pyarrow.Table.from_pandas(
+            chunk, preserve_index=chunk.index.name is not None
+        )
+
+        if self.__writer is None:
+            self.__writer = pyarrow.parquet.ParquetWriter(self.path, table.schema)
+        else:
+            table = table.cast(self.__writer.schema)
+
+        self.__writer.write_table(table, row_group_size=max(1, len(chunk)))
+
+    def _close(self) -> None:
+        if self.__writer is None:
+            # No chunks: still write a file, like the CSV writers do,
+            # holding no rows but the records' usual fields.
+            # pylint: disable=import-outside-toplevel
+            import pyarrow
+            import pyarrow.parquet
+
+            self.__writer = pyarrow.parquet.ParquetWriter(
+                self.path,
+                pyarrow.schema(
+                    [
+                        (
+                            field_name,
+                            pyarrow.int64() if dtype == "int64" else pyarrow.string(),
+                        )
+                        for field_name, dtype in RECORD_DTYPES.items()
+                    ]
+                ),
+            )
+
+        self.__writer.close()
+        self.__writer = None
+
+
+if __name__ == "__main__":
+    pass
@@ -0,0 +1,44 @@
+import os
+from abc import ABC, abstractmethod
+from typing import Iterable, NamedTuple, Union
+
+import pandas
+
+class WriteStatistics(NamedTuple):
+    num_records: int
+    num_chunks: int
+    elapsed_seconds: float
+    write_seconds: float
+    @property
+    def records_per_second(self) -> float: ...
+    @property
+    def write_records_per_second(self) -> float: ...
+
+class RecordWriter(ABC):
+    def __init__(self, path: Union[str, os.PathLike]) -> None: ...
+    @property
+    def path(self) -> str: ...
+    def write(
+        self, chunks: Union[pandas.DataFrame, Iterable[pandas.DataFrame]]
+    ) -> WriteStatistics: ...
+    @abstractmethod
+    def _open(self) -> None: ...
+    @abstractmethod
+    def _write_chunk(self, chunk: pandas.DataFrame, first_chunk: bool) -> None: ...
+    @abstractmethod
+    def _close(self) -> None: ...
+
+class CsvRecordWriter(RecordWriter):
+    def _open(self) -> None: ...
+    def _write_chunk(self, chunk: pandas.DataFrame, first_chunk: bool) -> None: ...
+    def _close(self) -> None: ...
+
+class RedcapImportCsvWriter(CsvRecordWriter):
+    def __init__(
+        self, path: Union[str, os.PathLike], record_id_field: str = ...
+    ) -> None: ...
+
+class ParquetRecordWriter(RecordWriter):
+    def _open(self) -> None: ...
+    def _write_chunk(self, chunk: pandas.DataFrame, first_chunk: bool) -> None: ...
+    def _close(self) -> None: ...
@@ -1,98 +1,189 @@
-"""
-Module: contains class StateAbbreviationConverter,
-which converts abbreviations like 'CA' into
-the full state name like 'California'.
- https://stackoverflow.com/a/66572956/18749636
-"""
-
-
-class StateAbbreviationConverter:  # pylint: disable=too-few-public-methods
-    """
-    Contains a dictionary of US state/territory names, keyed by their abbreviations.
-
-    ...
-    Attributes
-    ----------
-    no public attributes
-
-    Methods
-    -------
-    full_name()
-        Converts 'AK' to 'Alaska'.
-    """
-
-    def __init__(self):
-        self.__states = {
-            "AK": "Alaska",
-            "AL": "Alabama",
-            "AR": "Arkansas",
-            "AZ": "Arizona",
-            "CA": "California",
-            "CO": "Colorado",
-            "CT": "Connecticut",
-            "DC": "District of Columbia",
-            "DE": "Delaware",
-            "FL": "Florida",
-            "GA": "Georgia",
-            "HI": "Hawaii",
-            "IA": "Iowa",
-            "ID": "Idaho",
-            "IL": "Illinois",
-            "IN": "Indiana",
-            "KS": "Kansas",
-            "KY": "Kentucky",
-            "LA": "Louisiana",
-            "MA": "Massachusetts",
-            "MD": "Maryland",
-            "ME": "Maine",
-            "MI": "Michigan",
-            "MN": "Minnesota",
-            "MO": "Missouri",
-            "MS": "Mississippi",
-            "MT": "Montana",
-            "NC": "North Carolina",
-            "ND": "North Dakota",
-            "NE": "Nebraska",
-            "NH": "New Hampshire",
-            "NJ": "New Jersey",
-            "NM": "New Mexico",
-            "NV": "Nevada",
-            "NY": "New York",
-            "OH": "Ohio",
-            "OK": "Oklahoma",
-            "OR": "Oregon",
-            "PA": "Pennsylvania",
-            "RI": "Rhode Island",
-            "SC": "South Carolina",
-            "SD": "South Dakota",
-            "TN": "Tennessee",
-            "TX": "Texas",
-            "UT": "Utah",
-            "VA": "Virginia",
-            "VT": "Vermont",
-            "WA": "Washington",
-            "WI": "Wisconsin",
-            "WV": "West Virginia",
-            "WY": "Wyoming",
-        }
-
-    def full_name(self, two_letter_code):
-        """Converts two-letter abbreviation to a full state name.
-
-        Parameters
-        ----------
-        two_letter_code string
-
-        Returns
-        -------
-        string
-
-        """
-        if two_letter_code in self.__states:
-            return self.__states[two_letter_code]
-
-        return two_letter_code
-
-
-if __name__ == "__main__":
-    pass
+"""
+Module: contains class StateAbbreviationConverter,
+which converts abbreviations like 'CA' into
+the full state name like 'California', and back.
+ https://stackoverflow.com/a/66572956/18749636
+"""
+
+from types import MappingProxyType
+from typing import Any, Callable, Mapping
+
+import numpy
+import pandas  # type: ignore[import]
+
+# US state/territory names, keyed by their abbreviations.
+STATE_NAMES: Mapping[str, str] = MappingProxyType(
+    {
+        "AK": "Alaska",
+        "AL": "Alabama",
+        "AR": "Arkansas",
+        "AZ": "Arizona",
+        "CA": "California",
+        "CO": "Colorado",
+        "CT": "Connecticut",
+        "DC": "District of Columbia",
+        "DE": "Delaware",
+        "FL": "Florida",
+        "GA": "Georgia",
+        "HI": "Hawaii",
+        "IA": "Iowa",
+        "ID": "Idaho",
+        "IL": "Illinois",
+        "IN": "Indiana",
+        "KS": "Kansas",
+        "KY": "Kentucky",
+        "LA": "Louisiana",
+        "MA": "Massachusetts",
+        "MD": "Maryland",
+        "ME": "Maine",
+        "MI": "Michigan",
+        "MN": "Minnesota",
+        "MO": "Missouri",
+        "MS": "Mississippi",
+        "MT": "Montana",
+        "NC": "North Carolina",
+        "ND": "North Dakota",
+        "NE": "Nebraska",
+        "NH": "New Hampshire",
+        "NJ": "New Jersey",
+        "NM": "New Mexico",
+        "NV": "Nevada",
+        "NY": "New York",
+        "OH": "Ohio",
+        "OK": "Oklahoma",
+        "OR": "Oregon",
+        "PA": "Pennsylvania",
+        "RI": "Rhode Island",
+        "SC": "South Carolina",
+        "SD": "South Dakota",
+        "TN": "Tennessee",
+        "TX": "Texas",
+        "UT": "Utah",
+        "VA": "Virginia",
+        "VT": "Vermont",
+        "WA": "Washington",
+        "WI": "Wisconsin",
+        "WV": "West Virginia",
+        "WY": "Wyoming",
+    }
+)
+
+# The reverse: abbreviations, keyed by lowercased state/territory name.
+STATE_ABBREVIATIONS: Mapping[str, str] = MappingProxyType(
+    {name.lower(): abbreviation for abbreviation, name in STATE_NAMES.items()}
+)
+
+
+class StateAbbreviationConverter:
+    """
+    Converts US state/territory abbreviations to full names, and back.
+
+    ...
+    Attributes
+    ----------
+    no public attributes
+
+    Methods
+    -------
+    full_name()
+        Converts 'AK' to 'Alaska'.
+    full_names()
+        Converts a whole column of abbreviations.
+    abbreviation()
+        Converts 'Alaska' to 'AK'.
+    abbreviations()
+        Converts a whole column of full names.
+    """
+
+    def full_name(self, two_letter_code: Any) -> Any:
+        """Converts two-letter abbreviation to a full state name.
+
+        Parameters
+        ----------
+        two_letter_code string
+
+        Returns
+        -------
+        string
+
+        """
+        return STATE_NAMES.get(two_letter_code, two_letter_code)
+
+    def full_names(self, two_letter_codes: pandas.Series) -> pandas.Series:
+        """Converts a column of two-letter abbreviations to full state names.
+
+        Parameters
+        ----------
+        two_letter_codes : pandas Series
+
+        Returns
+        -------
+        pandas Series
+            Same index; values that aren't abbreviations are kept as they are.
+
+        Raises
+        ------
+        TypeError
+            If two_letter_codes is not a pandas Series.
+        """
+        return StateAbbreviationConverter.__convert(
+            values=two_letter_codes, convert=self.full_name
+        )
+
+    def abbreviation(self, state_name: Any) -> Any:
+        """Converts a full state name (in any case) to its two-letter abbreviation.
+
+        Parameters
+        ----------
+        state_name string
+
+        Returns
+        -------
+        string
+
+        """
+        try:
+            return STATE_ABBREVIATIONS.get(state_name.lower(), state_name)
+        except AttributeError:
+            return state_name
+
+    def abbreviations(self, state_names: pandas.Series) -> pandas.Series:
+        """Converts a column of full state names to two-letter abbreviations.
+
+        Parameters
+        ----------
+        state_names : pandas Series
+
+        Returns
+        -------
+        pandas Series
+            Same index; values that aren't state names are kept as they are.
+
+        Raises
+        ------
+        TypeError
+            If state_names is not a pandas Series.
+        """
+        return StateAbbreviationConverter.__convert(
+            values=state_names, convert=self.abbreviation
+        )
+
+    @staticmethod
+    def __convert(values: pandas.Series, convert: Callable) -> pandas.Series:
+        """Converts each distinct value once, then gathers the results
+        for every row by its factorized code."""
+        if not isinstance(values, pandas.Series):
+            raise TypeError("Input is not a pandas Series.")
+
+        codes, unique_values = pandas.factorize(values)
+        converted_unique_values = numpy.array(
+            [convert(value) for value in unique_values], dtype=object
+        )
+        converted_values = values.astype(object)
+        present = codes >= 0
+        converted_values.iloc[present] = converted_unique_values[codes[present]]
+        return converted_values
+
+
+if __name__ == "__main__":
+    pass
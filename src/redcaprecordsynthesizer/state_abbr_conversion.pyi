@@ -1,8 +1,12 @@
-from typing import Any
-
-class StateAbbreviationConverter:
-    def __init__(self) -> None:
-        self.__states = None
-        ...
-
-    def full_name(self, two_letter_code: Any): ...
+from typing import Any, Mapping
+
+import pandas
+
+STATE_NAMES: Mapping[str, str]
+STATE_ABBREVIATIONS: Mapping[str, str]
+
+class StateAbbreviationConverter:
+    def full_name(self, two_letter_code: Any) -> Any: ...
+    def full_names(self, two_letter_codes: pandas.Series) -> pandas.Series: ...
+    def abbreviation(self, state_name: Any) -> Any: ...
+    def abbreviations(self, state_names: pandas.Series) -> pandas.Series: ...
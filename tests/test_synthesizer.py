@@ -1,216 +1,1275 @@
-"""
-Module test_synthesizer.py,
-    supports automated testing of FakeRecordGenerator class.
-
-Classes
--------
-TestSynthesizer
-"""
-import pandas
-import pytest
-
-from redcaprecordsynthesizer.fake_records import FakeRecordGenerator
-from redcaprecordsynthesizer.nickname_lookup.python_parser import NicknameGenerator
-from redcaprecordsynthesizer.state_abbr_conversion import StateAbbreviationConverter
-
-
-def test_generator_creation():
-    """Test that we can create fake records."""
-    #
-    # Instantiate the object.
-    #
-    fake_record_generator = FakeRecordGenerator()
-
-    assert isinstance(fake_record_generator, FakeRecordGenerator)
-    #
-    # Create records without duplication.
-    #
-    num_records_desired = 10
-    patient_records = fake_record_generator.create_fake_records(
-        max_number_copies_of_one_record=0,
-        num_records_desired=num_records_desired,
-        percent_records_to_duplicate=0,
-    )
-
-    assert isinstance(patient_records, pandas.DataFrame)
-    assert len(patient_records) == num_records_desired
-    #
-    # Create records with duplication.
-    #
-    num_records_desired = 100
-    pct_to_duplicate = 10
-    patient_records = fake_record_generator.create_fake_records(
-        max_number_copies_of_one_record=1,
-        num_records_desired=num_records_desired,
-        percent_records_to_duplicate=pct_to_duplicate,
-    )
-
-    expected_number_of_records = round(
-        num_records_desired * (100 + pct_to_duplicate) / 100
-    )
-    assert isinstance(patient_records, pandas.DataFrame)
-    assert len(patient_records) == expected_number_of_records
-    #
-    # Create records with duplication but all with unique study_ids.
-    #
-    patient_records = fake_record_generator.create_fake_records(
-        duplicate_study_id=False,
-        max_number_copies_of_one_record=1,
-        num_records_desired=num_records_desired,
-        percent_records_to_duplicate=pct_to_duplicate,
-    )
-
-    expected_number_of_records = round(
-        num_records_desired * (100 + pct_to_duplicate) / 100
-    )
-    assert isinstance(patient_records, pandas.DataFrame)
-    assert len(patient_records) == expected_number_of_records
-
-
-def test_generator_exceptions():
-    """Test that exceptions are raised as expected."""
-    #
-    # Instantiate the object.
-    #
-    fake_record_generator = FakeRecordGenerator()
-
-    assert isinstance(fake_record_generator, FakeRecordGenerator)
-
-    # Not an int.
-    with pytest.raises(TypeError):
-        fake_record_generator.create_fake_records(
-            max_number_copies_of_one_record="error",
-            num_records_desired=10,
-            percent_records_to_duplicate=0,
-        )
-
-    # Less than zero.
-    with pytest.raises(TypeError):
-        fake_record_generator.create_fake_records(
-            max_number_copies_of_one_record=-1,
-            num_records_desired=10,
-            percent_records_to_duplicate=0,
-        )
-
-    # Not an int.
-    with pytest.raises(TypeError):
-        fake_record_generator.create_fake_records(
-            max_number_copies_of_one_record=0,
-            num_records_desired="error",
-            percent_records_to_duplicate=0,
-        )
-
-    # Less than zero.
-    with pytest.raises(TypeError):
-        fake_record_generator.create_fake_records(
-            max_number_copies_of_one_record=0,
-            num_records_desired=-1,
-            percent_records_to_duplicate=0,
-        )
-
-    # Not a float.
-    with pytest.raises(TypeError):
-        fake_record_generator.create_fake_records(
-            max_number_copies_of_one_record=0,
-            num_records_desired=10,
-            percent_records_to_duplicate="error",
-        )
-
-    # Less than zero.
-    with pytest.raises(TypeError):
-        fake_record_generator.create_fake_records(
-            max_number_copies_of_one_record=0,
-            num_records_desired=10,
-            percent_records_to_duplicate=-1,
-        )
-
-    # More than 100.
-    with pytest.raises(TypeError):
-        fake_record_generator.create_fake_records(
-            max_number_copies_of_one_record=0,
-            num_records_desired=10,
-            percent_records_to_duplicate=101,
-        )
-
-    # Provide bogus index field name.
-    with pytest.raises(TypeError):
-        fake_record_generator.create_fake_records(
-            index_field_name=1,
-            max_number_copies_of_one_record=0,
-            num_records_desired=10,
-            percent_records_to_duplicate=20,
-        )
-
-    with pytest.raises(TypeError):
-        fake_record_generator.create_fake_records(
-            index_field_name="not a real name",
-            max_number_copies_of_one_record=0,
-            num_records_desired=10,
-            percent_records_to_duplicate=20,
-        )
-
-
-def test_index_column_option():
-    fake_record_generator = FakeRecordGenerator()
-
-    assert isinstance(fake_record_generator, FakeRecordGenerator)
-
-    num_records_desired = 10
-    patient_records = fake_record_generator.create_fake_records(
-        index_field_name="mrn",
-        max_number_copies_of_one_record=0,
-        num_records_desired=num_records_desired,
-        percent_records_to_duplicate=0,
-    )
-
-    assert isinstance(patient_records, pandas.DataFrame)
-    assert len(patient_records) == num_records_desired
-
-
-def test_nicknames():
-    """Test nickname generation."""
-    nickname_generator = NicknameGenerator()
-
-    assert isinstance(nickname_generator, NicknameGenerator)
-
-    test_name = "Elizabeth"
-    nicknames = nickname_generator.get(test_name)
-    assert isinstance(nicknames, list)
-
-    assert len(nicknames) >= 2
-
-    expected_nickname = "beth"
-    assert expected_nickname in nicknames
-
-    # Expect to receive None.
-    assert nickname_generator.get(5) is None
-    assert nickname_generator.get("Unobtanium") is None
-
-    # Test expected exceptions.
-    with pytest.raises(FileNotFoundError):
-        NicknameGenerator(filename="not a real file.csv")
-
-
-def test_state_abbreviations():
-    """Test conversion of 'CA' to 'California'."""
-    state_abbreviation_converter = StateAbbreviationConverter()
-
-    assert isinstance(state_abbreviation_converter, StateAbbreviationConverter)
-
-    # One that should translate.
-    abbr = "CA"
-    full_state_name = state_abbreviation_converter.full_name(abbr)
-
-    assert isinstance(full_state_name, str)
-    assert full_state_name == "California"
-
-    # One that should NOT.
-    abbr = "XX"
-    full_state_name = state_abbreviation_converter.full_name(abbr)
-
-    assert isinstance(full_state_name, str)
-    assert full_state_name == abbr
-
-
-if __name__ == "__main__":  # pragma: no cover
-    pass
+"""
+Module test_synthesizer.py,
+    supports automated testing of FakeRecordGenerator class.
+
+Classes
+-------
+TestSynthesizer
+"""
+
+import logging
+import multiprocessing
+import sys
+import warnings
+from datetime import date
+
+import numpy
+import pandas
+import pytest
+from faker.providers.address.en_US import Provider as USAddressProvider
+
+from redcaprecordsynthesizer.address_pool import ADDRESS_FIELDS, AddressPool
+from redcaprecordsynthesizer.cli import main
+from redcaprecordsynthesizer.evaluation import PairwiseEvaluator
+from redcaprecordsynthesizer.fake_records import (
+    CLUSTER_ID_FIELD,
+    RECORD_DTYPES,
+    FakeRecordGenerator,
+)
+from redcaprecordsynthesizer.id_allocation import (
+    IdAllocator,
+    PermutationIdAllocator,
+    SetIdAllocator,
+    id_range_for_width,
+    partition_id_range,
+)
+from redcaprecordsynthesizer.instrumentation import Instrumentation
+from redcaprecordsynthesizer.nickname_lookup.python_parser import NicknameGenerator
+from redcaprecordsynthesizer.phone_numbers import (
+    US_PHONE_NUMBER_FORMATS,
+    PhoneNumberGenerator,
+)
+from redcaprecordsynthesizer.record_writers import (
+    CsvRecordWriter,
+    ParquetRecordWriter,
+    RecordWriter,
+    RedcapImportCsvWriter,
+)
+from redcaprecordsynthesizer.state_abbr_conversion import (
+    STATE_ABBREVIATIONS,
+    STATE_NAMES,
+    StateAbbreviationConverter,
+)
+
+
+def test_generator_creation():
+    """Test that we can create fake records."""
+    #
+    # Instantiate the object.
+    #
+    fake_record_generator = FakeRecordGenerator()
+
+    assert isinstance(fake_record_generator, FakeRecordGenerator)
+    #
+    # Create records without duplication.
+    #
+    num_records_desired = 10
+    patient_records = fake_record_generator.create_fake_records(
+        max_number_copies_of_one_record=0,
+        num_records_desired=num_records_desired,
+        percent_records_to_duplicate=0,
+    )
+
+    assert isinstance(patient_records, pandas.DataFrame)
+    assert len(patient_records) == num_records_desired
+    #
+    # Create records with duplication.
+    #
+    num_records_desired = 100
+    pct_to_duplicate = 10
+    patient_records = fake_record_generator.create_fake_records(
+        max_number_copies_of_one_record=1,
+        num_records_desired=num_records_desired,
+        percent_records_to_duplicate=pct_to_duplicate,
+    )
+
+    expected_number_of_records = round(
+        num_records_desired * (100 + pct_to_duplicate) / 100
+    )
+    assert isinstance(patient_records, pandas.DataFrame)
+    assert len(patient_records) == expected_number_of_records
+    #
+    # Create records with duplication but all with unique study_ids.
+    #
+    patient_records = fake_record_generator.create_fake_records(
+        duplicate_study_id=False,
+        max_number_copies_of_one_record=1,
+        num_records_desired=num_records_desired,
+        percent_records_to_duplicate=pct_to_duplicate,
+    )
+
+    expected_number_of_records = round(
+        num_records_desired * (100 + pct_to_duplicate) / 100
+    )
+    assert isinstance(patient_records, pandas.DataFrame)
+    assert len(patient_records) == expected_number_of_records
+
+
+def test_generator_exceptions():
+    """Test that exceptions are raised as expected."""
+    #
+    # Instantiate the object.
+    #
+    fake_record_generator = FakeRecordGenerator()
+
+    assert isinstance(fake_record_generator, FakeRecordGenerator)
+
+    # Not an int.
+    with pytest.raises(TypeError):
+        fake_record_generator.create_fake_records(
+            max_number_copies_of_one_record="error",
+            num_records_desired=10,
+            percent_records_to_duplicate=0,
+        )
+
+    # Less than zero.
+    with pytest.raises(TypeError):
+        fake_record_generator.create_fake_records(
+            max_number_copies_of_one_record=-1,
+            num_records_desired=10,
+            percent_records_to_duplicate=0,
+        )
+
+    # Not an int.
+    with pytest.raises(TypeError):
+        fake_record_generator.create_fake_records(
+            max_number_copies_of_one_record=0,
+            num_records_desired="error",
+            percent_records_to_duplicate=0,
+        )
+
+    # Less than zero.
+    with pytest.raises(TypeError):
+        fake_record_generator.create_fake_records(
+            max_number_copies_of_one_record=0,
+            num_records_desired=-1,
+            percent_records_to_duplicate=0,
+        )
+
+    # Not a float.
+    with pytest.raises(TypeError):
+        fake_record_generator.create_fake_records(
+            max_number_copies_of_one_record=0,
+            num_records_desired=10,
+            percent_records_to_duplicate="error",
+        )
+
+    # Less than zero.
+    with pytest.raises(TypeError):
+        fake_record_generator.create_fake_records(
+            max_number_copies_of_one_record=0,
+            num_records_desired=10,
+            percent_records_to_duplicate=-1,
+        )
+
+    # More than 100.
+    with pytest.raises(TypeError):
+        fake_record_generator.create_fake_records(
+            max_number_copies_of_one_record=0,
+            num_records_desired=10,
+            percent_records_to_duplicate=101,
+        )
+
+    # Provide bogus index field name.
+    with pytest.raises(TypeError):
+        fake_record_generator.create_fake_records(
+            index_field_name=1,
+            max_number_copies_of_one_record=0,
+            num_records_desired=10,
+            percent_records_to_duplicate=20,
+        )
+
+    with pytest.raises(TypeError):
+        fake_record_generator.create_fake_records(
+            index_field_name="not a real name",
+            max_number_copies_of_one_record=0,
+            num_records_desired=10,
+            percent_records_to_duplicate=20,
+        )
+
+
+def test_index_column_option():
+    fake_record_generator = FakeRecordGenerator()
+
+    assert isinstance(fake_record_generator, FakeRecordGenerator)
+
+    num_records_desired = 10
+    patient_records = fake_record_generator.create_fake_records(
+        index_field_name="mrn",
+        max_number_copies_of_one_record=0,
+        num_records_desired=num_records_desired,
+        percent_records_to_duplicate=0,
+    )
+
+    assert isinstance(patient_records, pandas.DataFrame)
+    assert len(patient_records) == num_records_desired
+
+
+def test_record_schema():
+    """Test that the base records have fixed columns and dtypes."""
+    fake_record_generator = FakeRecordGenerator()
+    patient_records = fake_record_generator.create_fake_records(
+        max_number_copies_of_one_record=0,
+        num_records_desired=25,
+        percent_records_to_duplicate=0,
+    )
+
+    assert list(patient_records.columns) == list(RECORD_DTYPES)
+    assert list(patient_records.index) == list(range(25))
+
+    for column_name in ["study_id", "mrn", "ethnicity", "race", "sex"]:
+        assert patient_records[column_name].dtype == "int64"
+
+    assert patient_records["study_id"].is_unique
+
+    # Email addresses are built from the names.
+    email_addresses = patient_records["email_address"]
+    assert email_addresses.str.fullmatch(r"[^@\s]+@[a-z.]+\.[a-z]+").all()
+    assert (
+        email_addresses.str[0] == patient_records["first_name"].str[0].str.lower()
+    ).all()
+
+    for surname, email_address in zip(patient_records["last_name"], email_addresses):
+        assert surname.lower() + "@" in email_address
+
+
+def test_record_dates():
+    """Test that the dates respect the age & consent constraints."""
+    fake_record_generator = FakeRecordGenerator(seed=8)
+    patient_records = fake_record_generator.create_fake_records(
+        num_records_desired=2000,
+        percent_records_to_duplicate=0,
+        reference_date=date(2024, 2, 29),
+    )
+    dates = {
+        column_name: pandas.to_datetime(patient_records[column_name], format="%Y-%m-%d")
+        for column_name in [
+            "dob",
+            "primary_consent_date",
+            "core_participant_date",
+            "date_of_last_activity",
+        ]
+    }
+
+    ages = (dates["date_of_last_activity"] - dates["dob"]).dt.days
+    assert (dates["date_of_last_activity"] == pandas.Timestamp(2024, 2, 29)).all()
+    assert ages.between(int(365.25 * 18), int(365.25 * 116)).all()
+    assert (
+        (dates["primary_consent_date"] - dates["dob"]).dt.days >= int(365.25 * 18)
+    ).all()
+    assert (dates["core_participant_date"] >= dates["primary_consent_date"]).all()
+    assert (dates["core_participant_date"] <= dates["date_of_last_activity"]).all()
+
+
+def test_duplicate_records():
+    """Test that duplicates are appended in bulk with consistent dtypes."""
+    fake_record_generator = FakeRecordGenerator()
+    num_records_desired = 200
+    pct_to_duplicate = 30
+    patient_records = fake_record_generator.create_fake_records(
+        duplicate_study_id=False,
+        max_number_copies_of_one_record=3,
+        num_records_desired=num_records_desired,
+        percent_records_to_duplicate=pct_to_duplicate,
+    )
+
+    num_records_duplicated = round(num_records_desired * pct_to_duplicate / 100)
+    assert (
+        num_records_desired + num_records_duplicated
+        <= len(patient_records)
+        <= num_records_desired + 3 * num_records_duplicated
+    )
+    assert list(patient_records.index) == list(range(len(patient_records)))
+    assert patient_records["study_id"].is_unique
+    assert patient_records["mrn"].dtype == "int64"
+
+    # Every copy keeps the surname of an original record.
+    originals = patient_records.iloc[:num_records_desired]
+    copies = patient_records.iloc[num_records_desired:]
+    assert copies["last_name"].isin(originals["last_name"]).all()
+
+
+def test_cluster_ids():
+    """Test the ground-truth cluster ids and scoring duplicate detection with them."""
+    chunks = list(
+        FakeRecordGenerator(seed=2).iter_fake_records(
+            chunk_size=100,
+            duplicate_study_id=False,
+            include_cluster_id=True,
+            num_records_desired=250,
+            percent_records_to_duplicate=40,
+        )
+    )
+    patient_records = pandas.concat(chunks)
+    base_records = pandas.concat([chunk.iloc[:100] for chunk in chunks]).iloc[:250]
+
+    assert list(patient_records.columns) == list(RECORD_DTYPES) + [CLUSTER_ID_FIELD]
+    assert (base_records[CLUSTER_ID_FIELD] == base_records["study_id"]).all()
+
+    # Each copy (even of a record from an earlier chunk) has its original's id.
+    surnames = base_records.set_index(CLUSTER_ID_FIELD)["last_name"]
+    assert (
+        patient_records["last_name"].to_numpy()
+        == surnames.loc[patient_records[CLUSTER_ID_FIELD]].to_numpy()
+    ).all()
+    assert CLUSTER_ID_FIELD not in FakeRecordGenerator().create_fake_records()
+
+    true_cluster_ids = patient_records[CLUSTER_ID_FIELD]
+    evaluator = PairwiseEvaluator(true_cluster_ids)
+    num_true_pairs = int(
+        (
+            true_cluster_ids.value_counts() * (true_cluster_ids.value_counts() - 1) // 2
+        ).sum()
+    )
+    assert evaluator.num_records == len(patient_records)
+    assert evaluator.num_true_pairs == num_true_pairs
+
+    perfect_scores = evaluator.score_clusters(true_cluster_ids + 1000)
+    assert (perfect_scores.precision, perfect_scores.recall) == (1.0, 1.0)
+
+    no_scores = evaluator.score_clusters(pandas.Series([None] * len(patient_records)))
+    assert (no_scores.num_predicted_pairs, no_scores.recall) == (0, 0.0)
+
+    # Merging everything finds every true pair, among many false ones.
+    merged_scores = evaluator.score_clusters(numpy.zeros(len(patient_records)))
+    assert merged_scores.recall == 1.0
+    assert merged_scores.precision == pytest.approx(
+        num_true_pairs / (len(patient_records) * (len(patient_records) - 1) / 2)
+    )
+
+    # The same pairs, listed twice in both orders with self-pairs & a wrong one.
+    true_pairs = numpy.array(
+        [
+            (first_row, second_row)
+            for first_row, cluster_id in enumerate(true_cluster_ids)
+            for second_row in numpy.flatnonzero(true_cluster_ids == cluster_id)
+        ]
+    )
+    pair_scores = evaluator.score_pairs(
+        numpy.concatenate([true_pairs, true_pairs[:, ::-1], [[0, 1]]])
+    )
+    assert pair_scores.true_positives == num_true_pairs
+    assert pair_scores.num_predicted_pairs == num_true_pairs + (
+        true_cluster_ids.iloc[0] != true_cluster_ids.iloc[1]
+    )
+    assert evaluator.score_pairs(numpy.empty((0, 2), dtype=int)).precision == 1.0
+
+    with pytest.raises(TypeError):
+        evaluator.score_clusters(true_cluster_ids.iloc[1:])
+
+    with pytest.raises(TypeError):
+        evaluator.score_pairs([[0, len(patient_records)]])
+
+    with pytest.raises(TypeError):
+        PairwiseEvaluator(pandas.Series([1, None]))
+
+    # Unrelated records made on different nodes never share a cluster.
+    node_records = pandas.concat(
+        [
+            FakeRecordGenerator(node_id=node_id, seed=1, shard_count=2)
+            .create_fake_records(
+                include_cluster_id=True,
+                index_field_name=CLUSTER_ID_FIELD,
+                num_records_desired=50,
+                percent_records_to_duplicate=0,
+            )
+            .reset_index()
+            for node_id in range(2)
+        ]
+    )
+    assert PairwiseEvaluator(node_records[CLUSTER_ID_FIELD]).num_true_pairs == 0
+
+
+def test_id_allocators():
+    """Test that allocators hand out unique ids until the range runs out."""
+    for allocator_class in [PermutationIdAllocator, SetIdAllocator]:
+        allocator = allocator_class(min_id=100, max_id=199)
+        first_id = allocator.allocate()
+        other_ids = allocator.allocate_many(count=99)
+        all_ids = [first_id] + other_ids.tolist()
+
+        assert sorted(all_ids) == list(range(100, 200))
+        assert allocator.num_remaining == 0
+
+        with pytest.raises(RuntimeError):
+            allocator.allocate()
+
+    with pytest.raises(TypeError):
+        PermutationIdAllocator(min_id=10, max_id=1)
+
+    with pytest.raises(TypeError):
+        IdAllocator(min_id=1, max_id=10)  # pylint: disable=abstract-class-instantiated
+
+    # Study ids from the generator come from the same allocator.
+    fake_record_generator = FakeRecordGenerator(id_allocator=SetIdAllocator)
+    patient_records = fake_record_generator.create_fake_records(
+        max_number_copies_of_one_record=0,
+        num_records_desired=10,
+        percent_records_to_duplicate=0,
+    )
+    new_study_id = fake_record_generator.create_fake_study_id()
+
+    assert 10000 <= new_study_id <= 99999
+    assert new_study_id not in patient_records["study_id"].tolist()
+
+
+def test_id_ranges():
+    """Test configurable study id & MRN ranges."""
+    study_id_range = id_range_for_width(9)
+    mrn_range = (1, 150)
+    fake_record_generator = FakeRecordGenerator(
+        mrn_range=mrn_range, study_id_range=study_id_range
+    )
+    patient_records = fake_record_generator.create_fake_records(
+        duplicate_study_id=False,
+        max_number_copies_of_one_record=1,
+        num_records_desired=100,
+        percent_records_to_duplicate=50,
+    )
+
+    assert study_id_range == (100000000, 999999999)
+    assert patient_records["study_id"].between(*study_id_range).all()
+    assert patient_records["mrn"].between(*mrn_range).all()
+
+    # Base records never share an MRN, and new MRNs given to copies are unused.
+    base_records = patient_records.iloc[:100]
+    assert base_records["mrn"].is_unique
+    assert patient_records.drop_duplicates(subset=["last_name", "mrn"])["mrn"].is_unique
+
+    # More records than the range can hold, refused before any are made...
+    with pytest.raises(TypeError):
+        FakeRecordGenerator(study_id_range=(1, 5)).create_fake_records(
+            max_number_copies_of_one_record=0,
+            num_records_desired=6,
+            percent_records_to_duplicate=0,
+        )
+
+    with pytest.raises(TypeError):
+        FakeRecordGenerator(mrn_range=(1, 5)).iter_fake_records(num_records_desired=6)
+
+    # ...or copies needing new ids once the base records have used them all.
+    with pytest.raises(RuntimeError):
+        FakeRecordGenerator(study_id_range=(1, 5)).create_fake_records(
+            duplicate_study_id=False,
+            max_number_copies_of_one_record=1,
+            num_records_desired=5,
+            percent_records_to_duplicate=100,
+        )
+
+    with pytest.raises(TypeError):
+        FakeRecordGenerator(mrn_range=(10, 1))
+
+    with pytest.raises(TypeError):
+        FakeRecordGenerator(study_id_range="error")
+
+
+def _synthesize_node_records(node_id: int) -> pandas.DataFrame:
+    """One node's part of a dataset split over three nodes sharing no state."""
+    return FakeRecordGenerator(
+        node_id=node_id, seed=3, shard_count=3
+    ).create_fake_records(
+        duplicate_study_id=False,
+        num_records_desired=1000,
+        percent_records_to_duplicate=30,
+        reference_date=date(2024, 1, 1),
+    )
+
+
+def test_node_partitions():
+    """Test that nodes in separate processes never hand out the same ids."""
+    partitions = [
+        partition_id_range(id_range=(10, 19), node_id=node_id, shard_count=3)
+        for node_id in range(3)
+    ]
+    assert partitions == [(10, 12), (13, 15), (16, 19)]
+
+    with multiprocessing.Pool(processes=3) as pool:
+        node_records = pool.map(_synthesize_node_records, range(3))
+
+    patient_records = pandas.concat(node_records, ignore_index=True)
+    assert patient_records["study_id"].is_unique
+
+    for node_id, records in enumerate(node_records):
+        assert (
+            records["study_id"]
+            .between(
+                *partition_id_range(
+                    id_range=(10000, 99999), node_id=node_id, shard_count=3
+                )
+            )
+            .all()
+        )
+
+    mrn_sets = [set(records["mrn"]) for records in node_records]
+    assert len(set.union(*mrn_sets)) == sum(len(mrns) for mrns in mrn_sets)
+
+    # The nodes shared a seed, but not their records.
+    assert len(set(patient_records["first_name"] + patient_records["dob"])) > 2500
+
+    pandas.testing.assert_frame_equal(node_records[1], _synthesize_node_records(1))
+
+    with pytest.raises(TypeError):
+        FakeRecordGenerator(node_id=3, shard_count=3)
+
+    with pytest.raises(TypeError):
+        FakeRecordGenerator(shard_count=0)
+
+    with pytest.raises(TypeError):
+        FakeRecordGenerator(mrn_range=(1, 2), shard_count=3)
+
+
+def test_locale_option():
+    """Test that the generator's Faker can be given a list of locales."""
+    fake_record_generator = FakeRecordGenerator(locale=["en_US", "en_GB"])
+    patient_records = fake_record_generator.create_fake_records(
+        max_number_copies_of_one_record=1,
+        num_records_desired=20,
+        percent_records_to_duplicate=20,
+    )
+
+    assert len(patient_records) == 24
+
+    with pytest.raises(TypeError):
+        FakeRecordGenerator(locale=5)
+
+    # Accented names make ASCII email addresses, as in Faker: Lévy -> levy.
+    patient_records = FakeRecordGenerator(
+        locale=["en_US", "fr_FR"], seed=1
+    ).create_fake_records(num_records_desired=300, reference_date=date(2024, 1, 1))
+    assert not patient_records["last_name"].map(str.isascii).all()
+    assert patient_records["email_address"].map(str.isascii).all()
+
+    # Locales with addresses of their own have no US states & zip codes.
+    for locale in ["en_CA", ["ja_JP", "de_DE"]]:
+        with pytest.raises(TypeError):
+            FakeRecordGenerator(locale=locale)
+
+    with pytest.raises(TypeError):
+        AddressPool(locale="en_CA", size=1)
+
+
+def test_seed_option():
+    """Test that a seed reproduces the same records."""
+    record_options = {
+        "duplicate_study_id": False,
+        "max_number_copies_of_one_record": 2,
+        "num_records_desired": 50,
+        "percent_records_to_duplicate": 20,
+        "reference_date": date(2024, 1, 1),
+    }
+    first_records = FakeRecordGenerator(seed=7).create_fake_records(**record_options)
+    fake_record_generator = FakeRecordGenerator()
+    fake_record_generator.create_fake_records(**record_options)
+    second_records = fake_record_generator.create_fake_records(seed=7, **record_options)
+
+    pandas.testing.assert_frame_equal(first_records, second_records)
+    assert (first_records["date_of_last_activity"] == "2024-01-01").all()
+    assert (first_records["core_participant_date"] <= "2024-01-01").all()
+
+    other_records = FakeRecordGenerator(seed=8).create_fake_records(**record_options)
+    assert not first_records.equals(other_records)
+
+    with pytest.raises(TypeError):
+        FakeRecordGenerator(seed="error")
+
+    with pytest.raises(TypeError):
+        fake_record_generator.create_fake_records(seed=-1)
+
+
+def test_workers_option(monkeypatch):
+    """Test that the records don't depend on the number of worker processes."""
+    record_options = {
+        "max_number_copies_of_one_record": 2,
+        "num_records_desired": 1500,
+        "percent_records_to_duplicate": 5,
+        "reference_date": date(2024, 1, 1),
+        "seed": 11,
+    }
+    fake_record_generator = FakeRecordGenerator()
+    one_worker_records = fake_record_generator.create_fake_records(
+        workers=1, **record_options
+    )
+    two_worker_records = fake_record_generator.create_fake_records(
+        workers=2, **record_options
+    )
+
+    pandas.testing.assert_frame_equal(one_worker_records, two_worker_records)
+    assert one_worker_records["study_id"].iloc[:1500].is_unique
+
+    # Chunk by chunk, the worker processes are started once per run.
+    pools_started = []
+    start_pool = multiprocessing.Pool
+
+    def count_pools(*args, **kwargs):
+        pools_started.append(args or kwargs)
+        return start_pool(*args, **kwargs)
+
+    monkeypatch.setattr(multiprocessing, "Pool", count_pools)
+    record_options["num_records_desired"] = 4500
+    chunks = list(
+        fake_record_generator.iter_fake_records(
+            chunk_size=2000, workers=2, **record_options
+        )
+    )
+    assert len(chunks) == 3
+    assert len(pools_started) == 1
+    pandas.testing.assert_frame_equal(
+        pandas.concat(chunks),
+        pandas.concat(
+            fake_record_generator.iter_fake_records(
+                chunk_size=2000, workers=1, **record_options
+            )
+        ),
+    )
+
+    with pytest.raises(TypeError):
+        fake_record_generator.create_fake_records(workers=0)
+
+
+def test_address_pool(tmp_path):
+    """Test drawing addresses from a precomputed pool."""
+    address_pool = AddressPool(seed=4, size=50)
+    assert address_pool.size == 50
+    assert list(address_pool.addresses.columns) == ADDRESS_FIELDS
+    pandas.testing.assert_frame_equal(
+        address_pool.addresses, AddressPool(seed=4, size=50).addresses
+    )
+
+    # Each zip code belongs to its state.
+    for state, zip_code in address_pool.addresses[["state", "zip_code"]].values:
+        min_zip_code, max_zip_code = USAddressProvider.states_postcode[state]
+        assert min_zip_code <= int(zip_code) <= max_zip_code
+
+    addresses = address_pool.sample(count=200, rng=numpy.random.default_rng(2))
+    assert len(addresses) == 200
+    assert addresses.merge(address_pool.addresses).shape == (200, 4)
+
+    # Persist it & read it back.
+    pool_file = tmp_path / "addresses.csv"
+    address_pool.save(pool_file)
+    pandas.testing.assert_frame_equal(
+        AddressPool.load(pool_file).addresses, address_pool.addresses
+    )
+
+    # Seeded records drawing on the pool are reproducible, whatever the workers.
+    record_options = {
+        "num_records_desired": 1200,
+        "reference_date": date(2024, 1, 1),
+        "seed": 5,
+    }
+    fake_record_generator = FakeRecordGenerator(address_pool=address_pool)
+    records = fake_record_generator.create_fake_records(**record_options)
+    pandas.testing.assert_frame_equal(
+        records, fake_record_generator.create_fake_records(workers=2, **record_options)
+    )
+    base_addresses = records[ADDRESS_FIELDS].iloc[:1200]
+    assert base_addresses.merge(address_pool.addresses).shape == (1200, 4)
+    assert (
+        records.dtypes.to_dict()
+        == FakeRecordGenerator()
+        .create_fake_records(num_records_desired=5)
+        .dtypes.to_dict()
+    )
+
+    # Test expected exceptions.
+    with pytest.raises(TypeError):
+        AddressPool(size=0)
+
+    with pytest.raises(TypeError):
+        address_pool.sample(count=-1)
+
+    with pytest.raises(TypeError):
+        FakeRecordGenerator(address_pool=address_pool.addresses)
+
+    (tmp_path / "not_a_pool.csv").write_text("a,b\n1,2\n", encoding="utf-8")
+
+    with pytest.raises(TypeError):
+        AddressPool.load(tmp_path / "not_a_pool.csv")
+
+
+def test_phone_numbers():
+    """Test synthesizing phone numbers a column at a time."""
+    phone_number_generator = PhoneNumberGenerator()
+    assert phone_number_generator.formats == US_PHONE_NUMBER_FORMATS
+
+    phone_numbers = phone_number_generator.create(
+        count=3000, rng=numpy.random.default_rng(6)
+    )
+    assert len(phone_numbers) == 3000
+    assert not any("x" in phone_number for phone_number in phone_numbers)
+    assert numpy.array_equal(
+        phone_numbers,
+        phone_number_generator.create(count=3000, rng=numpy.random.default_rng(6)),
+    )
+
+    # Every format is used.
+    digits_only = pandas.Series(phone_numbers).str.replace(r"\D", "", regex=True)
+    assert set(digits_only.str.len()) == {10, 11, 13}
+    assert pandas.Series(phone_numbers).str.startswith("(").any()
+
+    phone_number_generator = PhoneNumberGenerator(formats=["{area}/{exchange}-{line}"])
+    assert (
+        pandas.Series(phone_number_generator.create(count=100))
+        .str.fullmatch(r"[2-9]\d\d/[2-9]\d\d-\d{4}")
+        .all()
+    )
+
+    fake_record_generator = FakeRecordGenerator(
+        phone_number_formats=["{area}{exchange}{line}"]
+    )
+    patient_records = fake_record_generator.create_fake_records(num_records_desired=10)
+    assert patient_records["phone_number"].str.fullmatch(r"\d{10}").all()
+
+    # Test expected exceptions.
+    with pytest.raises(TypeError):
+        PhoneNumberGenerator(formats=[])
+
+    with pytest.raises(TypeError):
+        PhoneNumberGenerator(formats=["{area}-{extension}"])
+
+    with pytest.raises(TypeError):
+        PhoneNumberGenerator(formats=["{area"])
+
+    with pytest.raises(TypeError):
+        phone_number_generator.create(count=-1)
+
+
+def test_logging_options(tmp_path, monkeypatch, caplog):
+    """Test that logging is per phase, file-free by default and off when quiet."""
+    monkeypatch.chdir(tmp_path)
+    record_options = {"num_records_desired": 30, "percent_records_to_duplicate": 50}
+
+    with caplog.at_level(logging.DEBUG, logger="redcaprecordsynthesizer"):
+        FakeRecordGenerator().create_fake_records(**record_options)
+
+    assert list(tmp_path.iterdir()) == []
+    assert len(caplog.records) == 3
+    assert caplog.records[-1].levelno == logging.INFO
+    assert caplog.records[-1].num_records == 30
+    caplog.clear()
+
+    with caplog.at_level(logging.DEBUG):
+        FakeRecordGenerator(quiet=True).create_fake_records(**record_options)
+
+        with pytest.raises(TypeError):
+            FakeRecordGenerator(quiet=True).create_fake_records(workers=0)
+
+    assert len(caplog.records) == 0
+
+
+def test_instrumentation():
+    """Test that each phase is measured without changing the records."""
+    record_options = {
+        "num_records_desired": 1001,
+        "percent_records_to_duplicate": 20,
+        "reference_date": date(2024, 1, 1),
+        "seed": 4,
+    }
+    instrumentation = Instrumentation()
+    fake_record_generator = FakeRecordGenerator()
+    instrumented_records = fake_record_generator.create_fake_records(
+        instrumentation=instrumentation, **record_options
+    )
+    statistics = instrumentation.statistics
+
+    # Two blocks of base records; everything else once per run.
+    assert statistics["base records: dates"].calls == 2
+    assert statistics["base records: names"].calls == 1001
+    assert statistics["base records: addresses"].calls == 1001
+    assert statistics["base records"].calls == 1
+    assert statistics["duplicate records: nicknames"].calls == 1
+    assert all(phase.wall_seconds >= 0 for phase in statistics.values())
+    assert statistics["base records"].wall_seconds >= (
+        statistics["base records: names"].wall_seconds
+    )
+    assert statistics["base records"].peak_memory_mb == 0
+    assert list(instrumentation.to_frame().columns) == [
+        "calls",
+        "wall_seconds",
+        "cpu_seconds",
+        "peak_memory_mb",
+    ]
+
+    pandas.testing.assert_frame_equal(
+        instrumented_records,
+        fake_record_generator.create_fake_records(**record_options),
+    )
+
+    instrumentation = Instrumentation(trace_memory=True)
+    fake_record_generator.create_fake_records(
+        instrumentation=instrumentation, num_records_desired=10
+    )
+    assert instrumentation.statistics["base records"].peak_memory_mb > 0
+
+    # Addresses drawn from a pool are measured once per block, not per record.
+    instrumentation = Instrumentation()
+    FakeRecordGenerator(address_pool=AddressPool(seed=4, size=50)).create_fake_records(
+        instrumentation=instrumentation, num_records_desired=10
+    )
+    assert instrumentation.statistics["base records: names"].calls == 10
+    assert instrumentation.statistics["base records: addresses"].calls == 1
+
+    with pytest.raises(TypeError):
+        Instrumentation(trace_memory="yes")
+
+    with pytest.raises(TypeError):
+        fake_record_generator.create_fake_records(instrumentation="not one")
+
+
+def test_iter_fake_records():
+    """Test synthesizing records in bounded chunks."""
+    fake_record_generator = FakeRecordGenerator()
+    chunk_size = 40
+    chunks = list(
+        fake_record_generator.iter_fake_records(
+            chunk_size=chunk_size,
+            duplicate_study_id=False,
+            max_number_copies_of_one_record=1,
+            num_records_desired=100,
+            percent_records_to_duplicate=10,
+        )
+    )
+
+    assert len(chunks) == 3
+    assert all(len(chunk) <= chunk_size * 1.1 + 1 for chunk in chunks)
+
+    patient_records = pandas.concat(chunks)
+    assert len(patient_records) == 110
+    assert list(patient_records.index) == list(range(110))
+    assert patient_records["study_id"].is_unique
+
+    # Copies are drawn from all the records made so far, not mostly from
+    # the current chunk: in the 10th chunk about 1 copy in 10 is of its own
+    # records. (Over chunks 2-20 that's about 14%; 50% if not weighted.)
+    chunks = list(
+        fake_record_generator.iter_fake_records(
+            chunk_size=50,
+            include_cluster_id=True,
+            max_number_copies_of_one_record=1,
+            num_records_desired=1000,
+            percent_records_to_duplicate=40,
+            seed=6,
+        )
+    )
+    copies_of_own_records = [
+        chunk.iloc[50:][CLUSTER_ID_FIELD].isin(chunk.iloc[:50]["study_id"])
+        for chunk in chunks[1:]
+    ]
+    assert pandas.concat(copies_of_own_records).mean() < 0.3
+
+    # Helpers are built with the generator, not again for every chunk
+    # (a NicknameGenerator warns as it locates its data file).
+    with warnings.catch_warnings():
+        warnings.simplefilter("error", DeprecationWarning)
+        list(
+            fake_record_generator.iter_fake_records(
+                chunk_size=50, num_records_desired=200, percent_records_to_duplicate=40
+            )
+        )
+
+    # Inputs are checked before the first chunk is requested.
+    with pytest.raises(TypeError):
+        fake_record_generator.iter_fake_records(chunk_size=0)
+
+    with pytest.raises(TypeError):
+        fake_record_generator.iter_fake_records(index_field_name="not a real name")
+
+
+def test_fake_record_sequence():
+    """Test that each base record can be synthesized directly from its position."""
+    sequence_options = {
+        "num_records_desired": 3000000,
+        "reference_date": date(2024, 1, 1),
+        "seed": 5,
+    }
+    fake_record_generator = FakeRecordGenerator(
+        mrn_range=id_range_for_width(7), study_id_range=id_range_for_width(7)
+    )
+    fake_record_sequence = fake_record_generator.fake_record_sequence(
+        **sequence_options
+    )
+    records = fake_record_sequence[2999970:]
+
+    assert len(fake_record_sequence) == 3000000
+    assert fake_record_sequence.seed == 5
+    assert list(records.columns) == list(RECORD_DTYPES)
+    assert list(records.index) == list(range(2999970, 3000000))
+    assert records["study_id"].is_unique
+    assert records["mrn"].between(*id_range_for_width(7)).all()
+    assert (records["primary_consent_date"] <= "2024-01-01").all()
+
+    # A record is the same however it's reached...
+    pandas.testing.assert_series_equal(fake_record_sequence[-1], records.iloc[-1])
+    pandas.testing.assert_frame_equal(
+        pandas.concat([fake_record_sequence[2999970:2999981], records.iloc[11:]]),
+        records,
+    )
+    pandas.testing.assert_frame_equal(
+        fake_record_sequence[2999999:2999969:-4], records.iloc[::-4]
+    )
+
+    # ...and from any generator given the same seed.
+    pandas.testing.assert_frame_equal(
+        FakeRecordGenerator(
+            mrn_range=id_range_for_width(7), study_id_range=id_range_for_width(7)
+        ).fake_record_sequence(**sequence_options)[2999970:],
+        records,
+    )
+    assert not fake_record_generator.fake_record_sequence(
+        num_records_desired=3000000, seed=6
+    )[2999970:].equals(records)
+
+    assert len(fake_record_sequence[10:10]) == 0
+    assert (
+        FakeRecordGenerator(address_pool=AddressPool(seed=1, size=5))
+        .fake_record_sequence(num_records_desired=20)[:]["zip_code"]
+        .nunique()
+        <= 5
+    )
+
+    with pytest.raises(IndexError):
+        fake_record_sequence[3000000]
+
+    with pytest.raises(TypeError):
+        fake_record_sequence["one"]
+
+    with pytest.raises(TypeError):
+        fake_record_generator.fake_record_sequence(num_records_desired=10000000)
+
+    with pytest.raises(TypeError):
+        fake_record_generator.fake_record_sequence(seed=-1)
+
+
+def test_interleaved_runs():
+    """Test that a paused iterator isn't disturbed by other runs on its generator."""
+    fake_record_generator = FakeRecordGenerator()
+    instrumentation = Instrumentation()
+    chunks = fake_record_generator.iter_fake_records(
+        chunk_size=100,
+        duplicate_study_id=False,
+        instrumentation=instrumentation,
+        max_number_copies_of_one_record=1,
+        num_records_desired=300,
+        percent_records_to_duplicate=20,
+        reference_date=date(2024, 1, 1),
+    )
+    first_chunk = next(chunks)
+    fake_record_generator.create_fake_records(
+        duplicate_study_id=False,
+        num_records_desired=10,
+        reference_date=date(2000, 1, 1),
+    )
+    fake_record_generator.create_fake_study_id()
+    all_chunks = [first_chunk] + list(chunks)
+    patient_records = pandas.concat(all_chunks)
+
+    assert len(patient_records) == 360
+    assert patient_records["study_id"].is_unique
+    assert pandas.concat([chunk.iloc[:100] for chunk in all_chunks])["mrn"].is_unique
+    assert (patient_records["date_of_last_activity"] == "2024-01-01").all()
+    assert instrumentation.statistics["allocate ids"].calls == 3
+
+
+def test_record_writers(tmp_path):
+    """Test writing chunks of records straight to disk."""
+    fake_record_generator = FakeRecordGenerator()
+    record_options = {
+        "chunk_size": 30,
+        "max_number_copies_of_one_record": 1,
+        "num_records_desired": 70,
+        "percent_records_to_duplicate": 10,
+        "seed": 5,
+    }
+    expected_records = pandas.concat(
+        fake_record_generator.iter_fake_records(**record_options)
+    )
+
+    csv_path = tmp_path / "records.csv"
+    write_statistics = CsvRecordWriter(path=csv_path).write(
+        fake_record_generator.iter_fake_records(**record_options)
+    )
+
+    assert write_statistics.num_records == len(expected_records)
+    assert write_statistics.num_chunks == 3
+    assert write_statistics.records_per_second > 0
+    pandas.testing.assert_frame_equal(
+        pandas.read_csv(csv_path, dtype=RECORD_DTYPES), expected_records
+    )
+
+    # REDCap import: record id first, no index even if one was set.
+    redcap_path = tmp_path / "redcap_import.csv"
+    RedcapImportCsvWriter(path=redcap_path, record_id_field="mrn").write(
+        expected_records.set_index("study_id")
+    )
+    redcap_records = pandas.read_csv(redcap_path)
+
+    assert redcap_records.columns[0] == "mrn"
+    assert sorted(redcap_records.columns) == sorted(RECORD_DTYPES)
+    assert len(redcap_records) == len(expected_records)
+
+    with pytest.raises(TypeError):
+        CsvRecordWriter(path=5)
+
+    with pytest.raises(TypeError):
+        RecordWriter(path=csv_path)  # pylint: disable=abstract-class-instantiated
+
+    pytest.importorskip("pyarrow")
+
+    # Every writer writes a file, even with no chunks.
+    empty_csv_path = tmp_path / "empty.csv"
+    assert CsvRecordWriter(path=empty_csv_path).write([]).num_records == 0
+    assert empty_csv_path.exists()
+    empty_parquet_path = tmp_path / "empty.parquet"
+    assert ParquetRecordWriter(path=empty_parquet_path).write([]).num_chunks == 0
+    empty_records = pandas.read_parquet(empty_parquet_path)
+    assert len(empty_records) == 0
+    assert list(empty_records.columns) == list(RECORD_DTYPES)
+    assert str(empty_records["study_id"].dtype) == "int64"
+
+    parquet_path = tmp_path / "records.parquet"
+    ParquetRecordWriter(path=parquet_path).write(
+        fake_record_generator.iter_fake_records(**record_options)
+    )
+    parquet_records = pandas.read_parquet(parquet_path)
+
+    assert len(parquet_records) == len(expected_records)
+    assert list(parquet_records["study_id"]) == list(expected_records["study_id"])
+
+
+def test_command_line(tmp_path, capsys, monkeypatch):
+    """Test the redcap-synth command."""
+    output_path = tmp_path / "records.csv"
+    exit_status = main(
+        [
+            str(output_path),
+            "--num-records-desired",
+            "50",
+            "--percent-records-to-duplicate",
+            "10",
+            "--max-number-copies-of-one-record",
+            "1",
+            "--chunk-size",
+            "20",
+            "--seed",
+            "3",
+            "--format",
+            "redcap",
+            "--include-cluster-id",
+        ]
+    )
+
+    assert exit_status == 0
+    assert len(pandas.read_csv(output_path)) == 55
+    assert pandas.read_csv(output_path)["cluster_id"].nunique() == 50
+    assert "records/s" in capsys.readouterr().err
+
+    assert main([str(output_path), "--num-records-desired", "0", "--quiet"]) == 2
+
+    # A locale without US addresses is refused before any file is written.
+    canadian_output_path = tmp_path / "canadian.csv"
+    assert main([str(canadian_output_path), "--locale", "en_CA", "--quiet"]) == 2
+    assert not canadian_output_path.exists()
+
+    # Bad writer options are refused before any file is written...
+    redcap_output_path = tmp_path / "redcap.csv"
+    exit_status = main(
+        [str(redcap_output_path), "--format", "redcap", "--record-id-field", ""]
+    )
+    assert exit_status == 2
+    assert not redcap_output_path.exists()
+
+    # ...as is Parquet without pyarrow.
+    parquet_output_path = tmp_path / "records.parquet"
+    monkeypatch.setitem(sys.modules, "pyarrow", None)
+    monkeypatch.setitem(sys.modules, "pyarrow.parquet", None)
+    assert main([str(parquet_output_path), "--quiet"]) == 2
+    assert not parquet_output_path.exists()
+    monkeypatch.undo()
+
+    # A record id field the records lack is only found once writing starts.
+    exit_status = main(
+        [
+            str(redcap_output_path),
+            "--format",
+            "redcap",
+            "--record-id-field",
+            "nope",
+            "--quiet",
+        ]
+    )
+    assert exit_status == 1
+    assert not redcap_output_path.exists()
+
+    # Copies with new study ids use up a range of 5 part way through.
+    exhausted_output_path = tmp_path / "exhausted.csv"
+    exit_status = main(
+        [
+            str(exhausted_output_path),
+            "--num-records-desired",
+            "5",
+            "--percent-records-to-duplicate",
+            "100",
+            "--study-id-range",
+            "1",
+            "5",
+            "--no-duplicate-study-id",
+            "--quiet",
+        ]
+    )
+
+    assert exit_status == 1
+    assert not exhausted_output_path.exists()
+    assert "redcap-synth: error:" in capsys.readouterr().err
+
+
+def test_nicknames():
+    """Test nickname generation."""
+    nickname_generator = NicknameGenerator()
+
+    assert isinstance(nickname_generator, NicknameGenerator)
+
+    test_name = "Elizabeth"
+    nicknames = nickname_generator.get(test_name)
+    assert isinstance(nicknames, list)
+
+    assert len(nicknames) >= 2
+
+    expected_nickname = "beth"
+    assert expected_nickname in nicknames
+
+    # Expect to receive None.
+    assert nickname_generator.get(5) is None
+    assert nickname_generator.get("Unobtanium") is None
+
+    # Look up a whole column at once.
+    nicknames_of_names = nickname_generator.get_many(
+        pandas.Series([test_name, "Unobtanium", None])
+    )
+    assert nicknames_of_names == [tuple(sorted(nicknames)), (), ()]
+
+    # Substitute nicknames into a whole column.
+    names = pandas.Series([test_name, "Unobtanium", None] * 100, index=range(5, 305))
+    substituted_names = nickname_generator.substitute(
+        names=names, rng=numpy.random.default_rng(1)
+    )
+    assert substituted_names.index.equals(names.index)
+    assert set(substituted_names[::3]) <= {nickname.title() for nickname in nicknames}
+    assert (substituted_names[1::3] == "Unobtanium").all()
+    assert substituted_names[2::3].isna().all()
+    assert nickname_generator.substitute(names=names, probability=0).equals(names)
+    assert names.iloc[0] == test_name  # Input left unchanged.
+    missing_names = pandas.Series([None, None])
+    assert nickname_generator.substitute(names=missing_names).equals(missing_names)
+    empty_names = pandas.Series([], dtype=object)
+    assert nickname_generator.substitute(names=empty_names).equals(empty_names)
+
+    # Map nicknames back to their canonical names' groups.
+    assert nickname_generator.same_group("Beth", test_name)
+    assert nickname_generator.same_group("Ron", "Aaron")
+    assert nickname_generator.same_group("Ron", "Ronald")
+    assert not nickname_generator.same_group("Aaron", "Ronald")
+    assert not nickname_generator.same_group("Unobtanium", "Unobtanium")
+    assert nickname_generator.group_ids(5) == frozenset()
+    ronald_group_id = next(
+        group_id
+        for group_id in nickname_generator.group_ids("Ronald")
+        if nickname_generator.canonical_names[group_id] == "ronald"
+    )
+    group_id_column = nickname_generator.group_id_column(
+        pandas.Series(["Ronald", "Ron", "Unobtanium", None])
+    )
+    assert str(group_id_column.dtype) == "Int64"
+    assert group_id_column[0] == ronald_group_id
+    assert group_id_column[1] in nickname_generator.group_ids("Ron")
+    assert group_id_column[2:].isna().all()
+
+    # Test expected exceptions.
+    with pytest.raises(FileNotFoundError):
+        NicknameGenerator(filename="not a real file.csv")
+
+    with pytest.raises(TypeError):
+        nickname_generator.substitute(names=[test_name])
+
+    with pytest.raises(TypeError):
+        nickname_generator.substitute(names=names, probability=1.5)
+
+    with pytest.raises(TypeError):
+        nickname_generator.group_id_column(names=["Ron"])
+
+
+def test_nickname_cache_file(tmp_path):
+    """Test that the parsed nickname table is cached & refreshed on disk."""
+    names_file = tmp_path / "names.csv"
+    names_file.write_text("robert,bob,bobby\n", encoding="utf-8")
+    cache_file = tmp_path / "names.csv.pickle"
+
+    nickname_generator = NicknameGenerator(filename=str(names_file))
+    assert nickname_generator.get("Robert") == ["bob", "bobby"]
+    assert not cache_file.exists()
+
+    # Already loaded by this process, but the cache file is still written.
+    nickname_generator = NicknameGenerator(
+        filename=str(names_file), use_cache_file=True
+    )
+    assert nickname_generator.get("Bob") == ["bobby", "robert"]
+    assert cache_file.exists()
+
+    cache_file.unlink()
+    names_file.write_text("robert,bob,bobby,rob\n", encoding="utf-8")
+    nickname_generator = NicknameGenerator(
+        filename=str(names_file), use_cache_file=True
+    )
+    assert nickname_generator.get("Robert") == ["bob", "bobby", "rob"]
+    assert cache_file.exists()
+
+    # A stale or corrupt cache file is rebuilt.
+    cache_file.write_bytes(b"not a pickle")
+    names_file.write_text("william,bill\n", encoding="utf-8")
+    nickname_generator = NicknameGenerator(
+        filename=str(names_file), use_cache_file=True
+    )
+    assert nickname_generator.get("Bill") == ["william"]
+    assert nickname_generator.get("Robert") is None
+
+
+def test_state_abbreviations():
+    """Test conversion of 'CA' to 'California'."""
+    state_abbreviation_converter = StateAbbreviationConverter()
+
+    assert isinstance(state_abbreviation_converter, StateAbbreviationConverter)
+
+    # One that should translate.
+    abbr = "CA"
+    full_state_name = state_abbreviation_converter.full_name(abbr)
+
+    assert isinstance(full_state_name, str)
+    assert full_state_name == "California"
+
+    # One that should NOT.
+    abbr = "XX"
+    full_state_name = state_abbreviation_converter.full_name(abbr)
+
+    assert isinstance(full_state_name, str)
+    assert full_state_name == abbr
+
+    # A whole column, and back again.
+    abbrs = pandas.Series(["CA", "XX", None, "NY"], index=[3, 1, 4, 1])
+    full_state_names = state_abbreviation_converter.full_names(abbrs)
+    assert full_state_names.index.equals(abbrs.index)
+    assert full_state_names.fillna("").tolist() == ["California", "XX", "", "New York"]
+    assert state_abbreviation_converter.abbreviations(full_state_names).fillna(
+        ""
+    ).tolist() == ["CA", "XX", "", "NY"]
+    assert state_abbreviation_converter.abbreviation("NEW YORK") == "NY"
+    assert state_abbreviation_converter.abbreviation(None) is None
+    assert len(STATE_NAMES) == len(STATE_ABBREVIATIONS)
+
+    with pytest.raises(TypeError):
+        STATE_NAMES["XX"] = "Unobtanium"
+
+    with pytest.raises(TypeError):
+        state_abbreviation_converter.full_names(["CA"])
+
+
+if __name__ == "__main__":  # pragma: no cover
+    pass